@@ -0,0 +1,116 @@
+"""Load test for admission control: honest wallets' p99 while scripted wallets flood /race/train, with admission on and off."""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from typing import Tuple
+import numpy as np
+
+PORT = 8765
+SEED = "sEdLoadTestSeed0000"
+
+async def wait_ready(client) -> None:
+    for _ in range(200):
+        try:
+            await client.get("/health/live")
+            return
+        except Exception:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+async def honest(client, n: int, rate: float, deadline: float, latencies: list, statuses: dict) -> None:
+    wallet, headers = f"rHonest{n:019d}", {"X-Forwarded-For": f"10.1.{n // 250}.{n % 250}"}
+    response = await client.post("/race/car/create", json={"wallet_address": wallet, "wallet_seed": SEED}, headers=headers)
+    car_id = response.json()["car_id"]
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post("/race/test", json={"car_id": car_id, "wallet_address": wallet}, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        await asyncio.sleep(max(0.0, 1 / rate - (time.perf_counter() - start)))
+
+async def post_raw(reader, writer, path: str, body: str, ip: str) -> Tuple[int, bytes]:
+    # Hand-rolled keep-alive HTTP/1.1, so the flood costs the load generator far less than the server
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        f"X-Forwarded-For: {ip}\r\nContent-Length: {len(body)}\r\n\r\n{body}".encode()
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+    return int(head[9:12]), await reader.readexactly(length)
+
+async def abuser(n: int, deadline: float, statuses: dict) -> None:
+    # Even abusers flood /race/train for one wallet from rotating IPs; odd ones
+    # create cars for a fresh wallet on every request from a single IP
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    wallet = f"rAbuse{n:020d}"
+    if n % 2 == 0:
+        body = f'{{"wallet_address": "{wallet}", "wallet_seed": "{SEED}"}}'
+        _, created = await post_raw(reader, writer, "/race/car/create", body, f"10.8.0.{n % 250}")
+        body = f'{{"car_id": "{json.loads(created)["car_id"]}", "wallet_address": "{wallet}", "wallet_seed": "{SEED}"}}'
+    i = 0
+    while time.perf_counter() < deadline:
+        i += 1
+        if n % 2 == 0:
+            status, _ = await post_raw(reader, writer, "/race/train", body, f"10.{10 + i % 200}.{n % 250}.{i % 250}")
+        else:
+            body = f'{{"wallet_address": "rSybil{n:06d}{i:014d}", "wallet_seed": "{SEED}"}}'
+            status, _ = await post_raw(reader, writer, "/race/car/create", body, "10.9.0.1")
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+def flood(abusers: int, duration: float, results: multiprocessing.Queue) -> None:
+    # Runs in its own process so the honest clients' timings don't include the flood's CPU
+    async def run():
+        statuses = {}
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(abuser(n, deadline, statuses) for n in range(abusers)))
+        return statuses
+    results.put(asyncio.run(run()))
+
+async def scenario(label: str, enabled: bool, honest_users: int, abusers: int, duration: float) -> None:
+    import httpx
+
+    env = {**os.environ, "ADMISSION_ENABLED": str(enabled), "LEDGER_STREAM_ENABLED": "False", "RACE_HISTORY_DIR": "",
+           "RACING_REPOSITORY": "memory", "WALLET_POOL_HIGH": "0", "RACING_SEED": "1"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        limits = httpx.Limits(max_connections=honest_users, max_keepalive_connections=honest_users)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+            await wait_ready(client)
+            results = multiprocessing.Queue()
+            flooder = multiprocessing.Process(target=flood, args=(abusers, duration, results))
+            flooder.start()
+            deadline = time.perf_counter() + duration
+            latencies, honest_statuses = [], {}
+            await asyncio.gather(*(honest(client, n, 2.0, deadline, latencies, honest_statuses) for n in range(honest_users)))
+            abuse_statuses = await asyncio.get_running_loop().run_in_executor(None, results.get)
+            flooder.join()
+            cars = next(line for line in (await client.get("/metrics")).text.splitlines() if line.startswith("racing_cars "))
+        millis = np.array(latencies) * 1000
+        print(f"{label}")
+        print(f"  honest /race/test: {len(millis)} requests   p50 {np.percentile(millis, 50):7.1f} ms   "
+              f"p99 {np.percentile(millis, 99):7.1f} ms   statuses {dict(sorted(honest_statuses.items()))}")
+        print(f"  abusers: {sum(abuse_statuses.values())} requests   statuses {dict(sorted(abuse_statuses.items()))}   {cars.split()[1]} cars")
+    finally:
+        server.terminate()
+        server.wait()
+
+async def main(honest_users: int, abusers: int, duration: float) -> None:
+    await scenario("admission off", False, honest_users, abusers, duration)
+    await scenario("admission on", True, honest_users, abusers, duration)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--honest", type=int, default=20, help="Wallets testing their car twice a second")
+    parser.add_argument("--abusers", type=int, default=100, help="Concurrent scripted clients")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.honest, args.abusers, args.duration))
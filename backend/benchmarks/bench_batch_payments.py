@@ -0,0 +1,46 @@
+"""Payments/second from one sender: sequential send_payment vs the pipelined batch API."""
+import argparse
+import asyncio
+import os
+import time
+from benchmarks.mock_rippled import running_mock_rippled
+
+DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+
+async def main(sequential: int, batch: int, ledger) -> None:
+    from xrpl.wallet import Wallet
+    from services import PaymentService, AccountCache, PaymentJobTracker, xrpl_pool
+
+    cache = AccountCache()
+    jobs = PaymentJobTracker(xrpl_pool, cache, poll_interval=0.2)
+    service = PaymentService(xrpl_pool, cache, jobs)
+    sender = Wallet.create()
+
+    start = time.perf_counter()
+    for _ in range(sequential):
+        await service.send_payment(sender.seed, DESTINATION, 1)
+    elapsed = time.perf_counter() - start
+    print(f"sequential  {sequential:>5} payments   {elapsed:7.2f} s   {sequential / elapsed:8.1f} payments/s")
+
+    tracking_before = {method: ledger.calls.get(method, 0) for method in ("tx", "ledger")}
+    start = time.perf_counter()
+    submitted = await service.send_batch(sender.seed, [{"destination": DESTINATION, "amount": 1}] * batch)
+    submit_elapsed = time.perf_counter() - start
+    final = await asyncio.gather(*(jobs.wait(job["job_id"]) for job in submitted))
+    elapsed = time.perf_counter() - start
+    validated = sum(1 for job in final if job["status"] == "validated")
+    print(f"batch       {batch:>5} payments   {elapsed:7.2f} s   {validated / elapsed:8.1f} payments/s   "
+          f"(submitted in {submit_elapsed:.2f} s, {validated}/{batch} validated)")
+    tracking = {method: ledger.calls.get(method, 0) - count for method, count in tracking_before.items()}
+    print(f"            tracking requests: {tracking['tx']} tx, {tracking['ledger']} ledger")
+
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sequential", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    with running_mock_rippled(close_interval=1.0) as (url, ledger):
+        os.environ["TESTNET_URL"] = url
+        asyncio.run(main(args.sequential, args.batch, ledger))
@@ -0,0 +1,82 @@
+"""Memory and throughput of CarStore against the previous object-per-car layout."""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Dict, List
+import numpy as np
+from services.car_store import Car, CarStore
+
+rng = np.random.default_rng(7)
+
+class LegacyCar:
+    """The object-per-car layout RacingService used before CarStore."""
+
+    def __init__(self, car_id: str, wallet_address: str, flags: List[int], weights: List[float]):
+        self.car_id = car_id
+        self.wallet_address = wallet_address
+        self.flags = flags
+        self.training_count = 0
+        self.created_at = "2025-01-01T00:00:00.000000"
+        self.last_trained = None
+        self.last_speed = None
+        self.weights = weights
+
+class LegacyStore:
+
+    def __init__(self):
+        self.cars: Dict[str, LegacyCar] = {}
+        self.garage: Dict[str, List[str]] = {}
+
+    def add(self, car_id, wallet_address, flags, weights):
+        self.cars[car_id] = LegacyCar(car_id, wallet_address, flags, weights)
+        self.garage.setdefault(wallet_address, []).append(car_id)
+
+    def garage_of(self, wallet_address):
+        return [self.cars[cid] for cid in self.garage.get(wallet_address, []) if cid in self.cars]
+
+    def remove(self, car_id):
+        car = self.cars[car_id]
+        self.garage[car.wallet_address].remove(car_id)
+        del self.cars[car_id]
+
+def measure(name: str, store, add, garage_of, remove, cars: int, owners: List[str], sells: int) -> None:
+    car_ids = [f"CAR-{i:012x}" for i in range(cars)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i, car_id in enumerate(car_ids):
+        flags, weights = Car.random_attributes(rng)
+        add(car_id, owners[i % len(owners)], flags, weights)
+    build = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for owner in owners:
+        garage_of(owner)
+    garage = time.perf_counter() - start
+
+    victims = random.Random(7).sample(car_ids, sells)
+    start = time.perf_counter()
+    for car_id in victims:
+        remove(car_id)
+    sell = time.perf_counter() - start
+
+    print(f"{name:<8} {current / cars:8.0f} B/car   {current / 2**20:8.1f} MiB   "
+          f"create {cars / build:10.0f}/s   garage reads {len(owners) / garage:8.0f}/s   sells {sells / sell:10.0f}/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=1000)
+    parser.add_argument("--sells", type=int, default=10000)
+    args = parser.parse_args()
+    owners = [f"rOwner{i:08d}" for i in range(args.owners)]
+
+    legacy = LegacyStore()
+    measure("legacy", legacy, legacy.add, legacy.garage_of, legacy.remove, args.cars, owners, args.sells)
+    del legacy
+
+    store = CarStore()
+    measure("store", store, store.add, store.garage, store.remove, args.cars, owners, args.sells)
@@ -0,0 +1,55 @@
+"""Compare a fresh AsyncJsonRpcClient per call against the shared XRPLClientPool."""
+import argparse
+import asyncio
+import statistics
+import time
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.models.requests import AccountInfo
+from benchmarks.mock_rippled import running_mock_rippled
+from services.xrpl_client import XRPLClientPool
+
+ADDRESS = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+
+async def run(make_client, requests: int, concurrency: int) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            client = make_client()
+            start = time.perf_counter()
+            await client.request(AccountInfo(account=ADDRESS, ledger_index="validated"))
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+def report(name: str, latencies: list, elapsed: float) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:<12} {len(latencies) / elapsed:>9.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+
+async def main(url: str, requests: int, concurrency: int) -> None:
+    start = time.perf_counter()
+    latencies = await run(lambda: AsyncJsonRpcClient(url), requests, concurrency)
+    report("per-call", latencies, time.perf_counter() - start)
+
+    pool = XRPLClientPool(url, max_connections=concurrency, max_keepalive=concurrency)
+    await pool.start()
+    start = time.perf_counter()
+    latencies = await run(lambda: pool, requests, concurrency)
+    report("pooled", latencies, time.perf_counter() - start)
+    await pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--url", help="Existing rippled JSON-RPC URL (defaults to a local mock)")
+    args = parser.parse_args()
+    if args.url:
+        asyncio.run(main(args.url, args.requests, args.concurrency))
+    else:
+        with running_mock_rippled() as (url, _):
+            asyncio.run(main(url, args.requests, args.concurrency))
@@ -0,0 +1,73 @@
+"""Push event fan-out: memory per idle subscriber, publish cost and slow-consumer backpressure."""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from services.event_hub import EventHub
+
+async def consume(hub: EventHub, subscriber, latencies: list, expected: int) -> None:
+    received = 0
+    while received < expected:
+        events, dropped = await hub.next_events(subscriber)
+        now = time.perf_counter()
+        for _, data in events:
+            latencies.append(now - float(data))
+        received += len(events) + dropped
+
+def percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+async def main(subscribers: int, events: int, max_pending: int) -> None:
+    hub = EventHub(max_pending=max_pending)
+    wallets = [f"rBench{i:08d}" for i in range(subscribers)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    subs = [hub.subscribe(wallet) for wallet in wallets]
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / subscribers
+    tracemalloc.stop()
+    print(f"{subscribers} idle subscribers: {per_subscriber:.0f} B each")
+
+    # One task per subscriber parked in next_events, as the SSE handlers are
+    latencies: list = []
+    per_wallet = max(1, events // subscribers)
+    tasks = [asyncio.create_task(consume(hub, sub, latencies, per_wallet)) for sub in subs]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for i in range(per_wallet * subscribers):
+        hub.publish(wallets[i % subscribers], "race", time.perf_counter())
+        if i % 1000 == 999:
+            await asyncio.sleep(0)
+    publish_elapsed = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    total = per_wallet * subscribers
+    print(f"published {total} events in {publish_elapsed * 1000:.1f} ms ({total / publish_elapsed:.0f}/s), "
+          f"delivered in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"delivery latency p50 {percentile(latencies, 0.5):.2f} ms  p99 {percentile(latencies, 0.99):.2f} ms")
+    for sub in subs:
+        hub.unsubscribe(sub)
+
+    # Every subscriber watching one wallet: a single publish fans out to all of them
+    broadcast = [hub.subscribe("rBroadcast") for _ in range(subscribers)]
+    start = time.perf_counter()
+    hub.publish("rBroadcast", "balance", {'balance_xrp': 100.0})
+    print(f"one event to {subscribers} subscribers of a wallet: {(time.perf_counter() - start) * 1000:.2f} ms")
+    for sub in broadcast:
+        hub.unsubscribe(sub)
+
+    # A reader that never drains keeps only max_pending events
+    slow = hub.subscribe("rSlow")
+    for i in range(events):
+        hub.publish("rSlow", "race", i)
+    buffered, dropped = await hub.next_events(slow, timeout=0)
+    print(f"slow consumer after {events} events: {len(buffered)} buffered, {dropped} dropped")
+    hub.unsubscribe(slow)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--max-pending", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.subscribers, args.events, args.max_pending))
@@ -0,0 +1,60 @@
+"""Measure /health latency while payments are in flight against a local stub ledger."""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from benchmarks.mock_rippled import running_mock_rippled
+
+DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+
+async def probe_health(client, duration: float, interval: float) -> list:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+def report(name: str, latencies: list) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    print(f"{name:<22} probes {len(latencies):>4}   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   max {latencies[-1] * 1000:7.2f} ms")
+
+async def main(payments: int, duration: float, interval: float) -> None:
+    import httpx
+    from xrpl.wallet import Wallet
+    from main import app
+    from services import xrpl_pool
+
+    await xrpl_pool.start()
+    seeds = [Wallet.create().seed for _ in range(payments)]
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        report("idle", await probe_health(client, duration, interval))
+
+        async def pay(seed: str):
+            return await client.post("/payment", json={"sender_seed": seed, "destination": DESTINATION, "amount": 1})
+
+        start = time.perf_counter()
+        payment_tasks = asyncio.gather(*(pay(seed) for seed in seeds))
+        report(f"{payments} payments in flight", await probe_health(client, duration, interval))
+        responses = await payment_tasks
+        elapsed = time.perf_counter() - start
+
+    ok = sum(1 for r in responses if r.status_code == 200)
+    print(f"payments validated      {ok}/{payments} in {elapsed:.2f} s")
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payments", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--interval", type=float, default=0.02)
+    args = parser.parse_args()
+    with running_mock_rippled(close_interval=1.0) as (url, _):
+        os.environ["TESTNET_URL"] = url
+        asyncio.run(main(args.payments, args.duration, args.interval))
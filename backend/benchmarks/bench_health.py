@@ -0,0 +1,58 @@
+"""Health probes: per-probe server_info vs the background snapshot behind /health/ready, against a slow upstream."""
+import argparse
+import asyncio
+import os
+import time
+from benchmarks.mock_rippled import running_mock_rippled
+
+async def probe(client, path: str, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await client.get(path)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - start
+
+async def main(ledger, probes: int, concurrency: int) -> None:
+    import httpx
+    import xrpl
+    from fastapi import FastAPI
+    from main import app
+    from services import health_monitor, xrpl_pool
+
+    # The pre-snapshot handler, for comparison
+    baseline = FastAPI()
+
+    @baseline.get("/health")
+    async def per_probe_health():
+        server_info = await xrpl_pool.request(xrpl.models.requests.ServerInfo())
+        return {"ledger": server_info.result.get('info', {}).get('validated_ledger', {}).get('seq')}
+
+    await xrpl_pool.start()
+    health_monitor.start()
+    while health_monitor.snapshot().get("ledger") is None:
+        await asyncio.sleep(0.05)
+
+    for name, target, path in (("per-probe server_info", baseline, "/health"), ("/health/ready", app, "/health/ready"), ("/health/live", app, "/health/live")):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=target), base_url="http://bench") as client:
+            calls = ledger.calls.get('server_info', 0)
+            elapsed = await probe(client, path, probes, concurrency)
+            print(f"{name:>22}: {probes / elapsed:8.0f} probes/s, {elapsed / probes * concurrency * 1000:7.2f} ms each, "
+                  f"{ledger.calls.get('server_info', 0) - calls} server_info calls")
+
+    await health_monitor.close()
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--probes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Upstream latency per call (seconds)")
+    args = parser.parse_args()
+    with running_mock_rippled(latency=args.latency) as (url, ledger):
+        os.environ["TESTNET_URL"] = url
+        os.environ["LEDGER_STREAM_ENABLED"] = "False"
+        asyncio.run(main(ledger, args.probes, args.concurrency))
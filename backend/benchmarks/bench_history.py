@@ -0,0 +1,80 @@
+"""Transaction history: cursor pagination and NDJSON-style export vs one account_tx per dashboard load."""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+from benchmarks.mock_rippled import running_mock_rippled
+
+async def main(ledger, ws_url: str, payments: int, loads: int, window: int) -> None:
+    from xrpl.wallet import Wallet
+    from xrpl.models.requests import AccountTx
+    from services import AccountCache, EventHub, LedgerStream, PaymentJobTracker, PaymentService, TransactionHistory, xrpl_pool
+
+    cache = AccountCache()
+    stream = LedgerStream(ws_url, xrpl_pool, EventHub(), cache)
+    history = TransactionHistory(xrpl_pool, cache, stream, max_transactions=window)
+    jobs = PaymentJobTracker(xrpl_pool, cache, poll_interval=0.2)
+    service = PaymentService(xrpl_pool, cache, jobs, history)
+    stream.start()
+    while not stream.live:
+        await asyncio.sleep(0.05)
+
+    sender = Wallet.create()
+    address = Wallet.create().classic_address
+    for start in range(0, payments, 500):
+        submitted = await service.send_batch(sender.seed, [{"destination": address, "amount": 1}] * min(500, payments - start))
+        await asyncio.gather(*(jobs.wait(job["job_id"]) for job in submitted))
+    expected = [tx['hash'] for tx in reversed(ledger.account_txs[address])]
+
+    # Walk every page; the first `window` come from the cache, the rest pass rippled's marker through
+    seen, cursor, pages = [], None, 0
+    start = time.perf_counter()
+    while True:
+        page, cursor = await service.get_transaction_history(address, 50, cursor)
+        seen.extend(entry['tx']['hash'] for entry in page)
+        pages += 1
+        if cursor is None:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"paginated {len(seen)} transactions in {pages} pages ({elapsed * 1000:.0f} ms): "
+          f"{'matches' if seen == expected else 'DIFFERS FROM'} rippled order, {len(seen) - len(set(seen))} duplicates")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    exported = 0
+    async for _ in service.export_transaction_history(address):
+        exported += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"exported {exported} transactions in {(time.perf_counter() - start) * 1000:.0f} ms, peak {peak / 1024:.0f} KiB traced")
+
+    # Dashboard loads of the first page while a payment lands every few loads
+    calls = ledger.calls.get('account_tx', 0)
+    for i in range(loads):
+        if i % 10 == 0:
+            await service.send_payment(sender.seed, address, 1)
+        await service.get_transaction_history(address, 10)
+    cached_calls = ledger.calls.get('account_tx', 0) - calls
+    newest, _ = await service.get_transaction_history(address, 1)
+
+    calls = ledger.calls.get('account_tx', 0)
+    for _ in range(loads):
+        await xrpl_pool.request(AccountTx(account=address, ledger_index_min=-1, ledger_index_max=-1, limit=10))
+    direct_calls = ledger.calls.get('account_tx', 0) - calls
+    print(f"{loads} first-page loads: {cached_calls} account_tx calls cached vs {direct_calls} uncached; "
+          f"newest cached = newest on ledger: {newest[0]['tx']['hash'] == ledger.account_txs[address][-1]['hash']}")
+    print(history.stats())
+
+    await stream.close()
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payments", type=int, default=3000)
+    parser.add_argument("--loads", type=int, default=200)
+    parser.add_argument("--window", type=int, default=1000)
+    args = parser.parse_args()
+    with running_mock_rippled(close_interval=0.5) as (url, ledger):
+        os.environ["TESTNET_URL"] = url
+        asyncio.run(main(ledger, url.replace("http://", "ws://"), args.payments, args.loads, args.window))
@@ -0,0 +1,67 @@
+"""Retry storms against /payment and /race/car/create: ledger submissions and cars created with and without Idempotency-Key."""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from benchmarks.mock_rippled import running_mock_rippled
+
+DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+
+async def storm(client, path: str, body: dict, retries: int, gap: float, keyed: bool) -> list:
+    # A client that times out and retries every `gap` seconds while the first attempt is still running
+    headers = {"Idempotency-Key": str(uuid.uuid4())} if keyed else {}
+
+    async def attempt(n: int):
+        await asyncio.sleep(n * gap)
+        return await client.post(path, json=body, headers=headers)
+    return await asyncio.gather(*(attempt(n) for n in range(retries + 1)))
+
+async def main(ledger, operations: int, retries: int, gap: float) -> None:
+    import httpx
+    from xrpl.wallet import Wallet
+    from main import app
+    from services import idempotency_requests, xrpl_pool
+    from services.racing_service import racing_service
+
+    seeds = [Wallet.create().seed for _ in range(operations)]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        for keyed in (False, True):
+            label = "Idempotency-Key" if keyed else "no key"
+            submits = ledger.calls.get('submit', 0)
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(
+                storm(client, "/payment", {"sender_seed": seed, "destination": DESTINATION, "amount": 1}, retries, gap, keyed)
+                for seed in seeds
+            ))
+            elapsed = time.perf_counter() - start
+            hashes = {r.json().get("transaction_hash") for attempts in responses for r in attempts if r.status_code == 200}
+            print(f"/payment, {label:<15} {operations} payments x {retries + 1} attempts: "
+                  f"{ledger.calls.get('submit', 0) - submits} ledger submissions, {len(hashes)} distinct transactions, {elapsed:.2f} s")
+
+            cars = len(racing_service.store)
+            await asyncio.gather(*(
+                storm(client, "/race/car/create", {"wallet_address": f"rStorm{n:020d}", "wallet_seed": seeds[n]}, retries, 0, keyed)
+                for n in range(operations)
+            ))
+            print(f"/race/car/create, {label:<8} {operations} cars x {retries + 1} attempts: {len(racing_service.store) - cars} cars created")
+
+    counts = {labels: int(value) for labels, value in idempotency_requests._values.items()}
+    deduplicated = sum(value for (_, result), value in counts.items() if result in ("replayed", "coalesced"))
+    total = sum(counts.values())
+    print(f"keyed requests {total}: {deduplicated} answered without running again ({deduplicated / total:.0%}), by outcome {counts}")
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=20)
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--gap", type=float, default=0.3, help="Seconds between a payment's retries")
+    args = parser.parse_args()
+    with running_mock_rippled(close_interval=1.0) as (url, ledger):
+        # The app's singletons read these at import time
+        os.environ.update(TESTNET_URL=url, LEDGER_STREAM_ENABLED="False", RACE_HISTORY_DIR="", RACING_REPOSITORY="memory",
+                          WALLET_POOL_HIGH="0", ADMISSION_ENABLED="False")
+        logging.disable(logging.INFO)
+        asyncio.run(main(ledger, args.operations, args.retries, args.gap))
@@ -0,0 +1,84 @@
+"""Warm restart of the journal repository: snapshot + journal tail vs replaying the whole journal."""
+import argparse
+import gc
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from services.car_store import BASE_WEIGHTS, NUM_ATTRIBUTES
+from services.race_history import RaceHistory
+from services.racing_journal import JournalRacingRepository
+from services.racing_service import RacingService
+
+def populate(directory: str, cars: int, tail: int, snapshot: bool) -> None:
+    rng = np.random.default_rng(7)
+    repository = JournalRacingRepository(directory, snapshot_every=1 << 62)
+    service = RacingService(repository, RaceHistory(), rng=rng)
+    start = time.perf_counter()
+    batch = 100_000
+    for first in range(0, cars, batch):
+        count = min(batch, cars - first)
+        flags = rng.integers(1, 1000, (count, NUM_ATTRIBUTES))
+        weights = np.asarray(BASE_WEIGHTS) + rng.uniform(-0.02, 0.02, (count, NUM_ATTRIBUTES))
+        weights /= weights.sum(axis=1, keepdims=True)
+        records = [
+            {'car_id': f"CAR-{i:012x}", 'wallet_address': f"rBench{i % 10000:08d}", 'flags': car_flags, 'weights': car_weights}
+            for i, car_flags, car_weights in zip(range(first, first + count), flags, weights)
+        ]
+        for car in service.store.add_records(records):
+            repository.save_car(service.store.record(car))
+    repository.flush()
+    elapsed = time.perf_counter() - start
+    print(f"  journaled {cars:,} cars in {elapsed:.1f} s: {repository.committed_events:,} events in {repository.commits:,} fsyncs "
+          f"({repository.committed_events / max(repository.commits, 1):,.0f} events per group commit)")
+
+    if snapshot:
+        start = time.perf_counter()
+        repository.snapshot()
+        captured = time.perf_counter() - start
+        repository.wait_snapshot()
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory) if name.startswith("snapshot-"))
+        print(f"  snapshot: {captured * 1000:.0f} ms on the caller, {time.perf_counter() - start:.1f} s to disk, {size / 2**20:.0f} MiB")
+
+    # A tail of trainings, races and sales after the snapshot
+    car_ids = rng.choice(cars, tail, replace=False)
+    for n, i in enumerate(car_ids.tolist()):
+        car_id, wallet = f"CAR-{i:012x}", f"rBench{i % 10000:08d}"
+        if n % 3 == 0:
+            service.train_car(car_id, wallet, "sEdBench")
+        elif n % 3 == 1:
+            service.enter_race(car_id, wallet, "sEdBench")
+        else:
+            service.sell_car(car_id, wallet)
+    repository.flush()
+    # Simulated crash: no close(), so no final snapshot
+    repository._writes.put(None)
+    repository._writer.join()
+
+def restart(directory: str) -> None:
+    gc.collect()
+    start = time.perf_counter()
+    repository = JournalRacingRepository(directory)
+    service = RacingService(repository, RaceHistory())
+    elapsed = time.perf_counter() - start
+    print(f"  restart: {len(service.store):,} cars, {service.history.total:,} races, "
+          f"{repository.replayed_events:,} journal events replayed in {elapsed:.2f} s")
+    repository._writes.put(None)
+    repository._writer.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=30000)
+    args = parser.parse_args()
+
+    for label, snapshot in (("snapshot + tail", True), ("journal only", False)):
+        directory = tempfile.mkdtemp(prefix="racing-journal-")
+        try:
+            print(label)
+            populate(directory, args.cars, args.tail, snapshot)
+            gc.collect()
+            restart(directory)
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,66 @@
+"""Leaderboard rank / top-K / near-rank latency at fleet scale under training churn."""
+import argparse
+import random
+import time
+import numpy as np
+from services.car_store import Car, CarStore
+
+rng = np.random.default_rng(7)
+
+def percentiles(samples) -> str:
+    micros = np.array(samples) * 1e6
+    return f"p50 {np.percentile(micros, 50):8.1f} us   p99 {np.percentile(micros, 99):8.1f} us"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--trains-per-query", type=int, default=10)
+    args = parser.parse_args()
+
+    store = CarStore()
+    start = time.perf_counter()
+    batch = 100_000
+    for first in range(0, args.cars, batch):
+        store.add_records(
+            {'car_id': f"CAR-{i:012x}", 'wallet_address': f"rBench{i % 10000:08d}", 'flags': flags, 'weights': weights}
+            for i, (flags, weights) in ((i, Car.random_attributes(rng)) for i in range(first, min(first + batch, args.cars)))
+        )
+    print(f"built {len(store.leaderboard)} ranked cars in {time.perf_counter() - start:.1f} s")
+
+    car_ids = [f"CAR-{i:012x}" for i in range(args.cars)]
+    cars = [store.get(car_id) for car_id in car_ids]
+
+    train, rank, top, around = [], [], [], []
+    for _ in range(args.queries):
+        for car in random.sample(cars, args.trains_per_query):
+            t = time.perf_counter()
+            car.train([random.randrange(10)])
+            train.append(time.perf_counter() - t)
+
+        car_id = random.choice(car_ids)
+        t = time.perf_counter()
+        store.leaderboard.rank(car_id)
+        rank.append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        store.leaderboard.page(random.randrange(args.cars - 100), 100)
+        top.append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        store.leaderboard.around(car_id, 5)
+        around.append(time.perf_counter() - t)
+
+    print(f"train + re-rank      {percentiles(train)}   ({len(train)} trains)")
+    print(f"rank(car_id)         {percentiles(rank)}")
+    print(f"page of 100          {percentiles(top)}")
+    print(f"around(car_id, 5)    {percentiles(around)}")
+
+    # What every request would cost without the index
+    naive = []
+    for _ in range(5):
+        t = time.perf_counter()
+        order = np.argsort(-store.speed[:args.cars], kind='stable')
+        int(np.flatnonzero(order == 0)[0])
+        naive.append(time.perf_counter() - t)
+    print(f"naive argsort rank   {percentiles(naive)}")
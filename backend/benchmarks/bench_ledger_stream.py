@@ -0,0 +1,91 @@
+"""Balance reads served from the shared ledger stream vs JSON-RPC, including a reconnect with backfill."""
+import argparse
+import asyncio
+import os
+import time
+from benchmarks.mock_rippled import running_mock_rippled
+
+def percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+async def read_balances(service, addresses: list, rounds: int) -> list:
+    latencies = []
+    for _ in range(rounds):
+        for address in addresses:
+            start = time.perf_counter()
+            await service.get_balance(address)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+async def wait_live(stream, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not stream.live:
+        if time.monotonic() > deadline:
+            raise RuntimeError("ledger stream did not come up")
+        await asyncio.sleep(0.05)
+
+def mismatches(stream, ledger, addresses: list) -> int:
+    return sum(1 for address in addresses if int(stream.account_data(address)['Balance']) != ledger.balances[address])
+
+async def main(ledger, ws_url: str, accounts: int, payments: int, rounds: int) -> None:
+    from xrpl.wallet import Wallet
+    from services import (
+        AccountCache, EventHub, LedgerStream, PaymentJobTracker, PaymentService, WalletService, xrpl_pool
+    )
+
+    cache = AccountCache()
+    stream = LedgerStream(ws_url, xrpl_pool, EventHub(), cache)
+    jobs = PaymentJobTracker(xrpl_pool, cache, poll_interval=0.2)
+    payments_service = PaymentService(xrpl_pool, cache, jobs)
+    polled = WalletService(xrpl_pool, AccountCache(ttl=0))
+    streamed = WalletService(xrpl_pool, cache, stream)
+    stream.start()
+    await wait_live(stream)
+
+    sender = Wallet.create()
+    addresses = [Wallet.create().classic_address for _ in range(accounts)]
+    for address in addresses + [sender.classic_address]:
+        await streamed.get_balance(address)
+
+    async def pay(count: int) -> None:
+        submitted = await payments_service.send_batch(
+            sender.seed, [{"destination": addresses[i % accounts], "amount": 1} for i in range(count)]
+        )
+        await asyncio.gather(*(jobs.wait(job["job_id"]) for job in submitted))
+
+    await pay(payments)
+    await asyncio.sleep(ledger.close_interval)
+    print(f"after {payments} payments: {mismatches(stream, ledger, addresses)} local balances differ from the ledger")
+
+    calls = ledger.calls.get('account_info', 0)
+    rpc = await read_balances(polled, addresses, rounds)
+    rpc_calls = ledger.calls.get('account_info', 0) - calls
+    calls = ledger.calls.get('account_info', 0)
+    local = await read_balances(streamed, addresses, rounds)
+    local_calls = ledger.calls.get('account_info', 0) - calls
+    for name, samples, made in (("json-rpc", rpc, rpc_calls), ("ledger stream", local, local_calls)):
+        print(f"{name:<14} {len(samples)} reads   p50 {percentile(samples, 0.5):7.3f} ms   "
+              f"p99 {percentile(samples, 0.99):7.3f} ms   {made} account_info calls")
+
+    # Payments validated while disconnected must be recovered by the backfill
+    ledger.drop_streams()
+    await asyncio.sleep(0.1)
+    await pay(payments)
+    await wait_live(stream)
+    await asyncio.sleep(ledger.close_interval)
+    print(f"after reconnect: {mismatches(stream, ledger, addresses)} local balances differ from the ledger")
+    print(stream.stats())
+
+    await stream.close()
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--payments", type=int, default=400)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    with running_mock_rippled(close_interval=0.5) as (url, ledger):
+        os.environ["TESTNET_URL"] = url
+        asyncio.run(main(ledger, url.replace("http://", "ws://"), args.accounts, args.payments, args.rounds))
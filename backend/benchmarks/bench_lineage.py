@@ -0,0 +1,63 @@
+"""Memory per training step: full-copy cars vs CarStore lineage with shared weights."""
+import argparse
+import random
+import tracemalloc
+import numpy as np
+from benchmarks.bench_car_store import LegacyStore
+from services.car_store import Car
+from services.racing_repository import InMemoryRacingRepository
+from services.racing_service import RacingService
+
+rng = np.random.default_rng(7)
+
+def legacy_train(store: LegacyStore, car_id: str, step: int) -> str:
+    # What train_car used to do: a new car with copied flags and weights, then train it
+    base = store.cars[car_id]
+    new_id = f"CAR-{step:012x}"
+    store.add(new_id, base.wallet_address, base.flags.copy(), base.weights.copy())
+    new_car = store.cars[new_id]
+    for i in (0, 1):
+        new_car.flags[i] = max(1, min(999, new_car.flags[i] + random.randint(-20, 20)))
+    new_car.training_count = base.training_count + 1
+    new_car.parent_id = car_id
+    return new_id
+
+def measure(name: str, roots, train, steps: int) -> None:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    current = list(roots)
+    done = 0
+    while done < steps:
+        current = [train(car_id, done + i) for i, car_id in enumerate(current[:steps - done])]
+        done += len(current)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{name:<10} {used / steps:8.0f} B per training step   ({steps} steps)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--roots", type=int, default=10000)
+    parser.add_argument("--steps", type=int, default=200000)
+    args = parser.parse_args()
+
+    legacy = LegacyStore()
+    roots = []
+    for i in range(args.roots):
+        flags, weights = Car.random_attributes(rng)
+        legacy.add(f"ROOT-{i:08d}", f"rBench{i % 1000:08d}", flags, weights)
+        roots.append(f"ROOT-{i:08d}")
+    measure("full copy", roots, lambda car_id, step: legacy_train(legacy, car_id, step), args.steps)
+
+    service = RacingService(InMemoryRacingRepository())
+    roots = [service.create_car(f"rBench{i % 1000:08d}", "seed")[1].car_id for i in range(args.roots)]
+    # Pre-size the columns so the measurement is per car, not the doubling headroom
+    service.store._grow(args.roots + args.steps + 1024)
+    owner = {car_id: service.store.get(car_id).wallet_address for car_id in roots}
+
+    def store_train(car_id: str, step: int) -> str:
+        wallet = owner.pop(car_id)
+        new_car = service.train_car(car_id, wallet, "seed", [0, 1])[2]
+        owner[new_car.car_id] = wallet
+        return new_car.car_id
+
+    measure("lineage", roots, store_train, args.steps)
@@ -0,0 +1,34 @@
+"""Matchmaking throughput and lobby fill latency with thousands of queued cars."""
+import argparse
+import asyncio
+import json
+import time
+from services.matchmaking import RaceMatchmaker
+from services.racing_repository import InMemoryRacingRepository
+from services.racing_service import RacingService
+
+async def main(cars: int, owners: int, lobby_size: int, max_wait: float) -> None:
+    service = RacingService(InMemoryRacingRepository())
+    wallets = [f"rBench{i:08d}" for i in range(owners)]
+    car_ids = [service.create_car(wallets[i % owners], "seed")[1].car_id for i in range(cars)]
+    matchmaker = RaceMatchmaker(service, lobby_size=lobby_size, max_wait=max_wait)
+
+    start = time.perf_counter()
+    entries = [matchmaker.enqueue(car_id, wallets[i % owners], "seed")[1] for i, car_id in enumerate(car_ids)]
+    elapsed = time.perf_counter() - start
+    print(f"enqueued {cars} cars in {elapsed * 1000:.1f} ms ({cars / elapsed:.0f}/s), {matchmaker.queued} still waiting")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(matchmaker.wait(entry["entry_id"]) for entry in entries))
+    print(f"drained in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(json.dumps(matchmaker.stats(), indent=2))
+    await matchmaker.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=20000)
+    parser.add_argument("--owners", type=int, default=2000)
+    parser.add_argument("--lobby-size", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.cars, args.owners, args.lobby_size, args.max_wait))
@@ -0,0 +1,80 @@
+"""Metrics overhead: raw record cost, and requests/s with and without recording on the HTTP and XRPL paths."""
+import argparse
+import asyncio
+import os
+import time
+import timeit
+from benchmarks.mock_rippled import running_mock_rippled
+
+def bench_record(count: int) -> None:
+    from services.metrics import Counter, Histogram
+
+    histogram = Histogram("bench_seconds", "bench", ("method", "route", "status"))
+    counter = Counter("bench_total", "bench", ("method", "error"))
+    labels = ("GET", "/wallet/{address}/balance", "200")
+    seconds = timeit.timeit(lambda: histogram.observe(labels, 0.0123), number=count)
+    print(f"Histogram.observe: {seconds / count * 1e9:6.0f} ns")
+    seconds = timeit.timeit(lambda: counter.inc(("account_info", "actNotFound")), number=count)
+    print(f"Counter.inc:       {seconds / count * 1e9:6.0f} ns")
+    baseline = timeit.timeit(lambda: None, number=count)
+    print(f"(empty lambda:     {baseline / count * 1e9:6.0f} ns)")
+
+async def bench_http(requests: int, rounds: int) -> None:
+    import httpx
+    from fastapi import FastAPI
+    from services.metrics import Histogram, RequestMetricsMiddleware
+
+    def build(instrumented: bool) -> FastAPI:
+        app = FastAPI()
+        if instrumented:
+            app.add_middleware(RequestMetricsMiddleware, histogram=Histogram("bench_http_seconds", "bench", ("method", "route", "status")))
+
+        @app.get("/item/{item_id}")
+        async def item(item_id: str):
+            return {"item_id": item_id}
+
+        return app
+
+    best = {}
+    for _ in range(rounds):
+        for instrumented in (False, True):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build(instrumented)), base_url="http://bench") as client:
+                start = time.perf_counter()
+                for i in range(requests):
+                    await client.get(f"/item/{i}")
+                rate = requests / (time.perf_counter() - start)
+            best[instrumented] = max(best.get(instrumented, 0), rate)
+    print(f"HTTP  without metrics: {best[False]:8.0f} req/s, with: {best[True]:8.0f} req/s "
+          f"({(best[False] / best[True] - 1) * 100:+.1f}% time per request)")
+
+async def bench_xrpl(url: str, requests: int, rounds: int) -> None:
+    from xrpl.models.requests import ServerInfo
+    from services.metrics import Counter, Histogram
+    from services.xrpl_client import XRPLClientPool
+
+    pools = {
+        False: XRPLClientPool(url, durations=None, errors=None),
+        True: XRPLClientPool(url, durations=Histogram("bench_xrpl_seconds", "bench", ("method",)), errors=Counter("bench_xrpl_errors", "bench", ("method", "error")))
+    }
+    best = {}
+    for _ in range(rounds):
+        for instrumented, pool in pools.items():
+            start = time.perf_counter()
+            await asyncio.gather(*(pool.request(ServerInfo()) for _ in range(requests)))
+            best[instrumented] = max(best.get(instrumented, 0), requests / (time.perf_counter() - start))
+    for pool in pools.values():
+        await pool.close()
+    print(f"XRPL  without metrics: {best[False]:8.0f} req/s, with: {best[True]:8.0f} req/s "
+          f"({(best[False] / best[True] - 1) * 100:+.1f}% time per request)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    bench_record(args.records)
+    asyncio.run(bench_http(args.requests, args.rounds))
+    with running_mock_rippled() as (url, ledger):
+        os.environ["TESTNET_URL"] = url
+        asyncio.run(bench_xrpl(url, args.requests, args.rounds))
@@ -0,0 +1,51 @@
+"""Create / train / garage-read throughput of RacingService per repository backend."""
+import argparse
+import os
+import tempfile
+import time
+from services.racing_repository import InMemoryRacingRepository, SQLiteRacingRepository
+from services.racing_service import RacingService
+
+def run(name: str, service: RacingService, cars: int, owners: int, fresh: RacingService = None) -> None:
+    wallets = [f"rBench{i:08d}" for i in range(owners)]
+
+    start = time.perf_counter()
+    created = [service.create_car(wallets[i % owners], "seed")[1].car_id for i in range(cars)]
+    service.repository.flush()
+    create = cars / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i, car_id in enumerate(created):
+        service.train_car(car_id, wallets[i % owners], "seed", [0, 1])
+    service.repository.flush()
+    train = cars / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for wallet in wallets:
+        service.get_garage(wallet)
+    garage = owners / (time.perf_counter() - start)
+
+    line = f"{name:<8} create {create:9.0f}/s   train {train:9.0f}/s   garage reads {garage:8.0f}/s"
+    if fresh is not None:
+        # A second worker with a cold cache reads everything from the database
+        start = time.perf_counter()
+        for wallet in wallets:
+            fresh.get_garage(wallet)
+        line += f"   cold garage reads {owners / (time.perf_counter() - start):8.0f}/s"
+    print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=50000)
+    parser.add_argument("--owners", type=int, default=1000)
+    args = parser.parse_args()
+
+    run("memory", RacingService(InMemoryRacingRepository()), args.cars, args.owners)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "racing.db")
+        service = RacingService(SQLiteRacingRepository(path))
+        fresh = RacingService(SQLiteRacingRepository(path))
+        run("sqlite", service, args.cars, args.owners, fresh)
+        service.close()
+        fresh.close()
@@ -0,0 +1,68 @@
+"""Signatures/s and event loop lag under concurrent payments: per-payment key derivation vs cached keypairs on a thread or process pool."""
+import argparse
+import asyncio
+import os
+import time
+import numpy as np
+from benchmarks.mock_rippled import running_mock_rippled
+
+DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+    return lags
+
+async def run(label: str, signer, seeds: list, payments: int, concurrency: int) -> None:
+    from services import PaymentService, AccountCache, PaymentJobTracker, xrpl_pool
+
+    cache = AccountCache()
+    jobs = PaymentJobTracker(xrpl_pool, cache)
+    service = PaymentService(xrpl_pool, cache, jobs, signer=signer)
+    signer.start()
+    # Spin the pool up (process start, imports) outside the timed section
+    await asyncio.gather(*(signer.identity(seed) for seed in seeds[:signer.workers]))
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def pay(n: int):
+        async with limit:
+            await service.submit_payment(seeds[n % len(seeds)], DESTINATION, 1)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(pay(n) for n in range(payments)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lags = np.array(await lag_task) * 1000
+    signer.close()
+    await jobs.close()
+    print(f"{label:<28} {payments / elapsed:7.1f} signatures/s   loop lag p50 {np.percentile(lags, 50):6.2f} ms   "
+          f"p99 {np.percentile(lags, 99):6.2f} ms   max {lags.max():6.2f} ms")
+
+async def main(payments: int, senders: int, concurrency: int, workers: int) -> None:
+    from xrpl.wallet import Wallet
+    from services import TransactionSigner, xrpl_pool
+
+    seeds = [Wallet.create().seed for _ in range(senders)]
+    print(f"{payments} payments from {senders} senders, {concurrency} in flight, {workers} workers, {os.cpu_count()} CPUs")
+    # A zero-size cache derives the keypair on every payment, as before the cache existed
+    await run("derive per payment (thread)", TransactionSigner("thread", workers, max_cached=0), seeds, payments, concurrency)
+    await run("cached keypairs (thread)", TransactionSigner("thread", workers), seeds, payments, concurrency)
+    await run("cached keypairs (process)", TransactionSigner("process", workers), seeds, payments, concurrency)
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payments", type=int, default=400)
+    parser.add_argument("--senders", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    with running_mock_rippled(close_interval=1.0) as (url, _):
+        os.environ["TESTNET_URL"] = url
+        asyncio.run(main(args.payments, args.senders, args.concurrency, args.workers))
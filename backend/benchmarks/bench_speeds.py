@@ -0,0 +1,42 @@
+"""Fleet speed computation: per-car Python loops vs the CarStore's vectorized engine."""
+import argparse
+import time
+import numpy as np
+from services.car_store import Car, CarStore, speed_from_raw
+
+rng = np.random.default_rng(7)
+
+def legacy_speed(flags, weights) -> float:
+    # What Car.calculate_speed used to do for every car
+    return speed_from_raw(sum(f * w for f, w in zip(flags, weights)))
+
+def timed(name: str, cars: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed * 1000:9.1f} ms   {cars / elapsed:12.0f} cars/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=200000)
+    args = parser.parse_args()
+
+    attributes = [Car.random_attributes(rng) for _ in range(args.cars)]
+    car_ids = [f"CAR-{i:012x}" for i in range(args.cars)]
+    plain = [(list(flags), list(weights)) for flags, weights in attributes]
+
+    store = CarStore()
+    timed("bulk add", args.cars, lambda: store.add_records(
+        {'car_id': car_id, 'wallet_address': "rBench", 'flags': flags, 'weights': weights}
+        for car_id, (flags, weights) in zip(car_ids, attributes)
+    ))
+    slots = [store.get(car_id)._slot for car_id in car_ids]
+
+    timed("legacy per-car loop", args.cars, lambda: [legacy_speed(flags, weights) for flags, weights in plain])
+    timed("per-car refresh_speed", args.cars, lambda: [store.refresh_speed(slot) for slot in slots])
+    timed("vectorized compute_speeds", args.cars, lambda: store.compute_speeds(slots))
+    timed("vectorized refresh_speeds", args.cars, lambda: store.refresh_speeds())
+    timed("cached speeds()", args.cars, lambda: store.speeds(car_ids))
+
+    legacy = np.array([legacy_speed(flags, weights) for flags, weights in plain])
+    print(f"max |store - legacy| speed   {np.abs(store.compute_speeds(slots) - legacy).max():.2e} km/h")
@@ -0,0 +1,44 @@
+"""Trainings per second: one POST /race/train per training vs POST /race/train/batch."""
+import argparse
+import time
+from fastapi.testclient import TestClient
+from main import app
+
+SEED = "sEdBenchmarkSeed000"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    trainings = args.cars * args.iterations
+
+    with TestClient(app) as client:
+        wallet = "rBenchTrainer"
+        car_ids = [
+            client.post("/race/car/create", json={"wallet_address": wallet, "wallet_seed": SEED}).json()["car_id"]
+            for _ in range(args.cars)
+        ]
+
+        start = time.perf_counter()
+        current = list(car_ids)
+        for _ in range(args.iterations):
+            current = [
+                client.post("/race/train", json={
+                    "car_id": car_id, "wallet_address": wallet, "wallet_seed": SEED, "attribute_indices": [0, 1]
+                }).json()["car_id"]
+                for car_id in current
+            ]
+        per_call = trainings / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = client.post("/race/train/batch", json={
+            "wallet_address": wallet,
+            "wallet_seed": SEED,
+            "jobs": [{"car_id": car_id, "attribute_indices": [0, 1], "iterations": args.iterations} for car_id in car_ids]
+        })
+        lines = response.text.splitlines()
+        batch = trainings / (time.perf_counter() - start)
+        assert len(lines) == args.cars + 1, response.text[:200]
+
+    print(f"{trainings} trainings   per-call {per_call:9.0f}/s   batch {batch:9.0f}/s   ({batch / per_call:.0f}x)")
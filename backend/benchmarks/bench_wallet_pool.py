@@ -0,0 +1,78 @@
+"""/wallet/create latency: inline faucet funding vs a pre-funded wallet pool, and behaviour once a burst drains the pool."""
+import argparse
+import asyncio
+import os
+import time
+import numpy as np
+from benchmarks.mock_rippled import running_mock_rippled
+
+def report(label: str, latencies: list) -> None:
+    millis = np.array(latencies) * 1000
+    print(f"{label:<34} {len(millis):4d} wallets   p50 {np.percentile(millis, 50):8.1f} ms   "
+          f"p99 {np.percentile(millis, 99):8.1f} ms   max {millis.max():8.1f} ms")
+
+def takes(pool) -> dict:
+    return {labels[0]: int(count) for labels, count in pool.takes._values.items()}
+
+async def create(service, count: int, gap: float) -> list:
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await service.create_wallet()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(gap)
+    return latencies
+
+async def wait_full(pool) -> float:
+    start = time.perf_counter()
+    while pool.depth < pool.high:
+        await asyncio.sleep(0.05)
+    return time.perf_counter() - start
+
+async def main(url: str, ledger, wallets: int, low: int, high: int, gap: float) -> None:
+    from services import AccountCache, MetricsRegistry, WalletPool, WalletPoolExhausted, WalletService, xrpl_pool
+
+    def service(pool):
+        return WalletService(xrpl_pool, AccountCache(), pool=pool)
+
+    inline = WalletPool(xrpl_pool, low=0, high=0, faucet_host=url)
+    report("inline faucet (no pool)", await create(service(inline), min(wallets, 5), 0))
+
+    pool = WalletPool(xrpl_pool, low=low, high=high, faucet_host=url)
+    pool.register_metrics(MetricsRegistry())
+    pool.start()
+    print(f"pool filled to {high} in {await wait_full(pool):.1f} s")
+    report(f"pooled, one every {gap:.1f} s", await create(service(pool), wallets, gap))
+    print(f"  after: depth {pool.depth}, takes {takes(pool)}")
+
+    # A burst larger than the pool: the rest fall back to the faucet, or are rejected
+    await wait_full(pool)
+    report(f"burst of {2 * high}, on_empty=faucet", await create(service(pool), 2 * high, 0))
+    print(f"  takes {takes(pool)}")
+    await pool.close()
+
+    rejecting = WalletPool(xrpl_pool, low=low, high=high, faucet_host=url, on_empty="reject")
+    rejecting.register_metrics(MetricsRegistry())
+    rejecting.start()
+    await wait_full(rejecting)
+    rejected = 0
+    for _ in range(2 * high):
+        try:
+            await rejecting.take()
+        except WalletPoolExhausted:
+            rejected += 1
+    print(f"burst of {2 * high}, on_empty=reject: {rejected} rejected (503, Retry-After {rejecting.retry_after:.0f} s)")
+    await rejecting.close()
+    print(f"faucet requests served by the stand-in: {ledger.calls.get('faucet', 0)}")
+    await xrpl_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wallets", type=int, default=20)
+    parser.add_argument("--low", type=int, default=5)
+    parser.add_argument("--high", type=int, default=20)
+    parser.add_argument("--gap", type=float, default=0.2, help="Seconds between pooled creates")
+    args = parser.parse_args()
+    with running_mock_rippled(close_interval=0.5) as (url, ledger):
+        os.environ["TESTNET_URL"] = url
+        asyncio.run(main(url, ledger, args.wallets, args.low, args.high, args.gap))
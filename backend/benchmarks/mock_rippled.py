@@ -0,0 +1,335 @@
+"""Local stand-in for the rippled JSON-RPC and websocket APIs and the testnet faucet, used by the benchmark scripts."""
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+import uvicorn
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from xrpl.core.binarycodec import decode
+
+DEFAULT_BALANCE = "1000000000"
+BASE_FEE = "10"
+# The genesis account stands in for the testnet faucet's funding account
+FAUCET_ACCOUNT = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+FAUCET_AMOUNT = "100000000"
+
+def _tx_hash(tx_blob: str) -> str:
+    # Transaction IDs are SHA-512Half of the "TXN\0" prefix plus the signed blob
+    digest = hashlib.sha512(bytes.fromhex("54584E00") + bytes.fromhex(tx_blob)).digest()
+    return digest[:32].hex().upper()
+
+class MockLedger:
+
+    def __init__(self, latency: float = 0.0, close_interval: float = 1.0, network_id: int = 1):
+        self.latency = latency
+        self.close_interval = close_interval
+        self.network_id = network_id
+        self.ledger_index = 1000
+        self.balances: Dict[str, int] = {}
+        self.sequences: Dict[str, int] = {}
+        self.pending: List[dict] = []
+        self.txs: Dict[str, dict] = {}
+        self.account_txs: Dict[str, List[dict]] = {}
+        self.ledgers: Dict[int, List[dict]] = {}
+        self.calls: Dict[str, int] = {}
+        self.streams: List[Tuple[Set[str], asyncio.Queue]] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _account(self, address: str) -> None:
+        if address not in self.balances:
+            self.balances[address] = int(DEFAULT_BALANCE)
+            self.sequences[address] = 1
+
+    def close_ledger(self) -> None:
+        self.ledger_index += 1
+        pending, self.pending = self.pending, []
+        records = self.ledgers[self.ledger_index] = []
+        for tx_index, entry in enumerate(pending):
+            tx = entry['tx']
+            sender, dest = tx['Account'], tx.get('Destination')
+            amount, fee = int(tx.get('Amount', 0)), int(tx.get('Fee', BASE_FEE))
+            self._account(sender)
+            before = {address: self.balances.get(address) for address in filter(None, (sender, dest))}
+            self.balances[sender] -= amount + fee
+            if dest:
+                self._account(dest)
+                self.balances[dest] += amount
+            record = {
+                **tx,
+                'hash': entry['hash'],
+                'ledger_index': self.ledger_index,
+                'validated': True,
+                'meta': {
+                    'TransactionIndex': tx_index,
+                    'TransactionResult': 'tesSUCCESS',
+                    'AffectedNodes': [self._account_node(address, previous) for address, previous in before.items()]
+                }
+            }
+            self.txs[entry['hash']] = record
+            records.append(record)
+            for address in before:
+                self.account_txs.setdefault(address, []).append(record)
+        self._publish_ledger(records)
+
+    def _account_node(self, address: str, previous: Optional[int]) -> dict:
+        fields = {'Account': address, 'Balance': str(self.balances[address]), 'Sequence': self.sequences[address]}
+        if previous is None:
+            return {'CreatedNode': {'LedgerEntryType': 'AccountRoot', 'NewFields': fields}}
+        return {'ModifiedNode': {
+            'LedgerEntryType': 'AccountRoot',
+            'FinalFields': fields,
+            'PreviousFields': {'Balance': str(previous)}
+        }}
+
+    def _publish_ledger(self, records: List[dict]) -> None:
+        messages = [({'ledger'}, {
+            'type': 'ledgerClosed',
+            'ledger_index': self.ledger_index,
+            'txn_count': len(records),
+            'validated_ledgers': f"1000-{self.ledger_index}"
+        })]
+        for record in records:
+            messages.append(({'transactions'}, {
+                'type': 'transaction',
+                'transaction': {k: v for k, v in record.items() if k not in ('meta', 'validated', 'ledger_index')},
+                'meta': record['meta'],
+                'ledger_index': self.ledger_index,
+                'engine_result': 'tesSUCCESS',
+                'validated': True
+            }))
+        for streams, queue in self.streams:
+            for stream, message in messages:
+                if stream & streams:
+                    queue.put_nowait(message)
+
+    def fund(self, address: str) -> dict:
+        """Faucet request: a payment from FAUCET_ACCOUNT that validates with the next ledger."""
+        self._account(FAUCET_ACCOUNT)
+        self.calls['faucet'] = self.calls.get('faucet', 0) + 1
+        tx = {
+            'TransactionType': 'Payment',
+            'Account': FAUCET_ACCOUNT,
+            'Destination': address,
+            'Amount': FAUCET_AMOUNT,
+            'Fee': BASE_FEE,
+            'Sequence': self.sequences[FAUCET_ACCOUNT]
+        }
+        self.sequences[FAUCET_ACCOUNT] += 1
+        tx_hash = hashlib.sha512(f"faucet{tx['Sequence']}{address}".encode()).digest()[:32].hex().upper()
+        self.pending.append({'hash': tx_hash, 'tx': tx})
+        return {
+            'account': {'address': address, 'classicAddress': address},
+            'amount': int(FAUCET_AMOUNT) // 1000000,
+            'transactionHash': tx_hash
+        }
+
+    def drop_streams(self) -> None:
+        """Close every websocket subscription, e.g. to exercise reconnect and backfill."""
+        for _, queue in self.streams:
+            self.loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def handle(self, method: str, params: dict) -> dict:
+        self.calls[method] = self.calls.get(method, 0) + 1
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            return {'error': 'unknownCmd', 'status': 'error'}
+        result = handler(params)
+        result.setdefault('status', 'success')
+        return result
+
+    def _rpc_server_info(self, params: dict) -> dict:
+        return {'info': {
+            'build_version': '2.0.0',
+            'network_id': self.network_id,
+            'validated_ledger': {'seq': self.ledger_index}
+        }}
+
+    def _rpc_server_state(self, params: dict) -> dict:
+        return {'state': {'validated_ledger': {'seq': self.ledger_index, 'reserve_inc': 2000000}}}
+
+    def _rpc_ledger(self, params: dict) -> dict:
+        requested = params.get('ledger_index')
+        if isinstance(requested, int):
+            if requested not in self.ledgers:
+                return {'error': 'lgrNotFound', 'status': 'error'}
+            transactions = [
+                {**{k: v for k, v in record.items() if k not in ('meta', 'validated', 'ledger_index')}, 'metaData': record['meta']}
+                for record in self.ledgers[requested]
+            ]
+            return {
+                'ledger': {'ledger_index': str(requested), 'closed': True, 'transactions': transactions},
+                'ledger_index': requested,
+                'validated': True
+            }
+        index = self.ledger_index + (1 if requested == 'open' else 0)
+        return {'ledger_index': index, 'validated': requested != 'open'}
+
+    def _rpc_fee(self, params: dict) -> dict:
+        return {
+            'current_queue_size': '0',
+            'max_queue_size': '2000',
+            'drops': {'base_fee': BASE_FEE, 'median_fee': '5000', 'minimum_fee': BASE_FEE, 'open_ledger_fee': BASE_FEE}
+        }
+
+    def _rpc_account_info(self, params: dict) -> dict:
+        address = params['account']
+        self._account(address)
+        return {
+            'account_data': {
+                'Account': address,
+                'Balance': str(self.balances[address]),
+                'Sequence': self.sequences[address]
+            },
+            'ledger_current_index': self.ledger_index + 1,
+            'ledger_index': self.ledger_index,
+            'validated': True
+        }
+
+    def _rpc_account_tx(self, params: dict) -> dict:
+        address = params['account']
+        limit = params.get('limit', 10)
+        ledger_min = params.get('ledger_index_min', -1)
+        ledger_max = params.get('ledger_index_max', -1)
+        ledger_min = 1000 if ledger_min == -1 else ledger_min
+        ledger_max = self.ledger_index if ledger_max == -1 else ledger_max
+        # Newest first; a marker is the position of the next transaction to return
+        marker = params.get('marker')
+        start = (marker['ledger'], marker['seq']) if marker else (ledger_max, 1 << 32)
+        history = [
+            tx for tx in reversed(self.account_txs.get(address, []))
+            if ledger_min <= tx['ledger_index'] and (tx['ledger_index'], tx['meta']['TransactionIndex']) <= start
+        ]
+        result = {
+            'account': address,
+            'transactions': [
+                {'tx': {k: v for k, v in tx.items() if k not in ('meta', 'validated')}, 'meta': tx['meta'], 'validated': True}
+                for tx in history[:limit]
+            ],
+            'ledger_index_min': ledger_min,
+            'ledger_index_max': ledger_max,
+            'limit': limit,
+            'validated': True
+        }
+        if len(history) > limit:
+            result['marker'] = {'ledger': history[limit]['ledger_index'], 'seq': history[limit]['meta']['TransactionIndex']}
+        return result
+
+    def _rpc_submit(self, params: dict) -> dict:
+        tx_blob = params['tx_blob']
+        tx = decode(tx_blob)
+        tx_hash = _tx_hash(tx_blob)
+        self._account(tx['Account'])
+        expected = self.sequences[tx['Account']]
+        if tx['Sequence'] < expected:
+            engine_result = 'tefPAST_SEQ'
+        elif tx['Sequence'] > expected:
+            engine_result = 'terPRE_SEQ'
+        else:
+            engine_result = 'tesSUCCESS'
+            self.sequences[tx['Account']] += 1
+            self.pending.append({'hash': tx_hash, 'tx': tx})
+        return {
+            'engine_result': engine_result,
+            'engine_result_message': engine_result,
+            'accepted': engine_result == 'tesSUCCESS',
+            'tx_json': {**tx, 'hash': tx_hash}
+        }
+
+    def _rpc_tx(self, params: dict) -> dict:
+        record = self.txs.get(params['transaction'])
+        if record is None:
+            return {'error': 'txnNotFound', 'status': 'error'}
+        return record
+
+def create_app(ledger: MockLedger) -> FastAPI:
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def start_closing_ledgers():
+        ledger.loop = asyncio.get_running_loop()
+
+        async def closer():
+            while True:
+                await asyncio.sleep(ledger.close_interval)
+                ledger.close_ledger()
+        app.state.closer = asyncio.create_task(closer())
+
+    @app.post("/")
+    async def rpc(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        if ledger.latency:
+            await asyncio.sleep(ledger.latency)
+        params = (body.get('params') or [{}])[0]
+        result = ledger.handle(body['method'], params)
+        return {'result': result}
+
+    @app.post("/accounts")
+    async def faucet(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        if ledger.latency:
+            await asyncio.sleep(ledger.latency)
+        return ledger.fund(body['destination'])
+
+    @app.websocket("/")
+    async def stream(websocket: WebSocket) -> None:
+        await websocket.accept()
+        streams: Set[str] = set()
+        queue: asyncio.Queue = asyncio.Queue()
+        ledger.streams.append((streams, queue))
+
+        async def read_commands():
+            # Responses go through the queue so only one task writes to the socket
+            try:
+                while True:
+                    body = await websocket.receive_json()
+                    command = body.get('command')
+                    ledger.calls[command] = ledger.calls.get(command, 0) + 1
+                    if command == 'subscribe':
+                        streams.update(body.get('streams') or ())
+                        result = {'ledger_index': ledger.ledger_index} if 'ledger' in streams else {}
+                    elif command == 'unsubscribe':
+                        streams.difference_update(body.get('streams') or ())
+                        result = {}
+                    else:
+                        result = ledger.handle(command, body)
+                    queue.put_nowait({'id': body.get('id'), 'type': 'response', 'status': 'success', 'result': result})
+            except WebSocketDisconnect:
+                queue.put_nowait(None)
+
+        reader = asyncio.create_task(read_commands())
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                await websocket.send_json(message)
+        finally:
+            reader.cancel()
+            ledger.streams.remove((streams, queue))
+            try:
+                await websocket.close()
+            except RuntimeError:
+                pass
+
+    return app
+
+@contextmanager
+def running_mock_rippled(port: int = 5005, **ledger_kwargs):
+    """Serve a MockLedger on localhost for the duration of the block."""
+    ledger = MockLedger(**ledger_kwargs)
+    config = uvicorn.Config(create_app(ledger), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/", ledger
+    finally:
+        server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    uvicorn.run(create_app(MockLedger()), host="127.0.0.1", port=5005)
@@ -0,0 +1,156 @@
+"""Replay a seeded create/train/test/race/sell mix against RacingService or the FastAPI app; reports ops/s, p50/p99 latency and peak RSS."""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import resource
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+OPERATIONS = ("create", "train", "test", "race", "sell")
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+class Workload:
+    """A reproducible stream of racing operations.
+
+    Operation types and wallets come from their own seeded generator, so the
+    same seed and mix always replay the same sequence. Operations that need a
+    car fall back to "create" when the chosen wallet has none.
+    """
+
+    def __init__(self, mix: Dict[str, float], wallets: int, seed: int):
+        self.names = list(mix)
+        weights = np.array([mix[name] for name in self.names])
+        self.probabilities = weights / weights.sum()
+        self.wallets = [f"rLoad{i:020d}" for i in range(wallets)]
+        self.garages: Dict[str, List[str]] = {wallet: [] for wallet in self.wallets}
+        self.rng = np.random.default_rng(seed)
+
+    def next(self):
+        name = self.names[self.rng.choice(len(self.names), p=self.probabilities)]
+        wallet = self.wallets[self.rng.integers(len(self.wallets))]
+        garage = self.garages[wallet]
+        if name != "create" and not garage:
+            return "create", wallet, None
+        return name, wallet, None if name == "create" else garage[self.rng.integers(len(garage))]
+
+    def created(self, wallet: str, car_id: str) -> None:
+        self.garages[wallet].append(car_id)
+
+    def sold(self, wallet: str, car_id: str) -> None:
+        self.garages[wallet].remove(car_id)
+
+def report(target: str, samples: Dict[str, List[int]], elapsed: float, digest: Optional[str]) -> None:
+    total = sum(len(values) for values in samples.values())
+    print(f"{target}: {total} ops in {elapsed:.2f} s = {total / elapsed:,.0f} ops/s")
+    rows = [(name, values) for name, values in samples.items() if values]
+    rows.append(("all", [value for values in samples.values() for value in values]))
+    for name, values in rows:
+        micros = np.array(values) / 1000
+        print(f"  {name:>6}: {len(values):7d} ops  p50 {np.percentile(micros, 50):8.1f} us  p99 {np.percentile(micros, 99):8.1f} us")
+    # ru_maxrss is in KiB on Linux
+    print(f"  peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+    if digest:
+        print(f"  state digest {digest} (same seed and mix -> same digest)")
+
+def state_digest(service) -> str:
+    store = service.store
+    slots = sorted(store._slots.items())
+    digest = hashlib.sha256()
+    for car_id, slot in slots:
+        digest.update(car_id.encode())
+        digest.update(store.flags[slot].tobytes())
+    digest.update(str(service.history.total).encode())
+    return digest.hexdigest()[:16]
+
+def run_service(workload: Workload, ops: int, seed: int) -> None:
+    from services.race_history import RaceHistory
+    from services.racing_repository import InMemoryRacingRepository
+    from services.racing_service import RacingService
+
+    service = RacingService(InMemoryRacingRepository(), RaceHistory(), rng=np.random.default_rng(seed))
+    wallet_seed = "sEdLoadTestSeed"
+    handlers: Dict[str, Callable] = {
+        "create": lambda wallet, car_id: service.create_car(wallet, wallet_seed)[1].car_id,
+        "train": lambda wallet, car_id: service.train_car(car_id, wallet, wallet_seed)[2].car_id,
+        "test": lambda wallet, car_id: service.test_speed(car_id, wallet),
+        "race": lambda wallet, car_id: service.enter_race(car_id, wallet, wallet_seed),
+        "sell": lambda wallet, car_id: service.sell_car(car_id, wallet)
+    }
+    samples: Dict[str, List[int]] = {name: [] for name in OPERATIONS}
+    clock = time.perf_counter_ns
+    start = time.perf_counter()
+    for _ in range(ops):
+        name, wallet, car_id = workload.next()
+        began = clock()
+        result = handlers[name](wallet, car_id)
+        samples[name].append(clock() - began)
+        if name in ("create", "train"):
+            workload.created(wallet, result)
+        elif name == "sell":
+            workload.sold(wallet, car_id)
+    report("RacingService", samples, time.perf_counter() - start, state_digest(service))
+
+async def run_app(workload: Workload, ops: int) -> None:
+    import httpx
+    from main import app
+    from services.racing_service import racing_service
+
+    wallet_seed = "sEdLoadTestSeed"
+    requests = {
+        "create": ("/race/car/create", lambda wallet, car_id: {"wallet_address": wallet, "wallet_seed": wallet_seed}),
+        "train": ("/race/train", lambda wallet, car_id: {"car_id": car_id, "wallet_address": wallet, "wallet_seed": wallet_seed}),
+        "test": ("/race/test", lambda wallet, car_id: {"car_id": car_id, "wallet_address": wallet}),
+        "race": ("/race/enter", lambda wallet, car_id: {"car_id": car_id, "wallet_address": wallet, "wallet_seed": wallet_seed}),
+        "sell": ("/race/car/sell", lambda wallet, car_id: {"car_id": car_id, "wallet_address": wallet})
+    }
+    samples: Dict[str, List[int]] = {name: [] for name in OPERATIONS}
+    clock = time.perf_counter_ns
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load") as client:
+        start = time.perf_counter()
+        for _ in range(ops):
+            name, wallet, car_id = workload.next()
+            path, body = requests[name]
+            began = clock()
+            response = await client.post(path, json=body(wallet, car_id))
+            samples[name].append(clock() - began)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name} failed with {response.status_code}: {response.text}")
+            if name in ("create", "train"):
+                workload.created(wallet, response.json()["car_id"])
+            elif name == "sell":
+                workload.sold(wallet, car_id)
+        elapsed = time.perf_counter() - start
+    report("FastAPI app", samples, elapsed, state_digest(racing_service))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target", choices=("service", "app"), default="service")
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--mix", type=parse_mix, default="create=2,train=4,test=2,race=3,sell=1",
+                        help="Comma-separated operation=weight pairs")
+    parser.add_argument("--wallets", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workload = Workload(args.mix, args.wallets, args.seed)
+    if args.target == "service":
+        run_service(workload, args.ops, args.seed)
+    else:
+        # The app's singletons read these at import time: in-memory state, no disk, no upstream
+        os.environ["RACING_SEED"] = str(args.seed)
+        os.environ["RACING_REPOSITORY"] = "memory"
+        os.environ["RACE_HISTORY_DIR"] = ""
+        os.environ["LEDGER_STREAM_ENABLED"] = "False"
+        logging.disable(logging.INFO)
+        asyncio.run(run_app(workload, args.ops))
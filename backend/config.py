@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Optional
 
 class Settings:
     
@@ -17,6 +17,80 @@ class Settings:
     TESTNET_WSS: str = os.getenv("TESTNET_WSS", "wss://s.altnet.rippletest.net:51233")
     NETWORK: str = os.getenv("NETWORK", "testnet")
     
+    XRPL_MAX_CONNECTIONS: int = int(os.getenv("XRPL_MAX_CONNECTIONS", "20"))
+    XRPL_MAX_KEEPALIVE: int = int(os.getenv("XRPL_MAX_KEEPALIVE", "10"))
+    XRPL_KEEPALIVE_EXPIRY: float = float(os.getenv("XRPL_KEEPALIVE_EXPIRY", "30"))
+    XRPL_MAX_CONCURRENCY: int = int(os.getenv("XRPL_MAX_CONCURRENCY", "50"))
+    XRPL_REQUEST_TIMEOUT: float = float(os.getenv("XRPL_REQUEST_TIMEOUT", "10"))
+    BLOCKING_POOL_SIZE: int = int(os.getenv("BLOCKING_POOL_SIZE", "4"))
+    SIGNING_POOL: str = os.getenv("SIGNING_POOL", "process")
+    SIGNING_WORKERS: int = int(os.getenv("SIGNING_WORKERS", "2"))
+    WALLET_CACHE_SIZE: int = int(os.getenv("WALLET_CACHE_SIZE", "1024"))
+    WALLET_CACHE_TTL: float = float(os.getenv("WALLET_CACHE_TTL", "300"))
+    
+    ACCOUNT_CACHE_SIZE: int = int(os.getenv("ACCOUNT_CACHE_SIZE", "10000"))
+    ACCOUNT_CACHE_TTL: float = float(os.getenv("ACCOUNT_CACHE_TTL", "4"))
+    HISTORY_CACHE_ACCOUNTS: int = int(os.getenv("HISTORY_CACHE_ACCOUNTS", "1000"))
+    HISTORY_CACHE_TRANSACTIONS: int = int(os.getenv("HISTORY_CACHE_TRANSACTIONS", "1000"))
+    HISTORY_FETCH_SIZE: int = int(os.getenv("HISTORY_FETCH_SIZE", "200"))
+    
+    # Empty uses xrpl-py's faucet for the network in TESTNET_URL
+    FAUCET_HOST: str = os.getenv("FAUCET_HOST", "")
+    WALLET_POOL_LOW: int = int(os.getenv("WALLET_POOL_LOW", "5"))
+    WALLET_POOL_HIGH: int = int(os.getenv("WALLET_POOL_HIGH", "20"))
+    WALLET_POOL_CONCURRENCY: int = int(os.getenv("WALLET_POOL_CONCURRENCY", "4"))
+    WALLET_POOL_ON_EMPTY: str = os.getenv("WALLET_POOL_ON_EMPTY", "faucet")
+    WALLET_POOL_RETRY_AFTER: float = float(os.getenv("WALLET_POOL_RETRY_AFTER", "5"))
+    
+    PAYMENT_POLL_INTERVAL: float = float(os.getenv("PAYMENT_POLL_INTERVAL", "1"))
+    PAYMENT_JOB_TIMEOUT: float = float(os.getenv("PAYMENT_JOB_TIMEOUT", "120"))
+    PAYMENT_JOB_HISTORY: int = int(os.getenv("PAYMENT_JOB_HISTORY", "10000"))
+    
+    RACING_REPOSITORY: str = os.getenv("RACING_REPOSITORY", "memory")
+    RACING_DB_PATH: str = os.getenv("RACING_DB_PATH", "racing.db")
+    RACING_WRITE_BATCH: int = int(os.getenv("RACING_WRITE_BATCH", "500"))
+    RACING_JOURNAL_DIR: str = os.getenv("RACING_JOURNAL_DIR", "racing_journal")
+    RACING_SNAPSHOT_EVERY: int = int(os.getenv("RACING_SNAPSHOT_EVERY", "100000"))
+    # Empty draws a fresh seed from the OS; set it to replay a simulation exactly
+    RACING_SEED: Optional[int] = int(os.getenv("RACING_SEED")) if os.getenv("RACING_SEED") else None
+    RACE_HISTORY_SEGMENT_SIZE: int = int(os.getenv("RACE_HISTORY_SEGMENT_SIZE", "1024"))
+    RACE_HISTORY_SEGMENTS: int = int(os.getenv("RACE_HISTORY_SEGMENTS", "8"))
+    RACE_HISTORY_DIR: str = os.getenv("RACE_HISTORY_DIR", "race_history")
+    
+    RACE_ODDS_SIMULATIONS: int = int(os.getenv("RACE_ODDS_SIMULATIONS", "20000"))
+    RACE_ODDS_CACHE_SIZE: int = int(os.getenv("RACE_ODDS_CACHE_SIZE", "10000"))
+    
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "True") == "True"
+    RATE_LIMIT_WALLET_RATE: float = float(os.getenv("RATE_LIMIT_WALLET_RATE", "5"))
+    RATE_LIMIT_WALLET_BURST: int = int(os.getenv("RATE_LIMIT_WALLET_BURST", "20"))
+    RATE_LIMIT_IP_RATE: float = float(os.getenv("RATE_LIMIT_IP_RATE", "50"))
+    RATE_LIMIT_IP_BURST: int = int(os.getenv("RATE_LIMIT_IP_BURST", "100"))
+    RATE_LIMIT_SKETCH_WIDTH: int = int(os.getenv("RATE_LIMIT_SKETCH_WIDTH", "16384"))
+    ROUTE_MAX_CONCURRENCY: int = int(os.getenv("ROUTE_MAX_CONCURRENCY", "64"))
+    ROUTE_MAX_QUEUE: int = int(os.getenv("ROUTE_MAX_QUEUE", "256"))
+    ROUTE_LATENCY_BUDGET: float = float(os.getenv("ROUTE_LATENCY_BUDGET", "0.5"))
+    
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_TTL: float = float(os.getenv("IDEMPOTENCY_TTL", "3600"))
+    
+    MATCHMAKING_LOBBY_SIZE: int = int(os.getenv("MATCHMAKING_LOBBY_SIZE", "8"))
+    MATCHMAKING_MAX_WAIT: float = float(os.getenv("MATCHMAKING_MAX_WAIT", "10"))
+    MATCHMAKING_TIER_KMH: float = float(os.getenv("MATCHMAKING_TIER_KMH", "20"))
+    MATCHMAKING_TIER_SPREAD: int = int(os.getenv("MATCHMAKING_TIER_SPREAD", "1"))
+    MATCHMAKING_ENTRY_HISTORY: int = int(os.getenv("MATCHMAKING_ENTRY_HISTORY", "10000"))
+    
+    EVENTS_MAX_PENDING: int = int(os.getenv("EVENTS_MAX_PENDING", "100"))
+    EVENTS_HEARTBEAT: float = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+    LEDGER_STREAM_ENABLED: bool = os.getenv("LEDGER_STREAM_ENABLED", "True") == "True"
+    LEDGER_STREAM_MAX_ACCOUNTS: int = int(os.getenv("LEDGER_STREAM_MAX_ACCOUNTS", "10000"))
+    LEDGER_STREAM_BACKFILL_LIMIT: int = int(os.getenv("LEDGER_STREAM_BACKFILL_LIMIT", "256"))
+    LEDGER_STREAM_IDLE_TIMEOUT: float = float(os.getenv("LEDGER_STREAM_IDLE_TIMEOUT", "30"))
+    LEDGER_STREAM_MAX_BACKOFF: float = float(os.getenv("LEDGER_STREAM_MAX_BACKOFF", "30"))
+    
+    HEALTH_REFRESH_INTERVAL: float = float(os.getenv("HEALTH_REFRESH_INTERVAL", "5"))
+    HEALTH_MAX_STALENESS: float = float(os.getenv("HEALTH_MAX_STALENESS", "15"))
+    HEALTH_CHECK_TIMEOUT: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", "3"))
+    
     API_PREFIX: str = "/api/v1"
     HOST: str = "0.0.0.0"
     PORT: int = 8000
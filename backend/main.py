@@ -3,8 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from config import settings
-from routes import wallet_router, payment_router, health_router
+from routes import wallet_router, payment_router, health_router, events_router, metrics_router
 from routes.racing import router as racing_router
+from services import xrpl_pool, blocking_executor, transaction_signer, wallet_pool, payment_jobs, ledger_stream, event_hub, health_monitor, RequestMetricsMiddleware, AdmissionMiddleware, admission
+from services import IdempotencyMiddleware, idempotency_cache, idempotency_requests
+from services.racing_service import racing_service
+from services.matchmaking import race_matchmaker
 import logging
 
 logging.basicConfig(
@@ -21,6 +25,22 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+def post_paths(*routers):
+    return [route.path for router in routers for route in router.routes if "POST" in route.methods]
+
+# Added first so it runs inside CORS: rejections still carry CORS headers
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission, paths=post_paths(racing_router))
+
+# Outside admission control, so a retry answered from the cache isn't rate limited.
+# Every POST on the payment and racing routers, so a new paid route is covered without listing it
+app.add_middleware(
+    IdempotencyMiddleware,
+    cache=idempotency_cache,
+    paths=post_paths(payment_router, racing_router),
+    requests=idempotency_requests
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -30,6 +50,7 @@ app.add_middleware(
 )
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(RequestMetricsMiddleware)
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -46,16 +67,39 @@ app.include_router(health_router)
 app.include_router(wallet_router)
 app.include_router(payment_router)
 app.include_router(racing_router)
+app.include_router(events_router)
+app.include_router(metrics_router)
 
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Network: {settings.NETWORK}")
     logger.info(f"Debug mode: {settings.DEBUG}")
+    await xrpl_pool.start()
+    logger.info(f"XRPL client pool ready: {xrpl_pool.url}")
+    transaction_signer.start()
+    wallet_pool.start()
+    race_matchmaker.start()
+    if settings.LEDGER_STREAM_ENABLED:
+        ledger_stream.start()
+    health_monitor.add_queue("payment_jobs", lambda: payment_jobs.pending)
+    health_monitor.add_queue("race_queue", lambda: race_matchmaker.queued)
+    health_monitor.add_queue("racing_writes", lambda: racing_service.repository.pending_writes)
+    health_monitor.add_queue("event_subscribers", lambda: event_hub.stats()["subscribers"])
+    health_monitor.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down API")
+    await health_monitor.close()
+    await wallet_pool.close()
+    await payment_jobs.close()
+    await ledger_stream.close()
+    await race_matchmaker.close()
+    racing_service.close()
+    await xrpl_pool.close()
+    blocking_executor.shutdown(wait=False)
+    transaction_signer.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -20,10 +20,10 @@ class BalanceResponse(BaseModel):
     balance_xrp: float
     balance_drops: str
     
-class PaymentRequest(BaseModel):
-    sender_seed: str = Field(..., description="Sender wallet seed")
+class PaymentItem(BaseModel):
     destination: str = Field(..., description="Destination XRP address")
     amount: float = Field(..., gt=0, description="Amount in XRP (must be positive)")
+    memo: Optional[str] = Field(default=None, description="Optional memo text")
     
     @validator('destination')
     def validate_destination(cls, v):
@@ -33,18 +33,53 @@ class PaymentRequest(BaseModel):
             raise ValueError('XRP address length invalid')
         return v
 
+class PaymentRequest(PaymentItem):
+    sender_seed: str = Field(..., description="Sender wallet seed")
+
+class BatchPaymentRequest(BaseModel):
+    sender_seed: str = Field(..., description="Sender wallet seed, used for every payment")
+    payments: list[PaymentItem] = Field(..., min_length=1, max_length=500)
+
 class PaymentResponse(BaseModel):
     status: str
     transaction_hash: Optional[str] = None
     result: Optional[str] = None
     validated: bool
     fee: Optional[str] = None
+
+class PaymentJobResponse(BaseModel):
+    job_id: str
+    status: str
+    transaction_hash: str
+    engine_result: str
+    result: Optional[str] = None
+    validated: bool
+    fee: Optional[str] = None
+    ledger_index: Optional[int] = None
+    submitted_at: str
+    completed_at: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchPaymentResponse(BaseModel):
+    submitted: int
+    rejected: int
+    jobs: list[PaymentJobResponse]
+
+class TransactionHistoryResponse(BaseModel):
+    transactions: list[dict]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next (older) page")
     
 class HealthResponse(BaseModel):
     status: str
-    testnet_connected: bool
+    testnet_connected: Optional[bool] = None
     ledger: Optional[int] = None
     network: str
+    ready: Optional[bool] = None
+    source: Optional[str] = Field(None, description="ledger_stream or server_info")
+    checked_at: Optional[str] = None
+    age_seconds: Optional[float] = None
+    queues: Optional[dict[str, int]] = None
+    error: Optional[str] = None
     
 class ErrorResponse(BaseModel):
     detail: str
@@ -72,12 +107,34 @@ class GarageResponse(BaseModel):
     cars: list[CarResponse]
     total_cars: int
 
+class LineageNode(BaseModel):
+    car_id: str
+    parent_id: Optional[str] = None
+    generation: int = Field(..., description="-1 parent, -2 grandparent, ...; 1 child, 2 grandchild, ...")
+    exists: bool
+    training_count: Optional[int] = None
+    speed: Optional[float] = None
+
+class LineageResponse(BaseModel):
+    car_id: str
+    cars: list[LineageNode]
+
 class TrainCarRequest(BaseModel):
     car_id: str
     wallet_address: str
     wallet_seed: str = Field(..., description="Owner's wallet seed for payment")
     attribute_indices: Optional[list[int]] = None
     
+class TrainJob(BaseModel):
+    car_id: str
+    attribute_indices: Optional[list[int]] = None
+    iterations: int = Field(1, ge=1, le=100, description="Consecutive trainings; each one trains the previous result")
+
+class TrainBatchRequest(BaseModel):
+    wallet_address: str
+    wallet_seed: str = Field(..., description="Owner's wallet seed for the aggregated payment (1 XRP per training)")
+    jobs: list[TrainJob] = Field(..., min_length=1, max_length=500)
+
 class TrainCarResponse(BaseModel):
     success: bool
     car_id: str
@@ -98,6 +155,42 @@ class TestSpeedResponse(BaseModel):
     message: str
     speed: Optional[float] = None
 
+class SpeedsRequest(BaseModel):
+    car_ids: list[str] = Field(default_factory=list, max_length=10000)
+    wallet_address: Optional[str] = Field(None, description="Include every car in this wallet's garage")
+
+class SpeedsResponse(BaseModel):
+    speeds: dict[str, float]
+    missing: list[str]
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    car_id: str
+    wallet_address: str
+    speed: float
+    training_count: int
+
+class LeaderboardResponse(BaseModel):
+    total: int
+    offset: int
+    entries: list[LeaderboardEntry]
+
+class CarRankResponse(BaseModel):
+    car_id: str
+    rank: int
+    total: int
+    speed: float
+    nearby: list[LeaderboardEntry]
+
+class RaceOddsResponse(BaseModel):
+    car_id: str
+    speed: float
+    simulations: int
+    win_probability: float
+    expected_rank: float
+    rank_distribution: list[float] = Field(..., description="Probability of finishing 1st, 2nd, ... (index 0 is 1st)")
+    cached: bool
+
 class EnterRaceRequest(BaseModel):
     car_id: str
     wallet_address: str
@@ -113,6 +206,48 @@ class RaceResponse(BaseModel):
     prize_awarded: bool
     message: str
 
+class RaceRecord(BaseModel):
+    race_id: str
+    car_id: str
+    wallet_address: str
+    your_rank: int
+    winner_car_id: str
+    total_participants: int
+    prize_awarded: bool
+    timestamp: str
+    payment_tx: Optional[str] = None
+
+class LatestRaceResponse(BaseModel):
+    race: RaceRecord
+
+class RaceHistoryResponse(BaseModel):
+    races: list[RaceRecord]
+    next_cursor: Optional[int] = Field(None, description="Pass as `cursor` to fetch the next (older) page")
+
+class RaceStanding(BaseModel):
+    rank: int
+    car_id: str
+    speed: float
+    is_ai: bool
+
+class QueueEntryResponse(BaseModel):
+    entry_id: str
+    status: str
+    car_id: str
+    wallet_address: str
+    lobby_id: str
+    tier: int
+    queued_at: str
+    completed_at: Optional[str] = None
+    refund_tx: Optional[str] = None
+    race: Optional[RaceRecord] = None
+    standings: Optional[list[RaceStanding]] = None
+    error: Optional[str] = None
+
+class LeaveQueueRequest(BaseModel):
+    entry_id: str
+    wallet_address: str
+
 class SellCarRequest(BaseModel):
     car_id: str
     wallet_address: str
@@ -2,5 +2,7 @@
 from .wallet import router as wallet_router
 from .payment import router as payment_router
 from .health import router as health_router
+from .events import router as events_router
+from .metrics import router as metrics_router
 
-__all__ = ['wallet_router', 'payment_router', 'health_router']
+__all__ = ['wallet_router', 'payment_router', 'health_router', 'events_router', 'metrics_router']
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from config import settings
+from services import event_hub
+import json
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# identity keeps GZipMiddleware from buffering event streams in its compressor
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Content-Encoding": "identity",
+    "X-Accel-Buffering": "no"
+}
+
+@router.get("/stats")
+async def get_event_stats():
+    return event_hub.stats()
+
+@router.get("/{wallet_address}")
+async def stream_wallet_events(wallet_address: str, request: Request):
+    async def events():
+        # Subscribed here, not in the handler: a client that disconnects before the
+        # stream starts never runs the generator, so its finally would never unsubscribe
+        subscriber = event_hub.subscribe(wallet_address)
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                batch, dropped = await event_hub.next_events(subscriber, timeout=settings.EVENTS_HEARTBEAT)
+                if dropped:
+                    yield f"event: overflow\ndata: {json.dumps({'dropped': dropped})}\n\n"
+                if not batch:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(f"event: {event_type}\ndata: {data}\n\n" for event_type, data in batch)
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
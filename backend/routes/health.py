@@ -1,8 +1,7 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Response, status
 from models import HealthResponse
-import xrpl
-from xrpl.clients import JsonRpcClient
 from config import settings
+from services import health_monitor
 
 router = APIRouter(tags=["Health"])
 
@@ -12,23 +11,38 @@ router = APIRouter(tags=["Health"])
     status_code=status.HTTP_200_OK
 )
 async def health_check():
-    try:
-        client = JsonRpcClient(settings.TESTNET_URL)
-        server_info = client.request(xrpl.models.requests.ServerInfo())
-        
-        return {
-            "status": "healthy",
-            "testnet_connected": True,
-            "ledger": server_info.result.get('info', {}).get('validated_ledger', {}).get('seq'),
-            "network": settings.NETWORK
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "testnet_connected": False,
-            "network": settings.NETWORK,
-            "error": str(e)
-        }
+    snapshot = health_monitor.snapshot()
+    return {
+        **snapshot,
+        "status": "healthy" if snapshot["testnet_connected"] else "unhealthy",
+        "network": settings.NETWORK
+    }
+
+@router.get(
+    "/health/live",
+    response_model=HealthResponse,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_200_OK
+)
+async def liveness_check():
+    # No I/O: answers as long as the event loop is running
+    return {"status": "alive", "network": settings.NETWORK}
+
+@router.get(
+    "/health/ready",
+    response_model=HealthResponse,
+    status_code=status.HTTP_200_OK,
+    responses={503: {"model": HealthResponse}}
+)
+async def readiness_check(response: Response):
+    snapshot = health_monitor.snapshot()
+    if not snapshot["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        **snapshot,
+        "status": "ready" if snapshot["ready"] else "not_ready",
+        "network": settings.NETWORK
+    }
 
 @router.get("/")
 async def root():
@@ -38,12 +52,21 @@ async def root():
         "network": settings.NETWORK,
         "endpoints": {
             "GET /": "API info",
-            "GET /health": "Health check",
+            "GET /health": "Health check (cached snapshot)",
+            "GET /health/live": "Liveness probe (no I/O)",
+            "GET /health/ready": "Readiness probe: upstream, ledger and queue depths (503 when stale)",
             "POST /wallet/create": "Create new wallet",
             "GET /wallet/{address}/balance": "Get wallet balance",
             "GET /wallet/{address}/info": "Get account info",
-            "POST /payment": "Send XRP payment",
-            "GET /payment/{address}/history": "Get transaction history",
+            "GET /wallet/cache/stats": "Account cache and ledger stream counters",
+            "POST /payment": "Send XRP payment (?wait=false returns a job id)",
+            "POST /payment/batch": "Submit many payments from one sender",
+            "GET /payment/jobs/{job_id}": "Get payment job status",
+            "GET /payment/jobs/{job_id}/events": "Stream payment job status (SSE)",
+            "GET /payment/{address}/history": "Get transaction history (paginated with cursor)",
+            "GET /payment/{address}/history/export": "Export full transaction history (NDJSON)",
+            "GET /events/{address}": "Stream a wallet's garage, race and balance events (SSE)",
+            "GET /metrics": "Request, XRPL and racing metrics (Prometheus text format)",
             "GET /docs": "API documentation"
         }
     }
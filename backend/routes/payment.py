@@ -1,26 +1,46 @@
-from fastapi import APIRouter, HTTPException, status
-from models import PaymentRequest, PaymentResponse, ErrorResponse
-from services import PaymentService
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from models import (
+    PaymentRequest, PaymentResponse, PaymentJobResponse,
+    BatchPaymentRequest, BatchPaymentResponse, TransactionHistoryResponse, ErrorResponse
+)
+from services import PaymentService, xrpl_pool, account_cache, payment_jobs, transaction_history
+from services.payment_jobs import FINAL_STATUSES
+from .events import SSE_HEADERS
+from typing import Optional, Union
+import json
 import xrpl.transaction
 
 router = APIRouter(prefix="/payment", tags=["Payment"])
-payment_service = PaymentService()
+payment_service = PaymentService(xrpl_pool, account_cache, payment_jobs, transaction_history)
 
 @router.post(
     "",
-    response_model=PaymentResponse,
+    response_model=Union[PaymentResponse, PaymentJobResponse],
     status_code=status.HTTP_200_OK,
     responses={
+        202: {"model": PaymentJobResponse},
         400: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
     }
 )
-async def send_payment(payment: PaymentRequest):
+async def send_payment(payment: PaymentRequest, response: Response, wait: bool = True):
     try:
-        result = payment_service.send_payment(
+        if not wait:
+            job = await payment_service.submit_payment(
+                sender_seed=payment.sender_seed,
+                destination=payment.destination,
+                amount=payment.amount,
+                memo=payment.memo
+            )
+            response.status_code = status.HTTP_202_ACCEPTED
+            return job
+        
+        result = await payment_service.send_payment(
             sender_seed=payment.sender_seed,
             destination=payment.destination,
-            amount=payment.amount
+            amount=payment.amount,
+            memo=payment.memo
         )
         return result
     except xrpl.transaction.XRPLReliableSubmissionException as e:
@@ -34,18 +54,113 @@ async def send_payment(payment: PaymentRequest):
             detail=f"Payment processing error: {str(e)}"
         )
 
+@router.post(
+    "/batch",
+    response_model=BatchPaymentResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={500: {"model": ErrorResponse}}
+)
+async def send_batch_payment(batch: BatchPaymentRequest):
+    try:
+        jobs = await payment_service.send_batch(
+            batch.sender_seed,
+            [item.dict() for item in batch.payments]
+        )
+        rejected = sum(1 for job in jobs if job["status"] == "failed" and not job["validated"])
+        return {
+            "submitted": len(jobs) - rejected,
+            "rejected": rejected,
+            "jobs": jobs
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch payment error: {str(e)}"
+        )
+
 @router.get(
     "/{address}/history",
-    responses={500: {"model": ErrorResponse}}
+    response_model=TransactionHistoryResponse,
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}}
 )
-async def get_transaction_history(address: str, limit: int = 10):
+async def get_transaction_history(address: str, limit: int = 10, cursor: Optional[str] = None):
+    try:
+        ledger_index, seq = map(int, cursor.split(":")) if cursor else (None, None)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {cursor}"
+        )
+    
     try:
         if limit > 50:
             limit = 50
-        result = payment_service.get_transaction_history(address, limit)
-        return {"transactions": result}
+        before = (ledger_index, seq) if cursor else None
+        transactions, next_position = await payment_service.get_transaction_history(address, max(1, limit), before)
+        return {
+            "transactions": transactions,
+            "next_cursor": f"{next_position[0]}:{next_position[1]}" if next_position else None
+        }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get transaction history: {str(e)}"
         )
+
+@router.get(
+    "/{address}/history/export",
+    response_class=StreamingResponse,
+    responses={500: {"model": ErrorResponse}}
+)
+async def export_transaction_history(address: str):
+    transactions = payment_service.export_transaction_history(address)
+    try:
+        # Fetch the first page before committing to a 200 so errors still surface as 500s
+        first = await anext(transactions, None)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export transaction history: {str(e)}"
+        )
+    
+    async def stream():
+        if first is not None:
+            yield json.dumps(first) + "\n"
+        async for entry in transactions:
+            yield json.dumps(entry) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=PaymentJobResponse,
+    responses={404: {"model": ErrorResponse}}
+)
+async def get_payment_job(job_id: str, wait: float = 0):
+    job = await payment_jobs.wait(job_id, timeout=min(wait, 30)) if wait > 0 else payment_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Payment job {job_id} not found"
+        )
+    return job
+
+@router.get(
+    "/jobs/{job_id}/events",
+    responses={404: {"model": ErrorResponse}}
+)
+async def stream_payment_job(job_id: str):
+    if payment_jobs.get(job_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Payment job {job_id} not found"
+        )
+    
+    async def events():
+        job = payment_jobs.get(job_id)
+        yield f"data: {json.dumps(job)}\n\n"
+        if job["status"] not in FINAL_STATUSES:
+            job = await payment_jobs.wait(job_id)
+            yield f"data: {json.dumps(job)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
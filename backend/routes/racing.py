@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from models import (
-    CarCreateRequest, CarResponse, GarageResponse,
-    TrainCarRequest, TrainCarResponse,
+    CarCreateRequest, CarResponse, GarageResponse, LineageResponse,
+    TrainCarRequest, TrainCarResponse, TrainBatchRequest,
     TestSpeedRequest, TestSpeedResponse,
+    SpeedsRequest, SpeedsResponse,
+    LeaderboardResponse, CarRankResponse, RaceOddsResponse,
     EnterRaceRequest, RaceResponse,
+    LatestRaceResponse, RaceHistoryResponse,
+    QueueEntryResponse, LeaveQueueRequest,
     SellCarRequest, SellCarResponse
 )
 from services.racing_service import racing_service
+from services.matchmaking import race_matchmaker
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,6 +59,42 @@ async def get_garage(wallet_address: str):
             detail=f"Failed to fetch garage: {str(e)}"
         )
 
+@router.get("/car/{car_id}/ancestry", response_model=LineageResponse)
+async def get_ancestry(car_id: str, limit: int = Query(50, ge=1, le=500)):
+    try:
+        cars = racing_service.get_ancestry(car_id, limit)
+    except Exception as e:
+        logger.error(f"Error fetching ancestry: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch ancestry: {str(e)}"
+        )
+    
+    if cars is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Car not found"
+        )
+    return {'car_id': car_id, 'cars': cars}
+
+@router.get("/car/{car_id}/descendants", response_model=LineageResponse)
+async def get_descendants(car_id: str, limit: int = Query(100, ge=1, le=1000)):
+    try:
+        cars = racing_service.get_descendants(car_id, limit)
+    except Exception as e:
+        logger.error(f"Error fetching descendants: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch descendants: {str(e)}"
+        )
+    
+    if cars is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Car not found"
+        )
+    return {'car_id': car_id, 'cars': cars}
+
 @router.post("/train", response_model=TrainCarResponse)
 async def train_car(request: TrainCarRequest):
     try:
@@ -93,6 +137,41 @@ async def train_car(request: TrainCarRequest):
             detail=f"Failed to train car: {str(e)}"
         )
 
+@router.post(
+    "/train/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One JSON result per job, then a summary line"}}
+)
+async def train_batch(request: TrainBatchRequest):
+    try:
+        success, message, results, summary = racing_service.train_cars_batch(
+            request.wallet_address,
+            request.wallet_seed,
+            [job.dict() for job in request.jobs]
+        )
+    except Exception as e:
+        logger.error(f"Error training batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to train batch: {str(e)}"
+        )
+    
+    if not success:
+        logger.warning(f"Batch training failed for {request.wallet_address}: {message}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=message
+        )
+    
+    logger.info(f"Batch training for {request.wallet_address}: {message}")
+    
+    def stream():
+        for result in results:
+            yield json.dumps(result) + "\n"
+        yield json.dumps({'summary': summary}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.post("/test", response_model=TestSpeedResponse)
 async def test_speed(request: TestSpeedRequest):
     try:
@@ -125,6 +204,82 @@ async def test_speed(request: TestSpeedRequest):
             detail=f"Failed to test speed: {str(e)}"
         )
 
+@router.post("/speeds", response_model=SpeedsResponse)
+async def get_speeds(request: SpeedsRequest):
+    if not request.car_ids and not request.wallet_address:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide car_ids, wallet_address or both"
+        )
+    
+    try:
+        car_ids = list(request.car_ids)
+        if request.wallet_address:
+            car_ids.extend(car.car_id for car in racing_service.get_garage(request.wallet_address))
+        speeds, missing = racing_service.get_speeds(list(dict.fromkeys(car_ids)))
+        return {
+            'speeds': speeds,
+            'missing': missing
+        }
+    except Exception as e:
+        logger.error(f"Error computing speeds: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute speeds: {str(e)}"
+        )
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100)):
+    try:
+        total, entries = racing_service.get_leaderboard(offset, limit)
+        return {
+            'total': total,
+            'offset': offset,
+            'entries': entries
+        }
+    except Exception as e:
+        logger.error(f"Error fetching leaderboard: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch leaderboard: {str(e)}"
+        )
+
+@router.get("/leaderboard/{car_id}", response_model=CarRankResponse)
+async def get_car_rank(car_id: str, radius: int = Query(5, ge=0, le=50)):
+    try:
+        rank = racing_service.get_car_rank(car_id, radius)
+    except Exception as e:
+        logger.error(f"Error fetching car rank: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch car rank: {str(e)}"
+        )
+    
+    if rank is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Car not found"
+        )
+    return rank
+
+@router.get("/odds/{car_id}", response_model=RaceOddsResponse)
+async def get_race_odds(car_id: str):
+    try:
+        odds = racing_service.get_odds(car_id)
+    except Exception as e:
+        logger.error(f"Error estimating race odds: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to estimate race odds: {str(e)}"
+        )
+    
+    if odds is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Car not found"
+        )
+    return odds
+
 @router.post("/enter", response_model=RaceResponse)
 async def enter_race(request: EnterRaceRequest):
     try:
@@ -162,6 +317,99 @@ async def enter_race(request: EnterRaceRequest):
             detail=f"Failed to enter race: {str(e)}"
         )
 
+@router.post("/queue", response_model=QueueEntryResponse, status_code=status.HTTP_202_ACCEPTED)
+async def join_queue(request: EnterRaceRequest):
+    try:
+        success, entry, message = race_matchmaker.enqueue(
+            request.car_id,
+            request.wallet_address,
+            request.wallet_seed
+        )
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=message
+            )
+        
+        logger.info(f"Car {request.car_id} joined matchmaking: {message} - Payment: {entry['payment_tx']}")
+        return entry
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error joining race queue: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to join race queue: {str(e)}"
+        )
+
+@router.post("/queue/leave", response_model=QueueEntryResponse)
+async def leave_queue(request: LeaveQueueRequest):
+    success, message = race_matchmaker.cancel(request.entry_id, request.wallet_address)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=message
+        )
+    return race_matchmaker.get(request.entry_id)
+
+@router.get("/queue/stats")
+async def get_queue_stats():
+    return race_matchmaker.stats()
+
+@router.get("/queue/{entry_id}", response_model=QueueEntryResponse)
+async def get_queue_entry(entry_id: str, wait: float = 0):
+    entry = await race_matchmaker.wait(entry_id, timeout=min(wait, 30)) if wait > 0 else race_matchmaker.get(entry_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Queue entry {entry_id} not found"
+        )
+    return entry
+
+@router.get("/latest", response_model=LatestRaceResponse)
+async def get_latest_race(address: Optional[str] = None, car_id: Optional[str] = None):
+    try:
+        race = racing_service.get_latest_race(wallet_address=address, car_id=car_id)
+    except Exception as e:
+        logger.error(f"Error fetching latest race: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch latest race: {str(e)}"
+        )
+    
+    if race is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No races found"
+        )
+    return {'race': race}
+
+@router.get("/history", response_model=RaceHistoryResponse)
+async def get_race_history(
+    address: Optional[str] = None,
+    car_id: Optional[str] = None,
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    try:
+        races, next_cursor = racing_service.get_race_history(
+            wallet_address=address,
+            car_id=car_id,
+            before=cursor,
+            limit=limit
+        )
+        return {
+            'races': races,
+            'next_cursor': next_cursor
+        }
+    except Exception as e:
+        logger.error(f"Error fetching race history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch race history: {str(e)}"
+        )
+
 @router.post("/car/sell", response_model=SellCarResponse)
 async def sell_car(request: SellCarRequest):
     try:
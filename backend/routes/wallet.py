@@ -1,20 +1,26 @@
 from fastapi import APIRouter, HTTPException, status
 from models import WalletCreateRequest, WalletResponse, BalanceResponse, ErrorResponse
-from services import WalletService
+from services import WalletService, WalletPoolExhausted, xrpl_pool, account_cache, ledger_stream, wallet_pool
 
 router = APIRouter(prefix="/wallet", tags=["Wallet"])
-wallet_service = WalletService()
+wallet_service = WalletService(xrpl_pool, account_cache, ledger_stream)
 
 @router.post(
     "/create", 
     response_model=WalletResponse,
     status_code=status.HTTP_201_CREATED,
-    responses={500: {"model": ErrorResponse}}
+    responses={500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
 )
 async def create_wallet(wallet_data: WalletCreateRequest):
     try:
-        result = wallet_service.create_wallet(wallet_data.seed)
+        result = await wallet_service.create_wallet(wallet_data.seed)
         return result
+    except WalletPoolExhausted as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Failed to create wallet: {str(e)}",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -28,7 +34,7 @@ async def create_wallet(wallet_data: WalletCreateRequest):
 )
 async def get_balance(address: str):
     try:
-        result = wallet_service.get_balance(address)
+        result = await wallet_service.get_balance(address)
         return result
     except Exception as e:
         raise HTTPException(
@@ -42,10 +48,14 @@ async def get_balance(address: str):
 )
 async def get_account_info(address: str):
     try:
-        result = wallet_service.get_account_info(address)
+        result = await wallet_service.get_account_info(address)
         return result
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get account info: {str(e)}"
         )
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return {**account_cache.stats(), "ledger_stream": ledger_stream.stats(), "wallet_pool": wallet_pool.stats()}
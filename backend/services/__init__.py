@@ -1,5 +1,24 @@
 """Services package for business logic"""
 from .wallet_service import WalletService
 from .payment_service import PaymentService
+from .metrics import MetricsRegistry, RequestMetricsMiddleware, metrics
+from .xrpl_client import XRPLClientPool, xrpl_pool
+from .executor import blocking_executor, run_blocking
+from .signing import TransactionSigner, WalletCache, transaction_signer
+from .wallet_pool import WalletPool, WalletPoolExhausted, wallet_pool
+from .admission import AdmissionController, AdmissionMiddleware, RateSketch, RouteGate, admission
+from .idempotency import IdempotencyCache, IdempotencyMiddleware, idempotency_cache, idempotency_requests
+from .account_cache import AccountCache, account_cache
+from .payment_jobs import PaymentJobTracker, payment_jobs
+from .event_hub import EventHub, event_hub
+from .ledger_stream import LedgerStream, ledger_stream
+from .transaction_history import TransactionHistory, transaction_history
+from .health_monitor import HealthMonitor, health_monitor
 
-__all__ = ['WalletService', 'PaymentService']
+__all__ = ['WalletService', 'PaymentService', 'XRPLClientPool', 'xrpl_pool', 'blocking_executor', 'run_blocking',
+           'AccountCache', 'account_cache', 'PaymentJobTracker', 'payment_jobs', 'EventHub', 'event_hub',
+           'LedgerStream', 'ledger_stream', 'TransactionHistory', 'transaction_history',
+           'HealthMonitor', 'health_monitor', 'MetricsRegistry', 'RequestMetricsMiddleware', 'metrics',
+           'TransactionSigner', 'WalletCache', 'transaction_signer', 'WalletPool', 'WalletPoolExhausted', 'wallet_pool',
+           'AdmissionController', 'AdmissionMiddleware', 'RateSketch', 'RouteGate', 'admission',
+           'IdempotencyCache', 'IdempotencyMiddleware', 'idempotency_cache', 'idempotency_requests']
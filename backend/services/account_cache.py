@@ -0,0 +1,108 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from config import settings
+
+class AccountCache:
+    """Read-through cache of validated account_info results.
+
+    Entries are tagged with the validated ledger they were read from and are
+    served only while that ledger is still the newest one observed and the TTL
+    has not expired. Concurrent misses for one address share a single fetch.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 4.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.validated_ledger = 0
+        self._entries: "OrderedDict[str, Tuple[int, float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def observe_ledger(self, ledger_index: Optional[int]) -> None:
+        if ledger_index and ledger_index > self.validated_ledger:
+            self.validated_ledger = ledger_index
+
+    def _lookup(self, address: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(address)
+        if entry is None:
+            return None
+        ledger_index, fetched_at, result = entry
+        if ledger_index < self.validated_ledger or time.monotonic() - fetched_at > self.ttl:
+            del self._entries[address]
+            return None
+        self._entries.move_to_end(address)
+        return result
+
+    def _store(self, address: str, result: Dict[str, Any]) -> None:
+        ledger_index = result.get('ledger_index') or self.validated_ledger
+        self.observe_ledger(ledger_index)
+        self._entries[address] = (ledger_index, time.monotonic(), result)
+        self._entries.move_to_end(address)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, address: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        result = self._lookup(address)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        task = self._inflight.get(address)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(address, fetch))
+            self._inflight[address] = task
+
+        # Shield so one cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, address: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        task = asyncio.current_task()
+        try:
+            result = await fetch()
+        finally:
+            if self._inflight.get(address) is task:
+                del self._inflight[address]
+                invalidated = False
+            else:
+                invalidated = True
+
+        # Error results (e.g. actNotFound) and results raced by an invalidation are not kept
+        if 'account_data' in result and not invalidated:
+            self._store(address, result)
+        return result
+
+    def invalidate(self, *addresses: str) -> None:
+        for address in addresses:
+            self._entries.pop(address, None)
+            self._inflight.pop(address, None)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'validated_ledger': self.validated_ledger,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_ratio': (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+account_cache = AccountCache(
+    max_entries=settings.ACCOUNT_CACHE_SIZE,
+    ttl=settings.ACCOUNT_CACHE_TTL
+)
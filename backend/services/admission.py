@@ -0,0 +1,265 @@
+import asyncio
+import json
+import math
+import time
+from array import array
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from config import settings
+from .metrics import Counter, MetricsRegistry, metrics
+
+# Odd 64-bit multipliers giving each sketch row its own view of a key's hash
+_ROW_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                    0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9)
+_MASK64 = (1 << 64) - 1
+
+REJECTION_DETAILS = {
+    'ip_rate': "Too many requests from this client",
+    'wallet_rate': "Too many requests for this wallet",
+    'queue_full': "Route is overloaded",
+    'latency_budget': "Route is overloaded"
+}
+
+class RateSketch:
+    """Token buckets for an unbounded set of keys in fixed memory.
+
+    Each bucket is kept as a GCRA theoretical arrival time (when the bucket
+    will be full again) in a count-min sketch of `depth` rows by `width`
+    cells. A key's time is the minimum over its cells and admitting it raises
+    those cells to the new time (conservative update). Collisions can only
+    make a key look busier, so a flooding key never escapes its limit; a
+    quiet key is throttled by mistake only when all of its cells are shared
+    with busier keys.
+    """
+
+    def __init__(self, rate: float, burst: int, width: int = 16384, depth: int = 4, clock: Callable[[], float] = time.monotonic):
+        if width & (width - 1) or not 0 < depth <= len(_ROW_MULTIPLIERS):
+            raise ValueError("width must be a power of two and depth at most 8")
+        self.interval = 1.0 / rate
+        # A full bucket admits `burst` back-to-back requests
+        self.tolerance = (burst - 1) * self.interval
+        self.clock = clock
+        self._shift = 64 - width.bit_length() + 1
+        self._multipliers = _ROW_MULTIPLIERS[:depth]
+        self._rows = [array('d', bytes(8 * width)) for _ in range(depth)]
+
+    def _cells(self, key: str) -> List[int]:
+        h = hash(key) & _MASK64
+        return [((h * multiplier) & _MASK64) >> self._shift for multiplier in self._multipliers]
+
+    def acquire(self, key: str) -> float:
+        """0 if the key may proceed now, else the seconds until it may."""
+        now = self.clock()
+        cells = self._cells(key)
+        rows = self._rows
+        tat = max(min(row[cell] for row, cell in zip(rows, cells)), now)
+        if tat - now > self.tolerance:
+            return tat - now - self.tolerance
+        tat += self.interval
+        for row, cell in zip(rows, cells):
+            if row[cell] < tat:
+                row[cell] = tat
+        return 0.0
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(row.itemsize * len(row) for row in self._rows)
+
+class RouteGate:
+    """Concurrency cap for one route with a queueing-delay budget.
+
+    Up to `limit` requests run at once and later ones wait in FIFO order.
+    Arrivals are shed instead of queued once the oldest waiter has already
+    waited longer than `budget` seconds, or `max_queue` are waiting, so the
+    time a request spends queued stays near the budget however hard the
+    route is pushed.
+    """
+
+    def __init__(self, limit: int, budget: float, max_queue: int, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.budget = budget
+        self.max_queue = max_queue
+        self.clock = clock
+        self.in_flight = 0
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def overloaded(self) -> Optional[str]:
+        if self.in_flight < self.limit and not self._waiters:
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+        if self._waiters and self.clock() - self._waiters[0][0] > self.budget:
+            return "latency_budget"
+        return None
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (self.clock(), waiter)
+        self._waiters.append(entry)
+        try:
+            # release() hands its slot over, so in_flight is already counted
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._waiters.remove(entry)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+async def read_body(receive) -> Optional[bytes]:
+    """Whole ASGI request body, or None if the client disconnected first."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+def replay_body(body: bytes, receive):
+    """An ASGI receive that hands the app an already-read body, then defers to the real one."""
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if replayed:
+            return await receive()
+        replayed = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+    return replay
+
+def _wallet_of(body: bytes) -> Optional[str]:
+    try:
+        wallet_address = json.loads(body).get('wallet_address')
+    except (ValueError, AttributeError):
+        return None
+    return wallet_address if isinstance(wallet_address, str) else None
+
+class AdmissionController:
+    """Per-IP and per-wallet rate limits plus per-route gates for paid actions."""
+
+    def __init__(
+        self,
+        wallets: RateSketch,
+        ips: RateSketch,
+        route_limit: int = 64,
+        latency_budget: float = 0.5,
+        max_queue: int = 256,
+        rejections: Optional[Counter] = None
+    ):
+        self.wallets = wallets
+        self.ips = ips
+        self.route_limit = route_limit
+        self.latency_budget = latency_budget
+        self.max_queue = max_queue
+        self.rejections = rejections
+        self.gates: Dict[str, RouteGate] = {}
+
+    def guard(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self.gates.setdefault(path, RouteGate(self.route_limit, self.latency_budget, self.max_queue))
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        registry.gauge(
+            "admission_in_flight", "Guarded requests running, by route",
+            lambda: {(path,): gate.in_flight for path, gate in self.gates.items()}, ("route",)
+        )
+        registry.gauge(
+            "admission_queued", "Guarded requests waiting for a slot, by route",
+            lambda: {(path,): gate.queued for path, gate in self.gates.items()}, ("route",)
+        )
+
+    def reject(self, route: str, reason: str) -> None:
+        if self.rejections is not None:
+            self.rejections.inc((route, reason))
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to guarded POST routes.
+
+    The client IP is checked before the body is read. The wallet limit needs
+    `wallet_address` from the JSON body, which is read once here and replayed
+    to the app. Rejections are answered directly: 429 for rate limits, 503
+    for an overloaded route, both with Retry-After.
+    """
+
+    def __init__(self, app, controller: "AdmissionController", paths: Iterable[str] = ()):
+        self.app = app
+        self.controller = controller
+        controller.guard(paths)
+
+    async def _reject(self, send, route: str, status: int, reason: str, retry_after: float) -> None:
+        self.controller.reject(route, reason)
+        body = json.dumps({'detail': REJECTION_DETAILS[reason]}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(max(1, math.ceil(retry_after))).encode())
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        gate = self.controller.gates.get(scope['path']) if scope['type'] == 'http' and scope['method'] == 'POST' else None
+        if gate is None:
+            return await self.app(scope, receive, send)
+
+        route = scope['path']
+        client = scope.get('client')
+        wait = self.controller.ips.acquire(client[0] if client else "unknown")
+        if wait:
+            return await self._reject(send, route, 429, "ip_rate", wait)
+
+        body = await read_body(receive)
+        if body is None:
+            return
+
+        wallet_address = _wallet_of(body)
+        if wallet_address is not None:
+            wait = self.controller.wallets.acquire(wallet_address)
+            if wait:
+                return await self._reject(send, route, 429, "wallet_rate", wait)
+
+        reason = gate.overloaded()
+        if reason is not None:
+            return await self._reject(send, route, 503, reason, gate.budget)
+
+        await gate.acquire()
+        try:
+            await self.app(scope, replay_body(body, receive), send)
+        finally:
+            gate.release()
+
+admission_rejections = metrics.counter(
+    "admission_rejections_total",
+    "Guarded requests rejected before reaching the handler, by route and reason",
+    ("route", "reason")
+)
+
+admission = AdmissionController(
+    RateSketch(settings.RATE_LIMIT_WALLET_RATE, settings.RATE_LIMIT_WALLET_BURST, settings.RATE_LIMIT_SKETCH_WIDTH),
+    RateSketch(settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_SKETCH_WIDTH),
+    settings.ROUTE_MAX_CONCURRENCY,
+    settings.ROUTE_LATENCY_BUDGET,
+    settings.ROUTE_MAX_QUEUE,
+    admission_rejections
+)
+admission.register_metrics(metrics)
@@ -0,0 +1,547 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .leaderboard import Leaderboard
+
+NUM_ATTRIBUTES = 10
+SPEED_BUCKET_KMH = 10
+
+BASE_WEIGHTS = [0.15, 0.12, 0.10, 0.08, 0.11, 0.09, 0.13, 0.07, 0.08, 0.07]
+MIN_RAW, MAX_RAW = 100, 900
+MIN_SPEED, MAX_SPEED = 150, 350
+
+def speed_from_raw(raw_speed: float) -> float:
+    speed = MIN_SPEED + (raw_speed - MIN_RAW) * (MAX_SPEED - MIN_SPEED) / (MAX_RAW - MIN_RAW)
+    return max(MIN_SPEED, min(MAX_SPEED, speed))
+
+def speeds_from_raw(raw_speeds: np.ndarray) -> np.ndarray:
+    speeds = MIN_SPEED + (raw_speeds - MIN_RAW) * (MAX_SPEED - MIN_SPEED) / (MAX_RAW - MIN_RAW)
+    return np.clip(speeds, MIN_SPEED, MAX_SPEED)
+
+def _iso(timestamp: float) -> Optional[str]:
+    if np.isnan(timestamp):
+        return None
+    return datetime.utcfromtimestamp(timestamp).isoformat()
+
+class Car:
+    """Lightweight view of one row in a CarStore.
+
+    Attribute reads and writes go straight to the store's columns, so a Car can
+    be created and dropped freely without copying the car's data.
+    """
+
+    __slots__ = ('_store', '_slot')
+
+    ATTRIBUTE_NAMES = [
+        'tyres',        # 0: Tyre quality
+        'brakes',       # 1: Brake performance
+        'engine',       # 2: Engine power
+        'aerodynamics', # 3: Aerodynamic efficiency
+        'suspension',   # 4: Suspension quality
+        'transmission', # 5: Transmission efficiency
+        'fuel_system',  # 6: Fuel system optimization
+        'electronics',  # 7: Electronic systems
+        'chassis',      # 8: Chassis rigidity
+        'cooling'       # 9: Cooling system
+    ]
+
+    def __init__(self, store: 'CarStore', slot: int):
+        self._store = store
+        self._slot = slot
+
+    @staticmethod
+    def random_attributes(rng: np.random.Generator) -> Tuple[List[int], List[float]]:
+        flags = rng.integers(1, 1000, NUM_ATTRIBUTES).tolist()
+        weights = [w + jitter for w, jitter in zip(BASE_WEIGHTS, rng.uniform(-0.02, 0.02, NUM_ATTRIBUTES).tolist())]
+        total = sum(weights)
+        return flags, [w / total for w in weights]
+
+    @property
+    def car_id(self) -> str:
+        return self._store.car_ids[self._slot]
+
+    @property
+    def wallet_address(self) -> str:
+        return self._store.owner_of(self._slot)
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._store.flags[self._slot]
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Read-only: the row may be shared with the car's lineage."""
+        return self._store.weights_of(self._slot)
+
+    @weights.setter
+    def weights(self, value: Sequence[float]) -> None:
+        self._store.set_weights(self._slot, value)
+
+    @property
+    def training_count(self) -> int:
+        return int(self._store.training_count[self._slot])
+
+    @training_count.setter
+    def training_count(self, value: int) -> None:
+        self._store.training_count[self._slot] = value
+
+    @property
+    def created_at(self) -> str:
+        return _iso(self._store.created_at[self._slot])
+
+    @property
+    def last_trained(self) -> Optional[str]:
+        return _iso(self._store.last_trained[self._slot])
+
+    @property
+    def last_speed(self) -> Optional[float]:
+        value = self._store.last_speed[self._slot]
+        return None if np.isnan(value) else float(value)
+
+    @last_speed.setter
+    def last_speed(self, value: Optional[float]) -> None:
+        self._store.last_speed[self._slot] = np.nan if value is None else value
+
+    @property
+    def speed(self) -> float:
+        """Current speed from flags and weights, maintained by the store."""
+        return float(self._store.speed[self._slot])
+
+    def calculate_speed(self) -> float:
+        speed = self.speed
+        self.last_speed = speed
+        return speed
+
+    def train(self, attribute_indices: Optional[List[int]] = None) -> dict:
+        if attribute_indices is None or len(attribute_indices) == 0:
+            attribute_indices = list(range(NUM_ATTRIBUTES))
+
+        flags = self.flags
+        changes = {}
+        deltas = self._store.rng.integers(-20, 21, len(attribute_indices)).tolist()
+        for i, delta in zip(attribute_indices, deltas):
+            if 0 <= i < NUM_ATTRIBUTES:
+                old_value = int(flags[i])
+                new_value = max(1, min(999, old_value + delta))
+                flags[i] = new_value
+                changes[self.ATTRIBUTE_NAMES[i]] = {
+                    'old': old_value,
+                    'delta': delta,
+                    'new': new_value
+                }
+
+        self.training_count += 1
+        self._store.last_trained[self._slot] = datetime.utcnow().timestamp()
+        self.last_speed = None
+        self._store.refresh_speed(self._slot)
+
+        return changes
+
+    def to_dict_safe(self) -> dict:
+        return {
+            'car_id': self.car_id,
+            'wallet_address': self.wallet_address,
+            'training_count': self.training_count,
+            'created_at': self.created_at,
+            'last_trained': self.last_trained
+        }
+
+class CarStore:
+    """Column-oriented car storage with a free-list and secondary indexes.
+
+    Flags and weights live in fixed-width NumPy columns indexed by slot; sold
+    cars return their slot to a free-list. Garages are insertion-ordered dicts
+    used as sets, so membership, append and removal are all O(1).
+
+    Training never changes weights, so weight rows are shared copy-on-write:
+    a child trained from a parent points at the parent's row (reference
+    counted) and only gets its own row if its weights are ever written.
+    Lineage edges outlive sold cars. Every car has at most one parent, so the
+    lineage is stored as first-child / next-sibling links: an edge costs two
+    dict entries and no per-parent container.
+    """
+
+    def __init__(self, capacity: int = 1024, rng: Optional[np.random.Generator] = None):
+        # Source of training deltas; owned by the store so Car views can reach it
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.capacity = 0
+        self.flags = np.zeros((0, NUM_ATTRIBUTES), dtype=np.int16)
+        self.weight_ref = np.zeros(0, dtype=np.int32)
+        self.training_count = np.zeros(0, dtype=np.int32)
+        self.created_at = np.zeros(0, dtype=np.float64)
+        self.last_trained = np.zeros(0, dtype=np.float64)
+        self.last_speed = np.zeros(0, dtype=np.float64)
+        self.speed = np.zeros(0, dtype=np.float64)
+        self.owner = np.zeros(0, dtype=np.int32)
+        self.car_ids: List[Optional[str]] = []
+        self._grow(capacity)
+
+        self.weight_rows = np.zeros((0, NUM_ATTRIBUTES), dtype=np.float64)
+        self._weight_refcount: List[int] = []
+        self._free_weights: List[int] = []
+
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._high_water = 0
+        self._owner_ids: Dict[str, int] = {}
+        self._owners: List[str] = []
+
+        self.by_owner: Dict[str, Dict[str, None]] = {}
+        self.parents: Dict[str, str] = {}
+        self.first_child: Dict[str, str] = {}
+        self.next_sibling: Dict[str, str] = {}
+        self.speed_buckets: Dict[int, Dict[str, None]] = {}
+        self.leaderboard = Leaderboard()
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - self.capacity
+
+        def extend(column: np.ndarray, fill) -> np.ndarray:
+            pad = np.full((extra,) + column.shape[1:], fill, dtype=column.dtype)
+            return np.concatenate([column, pad])
+
+        self.flags = extend(self.flags, 0)
+        self.weight_ref = extend(self.weight_ref, -1)
+        self.training_count = extend(self.training_count, 0)
+        self.created_at = extend(self.created_at, np.nan)
+        self.last_trained = extend(self.last_trained, np.nan)
+        self.last_speed = extend(self.last_speed, np.nan)
+        self.speed = extend(self.speed, np.nan)
+        self.owner = extend(self.owner, -1)
+        self.car_ids.extend([None] * extra)
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, car_id: str) -> bool:
+        return car_id in self._slots
+
+    def owner_of(self, slot: int) -> str:
+        return self._owners[self.owner[slot]]
+
+    def _owner_id(self, wallet_address: str) -> int:
+        owner_id = self._owner_ids.get(wallet_address)
+        if owner_id is None:
+            owner_id = len(self._owners)
+            self._owner_ids[wallet_address] = owner_id
+            self._owners.append(wallet_address)
+        return owner_id
+
+    def _new_weight_row(self, weights: np.ndarray) -> int:
+        if self._free_weights:
+            ref = self._free_weights.pop()
+        else:
+            ref = len(self._weight_refcount)
+            if ref == len(self.weight_rows):
+                pad = np.zeros((max(1024, ref), NUM_ATTRIBUTES), dtype=np.float64)
+                self.weight_rows = np.concatenate([self.weight_rows, pad])
+            self._weight_refcount.append(0)
+        self.weight_rows[ref] = weights
+        self._weight_refcount[ref] = 1
+        return ref
+
+    def _release_weights(self, slot: int) -> None:
+        ref = self.weight_ref[slot]
+        self._weight_refcount[ref] -= 1
+        if self._weight_refcount[ref] == 0:
+            self._free_weights.append(int(ref))
+        self.weight_ref[slot] = -1
+
+    def weights_of(self, slot: int) -> np.ndarray:
+        row = self.weight_rows[self.weight_ref[slot]]
+        row.flags.writeable = False
+        return row
+
+    def set_weights(self, slot: int, weights: Sequence[float]) -> None:
+        ref = self.weight_ref[slot]
+        if self._weight_refcount[ref] > 1:
+            # Copy on write: leave the shared row to the rest of the lineage
+            self._release_weights(slot)
+            self.weight_ref[slot] = self._new_weight_row(np.asarray(weights, dtype=np.float64))
+        else:
+            self.weight_rows[ref] = weights
+        self.refresh_speed(slot)
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._high_water == self.capacity:
+            self._grow(max(1024, self.capacity * 2))
+        slot = self._high_water
+        self._high_water += 1
+        return slot
+
+    def add(
+        self,
+        car_id: str,
+        wallet_address: str,
+        flags: Sequence[int],
+        weights: Sequence[float],
+        training_count: int = 0,
+        parent_id: Optional[str] = None,
+        created_at: Optional[float] = None,
+        last_trained: Optional[float] = None,
+        last_speed: Optional[float] = None
+    ) -> Car:
+        slot = self._insert(car_id, wallet_address, flags, weights, training_count, parent_id, created_at, last_trained, last_speed)
+        self.refresh_speed(slot)
+        return Car(self, slot)
+
+    def _insert(
+        self,
+        car_id: str,
+        wallet_address: str,
+        flags: Sequence[int],
+        weights: Sequence[float],
+        training_count: int = 0,
+        parent_id: Optional[str] = None,
+        created_at: Optional[float] = None,
+        last_trained: Optional[float] = None,
+        last_speed: Optional[float] = None
+    ) -> int:
+        if car_id in self._slots:
+            raise ValueError(f"Car {car_id} already exists")
+        slot = self._allocate()
+        self._slots[car_id] = slot
+        self.car_ids[slot] = car_id
+        self.owner[slot] = self._owner_id(wallet_address)
+        self.flags[slot] = flags
+        weights = np.asarray(weights, dtype=np.float64)
+        parent_slot = self._slots.get(parent_id) if parent_id is not None else None
+        if parent_slot is not None and np.array_equal(self.weight_rows[self.weight_ref[parent_slot]], weights):
+            ref = self.weight_ref[parent_slot]
+            self._weight_refcount[ref] += 1
+            self.weight_ref[slot] = ref
+        else:
+            self.weight_ref[slot] = self._new_weight_row(weights)
+        self.training_count[slot] = training_count
+        self.created_at[slot] = datetime.utcnow().timestamp() if created_at is None else created_at
+        self.last_trained[slot] = np.nan if last_trained is None else last_trained
+        self.last_speed[slot] = np.nan if last_speed is None else last_speed
+
+        self.by_owner.setdefault(wallet_address, {})[car_id] = None
+        if parent_id is not None and self.parents.get(car_id) != parent_id:
+            self.parents[car_id] = parent_id
+            sibling = self.first_child.get(parent_id)
+            if sibling is not None:
+                self.next_sibling[car_id] = sibling
+            self.first_child[parent_id] = car_id
+        return slot
+
+    def add_record(self, record: Dict) -> Car:
+        return self.add(**record)
+
+    def add_records(self, records: Iterable[Dict]) -> List[Car]:
+        """Bulk add whose speeds are computed in one vectorized pass."""
+        slots = [self._insert(**record) for record in records]
+        self.refresh_speeds(slots)
+        return [Car(self, slot) for slot in slots]
+
+    def record(self, car: Car) -> Dict:
+        """Plain-data form of a car, as accepted by add_record and the repositories."""
+        slot = car._slot
+        last_trained = self.last_trained[slot]
+        last_speed = self.last_speed[slot]
+        return {
+            'car_id': self.car_ids[slot],
+            'wallet_address': self.owner_of(slot),
+            'flags': self.flags[slot].tolist(),
+            'weights': self.weights_of(slot).tolist(),
+            'training_count': int(self.training_count[slot]),
+            'parent_id': self.parents.get(self.car_ids[slot]),
+            'created_at': float(self.created_at[slot]),
+            'last_trained': None if np.isnan(last_trained) else float(last_trained),
+            'last_speed': None if np.isnan(last_speed) else float(last_speed)
+        }
+
+    def columns(self) -> Dict[str, Any]:
+        """Compact copy of every live car in insertion order, plus all lineage edges, for snapshots.
+
+        Only weight rows still referenced are kept and owners are renumbered,
+        so the result holds no free slots.
+        """
+        slots = np.fromiter(self._slots.values(), dtype=np.intp, count=len(self._slots))
+        refs, weight_ref = np.unique(self.weight_ref[slots], return_inverse=True)
+        owner_ids, owner = np.unique(self.owner[slots], return_inverse=True)
+        return {
+            'car_ids': list(self._slots),
+            'owners': [self._owners[owner_id] for owner_id in owner_ids.tolist()],
+            'owner': owner.astype(np.int32),
+            'flags': self.flags[slots],
+            'weight_rows': self.weight_rows[refs],
+            'weight_ref': weight_ref.astype(np.int32),
+            'training_count': self.training_count[slots],
+            'created_at': self.created_at[slots],
+            'last_trained': self.last_trained[slots],
+            'last_speed': self.last_speed[slots],
+            'lineage': list(self.parents.items())
+        }
+
+    def load_columns(self, columns: Dict[str, Any]) -> None:
+        """Bulk load of columns() output into an empty store; speeds are computed in one pass."""
+        if self._high_water:
+            raise ValueError("load_columns needs an empty store")
+        car_ids = columns['car_ids']
+        count = len(car_ids)
+        if count > self.capacity:
+            self._grow(count)
+
+        for name in ('flags', 'training_count', 'created_at', 'last_trained', 'last_speed'):
+            getattr(self, name)[:count] = columns[name]
+        weight_ref = np.asarray(columns['weight_ref'], dtype=np.int32)
+        self.weight_rows = np.array(columns['weight_rows'], dtype=np.float64)
+        self.weight_ref[:count] = weight_ref
+        self._weight_refcount = np.bincount(weight_ref, minlength=len(self.weight_rows)).tolist()
+        self._free_weights = []
+
+        owners = list(columns['owners'])
+        self._owners = owners
+        self._owner_ids = {wallet_address: owner_id for owner_id, wallet_address in enumerate(owners)}
+        self.owner[:count] = columns['owner']
+        self.car_ids[:count] = car_ids
+        self._slots = dict(zip(car_ids, range(count)))
+        self._high_water = count
+        ids = np.array(car_ids, dtype=object)
+
+        def groups(keys: np.ndarray):
+            # (key, car ids in insertion order) for each distinct key, from one stable sort
+            order = np.argsort(keys, kind='stable')
+            for group in np.split(order, np.flatnonzero(np.diff(keys[order])) + 1):
+                if len(group):
+                    yield int(keys[group[0]]), dict.fromkeys(ids[group].tolist())
+
+        owner = np.asarray(columns['owner'])
+        self.by_owner = {owners[owner_id]: garage for owner_id, garage in groups(owner)}
+
+        # Replaying edges in their original order rebuilds the newest-first sibling chains
+        for car_id, parent_id in columns['lineage']:
+            self.parents[car_id] = parent_id
+            sibling = self.first_child.get(parent_id)
+            if sibling is not None:
+                self.next_sibling[car_id] = sibling
+            self.first_child[parent_id] = car_id
+
+        speeds = self.compute_speeds(np.arange(count))
+        self.speed[:count] = speeds
+        self.leaderboard.update_many(car_ids, speeds.tolist())
+        self.speed_buckets = dict(groups((speeds // SPEED_BUCKET_KMH).astype(np.int64)))
+
+    def get(self, car_id: str) -> Optional[Car]:
+        slot = self._slots.get(car_id)
+        return None if slot is None else Car(self, slot)
+
+    def remove(self, car_id: str) -> bool:
+        slot = self._slots.pop(car_id, None)
+        if slot is None:
+            return False
+
+        wallet_address = self.owner_of(slot)
+        garage = self.by_owner.get(wallet_address)
+        if garage is not None:
+            garage.pop(car_id, None)
+            if not garage:
+                del self.by_owner[wallet_address]
+        self._unindex_speed(slot)
+        self.leaderboard.discard(car_id)
+        self._release_weights(slot)
+
+        # Lineage edges stay so ancestry can still be walked through sold cars
+        self.car_ids[slot] = None
+        self.owner[slot] = -1
+        self.speed[slot] = np.nan
+        self._free.append(slot)
+        return True
+
+    def garage(self, wallet_address: str) -> List[Car]:
+        slots = self._slots
+        return [Car(self, slots[car_id]) for car_id in self.by_owner.get(wallet_address, ())]
+
+    def garage_size(self, wallet_address: str) -> int:
+        return len(self.by_owner.get(wallet_address, ()))
+
+    def children_of(self, car_id: str) -> List[str]:
+        """Cars trained from this one, newest first."""
+        children = []
+        child = self.first_child.get(car_id)
+        while child is not None:
+            children.append(child)
+            child = self.next_sibling.get(child)
+        return children
+
+    def descendants(self, car_id: str, limit: int) -> List[Tuple[str, int]]:
+        """(car_id, generation) of everything trained from a car, breadth first."""
+        found = []
+        frontier = [car_id]
+        generation = 0
+        while frontier and len(found) < limit:
+            generation += 1
+            frontier = [child for parent in frontier for child in self.children_of(parent)]
+            found.extend((child, generation) for child in frontier[:limit - len(found)])
+        return found
+
+    def cars_in_speed_bucket(self, bucket: int) -> List[Car]:
+        slots = self._slots
+        return [Car(self, slots[car_id]) for car_id in self.speed_buckets.get(bucket, ())]
+
+    def _unindex_speed(self, slot: int) -> None:
+        speed = self.speed[slot]
+        if np.isnan(speed):
+            return
+        bucket = self.speed_buckets.get(int(speed // SPEED_BUCKET_KMH))
+        if bucket is not None:
+            bucket.pop(self.car_ids[slot], None)
+
+    def refresh_speed(self, slot: int) -> float:
+        self._unindex_speed(slot)
+        # The same einsum kernel as compute_speeds, so a car's speed doesn't depend on which path computed it
+        raw_speed = float(np.einsum('j,j->', self.flags[slot], self.weight_rows[self.weight_ref[slot]]))
+        speed = speed_from_raw(raw_speed)
+        self.speed[slot] = speed
+        bucket = int(self.speed[slot] // SPEED_BUCKET_KMH)
+        self.speed_buckets.setdefault(bucket, {})[self.car_ids[slot]] = None
+        self.leaderboard.update(self.car_ids[slot], speed)
+        return speed
+
+    def compute_speeds(self, slots: Sequence[int]) -> np.ndarray:
+        """Speeds of many slots from their flags and weights in a single array op."""
+        slots = np.asarray(slots, dtype=np.intp)
+        weights = self.weight_rows[self.weight_ref[slots]]
+        raw_speeds = np.einsum('ij,ij->i', self.flags[slots], weights)
+        return speeds_from_raw(raw_speeds)
+
+    def refresh_speeds(self, slots: Optional[Sequence[int]] = None) -> None:
+        if slots is None:
+            slots = list(self._slots.values())
+        if len(slots) == 0:
+            return
+        slots = np.asarray(slots, dtype=np.intp)
+        old_speeds = self.speed[slots]
+        old_buckets = old_speeds // SPEED_BUCKET_KMH
+        speeds = self.compute_speeds(slots)
+        self.speed[slots] = speeds
+        new_buckets = speeds // SPEED_BUCKET_KMH
+
+        # Only cars whose speed (or bucket) changed, or that had none yet, touch the indexes
+        car_ids = self.car_ids
+        changed = np.flatnonzero(old_speeds != speeds)
+        self.leaderboard.update_many([car_ids[slot] for slot in slots[changed].tolist()], speeds[changed].tolist())
+        for i in np.flatnonzero(old_buckets != new_buckets).tolist():
+            car_id = car_ids[slots[i]]
+            if not np.isnan(old_buckets[i]):
+                bucket = self.speed_buckets.get(int(old_buckets[i]))
+                if bucket is not None:
+                    bucket.pop(car_id, None)
+            self.speed_buckets.setdefault(int(new_buckets[i]), {})[car_id] = None
+
+    def speeds(self, car_ids: Iterable[str]) -> Dict[str, float]:
+        """Cached speeds of the given cars; unknown ids are left out."""
+        found = [(car_id, self._slots[car_id]) for car_id in car_ids if car_id in self._slots]
+        if not found:
+            return {}
+        values = self.speed[[slot for _, slot in found]].tolist()
+        return {car_id: value for (car_id, _), value in zip(found, values)}
+
+    def iter_cars(self) -> Iterable[Car]:
+        for slot in self._slots.values():
+            yield Car(self, slot)
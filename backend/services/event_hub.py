@@ -0,0 +1,99 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from config import settings
+
+class Subscriber:
+    """One connected client: a bounded buffer of serialized events."""
+
+    __slots__ = ('wallet_address', 'buffer', 'waiter', 'dropped')
+
+    def __init__(self, wallet_address: str, max_pending: int):
+        self.wallet_address = wallet_address
+        self.buffer: Deque[Tuple[str, str]] = deque(maxlen=max_pending)
+        # Only exists while the reader is parked, unlike an asyncio.Event per subscriber
+        self.waiter: Optional[asyncio.Future] = None
+        self.dropped = 0
+
+class EventHub:
+    """Fans out per-wallet events to push subscribers.
+
+    Publishing serializes an event once and appends it to the buffer of each
+    subscriber of that wallet, so idle subscribers cost nothing per event on
+    other wallets. Buffers are bounded: a consumer that falls behind loses its
+    oldest events and is told how many it missed, so it can refetch instead of
+    holding memory or slowing the publisher down.
+    """
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def wallets(self) -> List[str]:
+        return list(self._subscribers)
+
+    def watching(self, wallet_address: str) -> bool:
+        return wallet_address in self._subscribers
+
+    def subscribe(self, wallet_address: str) -> Subscriber:
+        subscriber = Subscriber(wallet_address, self.max_pending)
+        subscribers = self._subscribers.get(wallet_address)
+        if subscribers is None:
+            subscribers = self._subscribers[wallet_address] = set()
+        subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.wallet_address)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[subscriber.wallet_address]
+
+    def publish(self, wallet_address: str, event_type: str, data: Any) -> int:
+        subscribers = self._subscribers.get(wallet_address)
+        if not subscribers:
+            return 0
+        event = (event_type, json.dumps(data))
+        for subscriber in subscribers:
+            if len(subscriber.buffer) == self.max_pending:
+                subscriber.dropped += 1
+                self.dropped += 1
+            subscriber.buffer.append(event)
+            if subscriber.waiter is not None and not subscriber.waiter.done():
+                subscriber.waiter.set_result(None)
+        self.published += 1
+        self.delivered += len(subscribers)
+        return len(subscribers)
+
+    async def next_events(self, subscriber: Subscriber, timeout: Optional[float] = None) -> Tuple[List[Tuple[str, str]], int]:
+        """Wait for events; returns what is buffered and how many were dropped since the last call."""
+        if not subscriber.buffer:
+            subscriber.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(subscriber.waiter, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                subscriber.waiter = None
+        events = list(subscriber.buffer)
+        subscriber.buffer.clear()
+        dropped, subscriber.dropped = subscriber.dropped, 0
+        return events, dropped
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "wallets": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
+
+event_hub = EventHub(max_pending=settings.EVENTS_MAX_PENDING)
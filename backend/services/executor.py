@@ -0,0 +1,15 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+from config import settings
+
+blocking_executor = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_POOL_SIZE,
+    thread_name_prefix="xrpl-blocking"
+)
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run CPU-bound xrpl-py work (key derivation, signing) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, partial(func, *args, **kwargs))
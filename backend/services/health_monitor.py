@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from xrpl.asyncio.clients import Client
+from xrpl.models.requests import ServerInfo
+from config import settings
+from .account_cache import AccountCache, account_cache
+from .ledger_stream import LedgerStream, ledger_stream
+from .xrpl_client import xrpl_pool
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """Background snapshot of upstream connectivity and internal queue depths.
+
+    Probes read the last snapshot instead of calling rippled themselves. The
+    ledger stream answers for the upstream while it is live; otherwise a
+    ServerInfo call with its own timeout does. Readiness fails once the
+    snapshot is older than max_staleness or rippled was unreachable.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        cache: AccountCache,
+        stream: Optional[LedgerStream] = None,
+        interval: float = 5.0,
+        max_staleness: float = 15.0,
+        timeout: float = 3.0
+    ):
+        self.client = client
+        self.cache = cache
+        self.stream = stream
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.timeout = timeout
+        self._queues: Dict[str, Callable[[], int]] = {}
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def add_queue(self, name: str, depth: Callable[[], int]) -> None:
+        self._queues[name] = depth
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health refresh failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = {"testnet_connected": False, "ledger": None, "source": None, "error": None}
+        if self.stream is not None and self.stream.live:
+            snapshot.update(testnet_connected=True, ledger=self.stream.ledger_index, source="ledger_stream")
+        else:
+            try:
+                response = await asyncio.wait_for(self.client.request(ServerInfo()), self.timeout)
+                ledger = response.result.get('info', {}).get('validated_ledger', {}).get('seq')
+                snapshot.update(testnet_connected=response.is_successful(), ledger=ledger, source="server_info")
+                self.cache.observe_ledger(ledger)
+                if not response.is_successful():
+                    snapshot["error"] = response.result.get('error', 'server_info failed')
+            except asyncio.TimeoutError:
+                snapshot["error"] = f"server_info timed out after {self.timeout:.0f}s"
+            except Exception as e:
+                snapshot["error"] = str(e)
+
+        snapshot["queues"] = {name: depth() for name, depth in self._queues.items()}
+        snapshot["checked_at"] = datetime.utcnow().isoformat()
+        self._snapshot = snapshot
+        self._checked_at = time.monotonic()
+        return snapshot
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Last snapshot plus its age; `ready` is False when it is stale or rippled was unreachable."""
+        if self._snapshot is None:
+            return {"ready": False, "testnet_connected": False, "error": "No health check has completed yet"}
+        age = time.monotonic() - self._checked_at
+        stale = age > self.max_staleness
+        snapshot = {**self._snapshot, "age_seconds": round(age, 3)}
+        if stale:
+            snapshot["error"] = f"Health snapshot is {age:.0f}s old (limit {self.max_staleness:.0f}s)"
+        snapshot["ready"] = snapshot["testnet_connected"] and not stale
+        return snapshot
+
+health_monitor = HealthMonitor(
+    xrpl_pool,
+    account_cache,
+    ledger_stream,
+    interval=settings.HEALTH_REFRESH_INTERVAL,
+    max_staleness=settings.HEALTH_MAX_STALENESS,
+    timeout=settings.HEALTH_CHECK_TIMEOUT
+)
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import settings
+from .admission import read_body, replay_body
+from .metrics import Counter, metrics
+
+MAX_KEY_LENGTH = 255
+# Only definitive outcomes are replayed. A 429 never ran the handler and a 5xx may
+# have failed before anything was submitted (overload, XRPL unreachable), so a retry
+# with the same key must be free to run the request again
+def _storable(status: int) -> bool:
+    return status < 500 and status != 429
+
+# (route, Idempotency-Key)
+Key = Tuple[str, str]
+# (expires_at, request fingerprint, status, headers, body)
+Stored = Tuple[float, bytes, int, List[Tuple[bytes, bytes]], bytes]
+
+class IdempotencyCache:
+    """Responses to completed requests by route and Idempotency-Key, plus markers for running ones.
+
+    Entries expire `ttl` seconds after the response was stored and the oldest
+    are evicted past `max_entries`. Each keeps a SHA-256 of the request's
+    query string and body, so a key reused for a different request is refused
+    instead of being answered with another request's response. The cache is
+    per process: with several workers a retry must reach the same one.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Key, Stored]" = OrderedDict()
+        self._running: Dict[Key, Tuple[bytes, asyncio.Future]] = {}
+
+    def lookup(self, key: Key) -> Optional[Stored]:
+        stored = self._entries.get(key)
+        if stored is not None and stored[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return stored
+
+    def running(self, key: Key) -> Optional[Tuple[bytes, asyncio.Future]]:
+        return self._running.get(key)
+
+    def begin(self, key: Key, fingerprint: bytes) -> None:
+        self._running[key] = (fingerprint, asyncio.get_running_loop().create_future())
+
+    def finish(self, key: Key, response: Optional[Tuple[int, List[Tuple[bytes, bytes]], bytes]]) -> None:
+        """Store the response (None if there is nothing to store) and wake duplicates waiting on it."""
+        fingerprint, done = self._running.pop(key)
+        if response is not None:
+            self._entries[key] = (time.monotonic() + self.ttl, fingerprint, *response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        done.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {'cached': len(self._entries), 'running': len(self._running)}
+
+class IdempotencyMiddleware:
+    """ASGI middleware honouring an Idempotency-Key header on the given POST routes.
+
+    The first request with a key runs and its 2xx or 4xx response is stored
+    (5xx and 429 are not, and the key is released for a retry). A retry
+    with the same key and request gets that response back, marked with
+    Idempotent-Replayed, without running the handler again. A duplicate
+    arriving while the first is still running waits for it rather than
+    running in parallel. Requests without the header are untouched.
+    """
+
+    def __init__(self, app, cache: IdempotencyCache, paths: Iterable[str] = (), requests: Optional[Counter] = None):
+        self.app = app
+        self.cache = cache
+        self.paths = frozenset(paths)
+        self.requests = requests
+
+    def _count(self, route: str, result: str) -> None:
+        if self.requests is not None:
+            self.requests.inc((route, result))
+
+    async def _respond(self, send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _error(self, send, status: int, detail: str) -> None:
+        body = json.dumps({'detail': detail}).encode()
+        await self._respond(send, status, [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())], body)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] not in self.paths:
+            return await self.app(scope, receive, send)
+        idempotency_key = next((value for name, value in scope['headers'] if name == b'idempotency-key'), None)
+        if idempotency_key is None:
+            return await self.app(scope, receive, send)
+
+        route = scope['path']
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return await self._error(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+        body = await read_body(receive)
+        if body is None:
+            return
+        fingerprint = hashlib.sha256(scope.get('query_string', b'') + b'?' + body).digest()
+        key = (route, idempotency_key.decode('latin-1'))
+
+        waited = False
+        while True:
+            stored = self.cache.lookup(key)
+            if stored is not None:
+                _, stored_fingerprint, status, headers, stored_body = stored
+                if stored_fingerprint != fingerprint:
+                    self._count(route, "conflict")
+                    return await self._error(send, 422, "Idempotency-Key was already used for a different request")
+                self._count(route, "coalesced" if waited else "replayed")
+                return await self._respond(send, status, headers + [(b'idempotent-replayed', b'true')], stored_body)
+
+            running = self.cache.running(key)
+            if running is None:
+                break
+            if running[0] != fingerprint:
+                self._count(route, "conflict")
+                return await self._error(send, 422, "Idempotency-Key is in use by a different request")
+            waited = True
+            # Shielded so a disconnecting duplicate doesn't cancel the marker; if the
+            # first request stored nothing, the loop comes round and runs this one
+            await asyncio.shield(running[1])
+
+        self._count(route, "executed")
+        self.cache.begin(key, fingerprint)
+        start: dict = {}
+        chunks: List[bytes] = []
+
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, replay_body(body, receive), capture)
+            if start and _storable(start['status']):
+                response = (start['status'], list(start.get('headers', [])), b''.join(chunks))
+        finally:
+            self.cache.finish(key, response)
+
+idempotency_requests = metrics.counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key by route and outcome: executed, replayed from the cache, "
+    "coalesced onto a running duplicate, or refused as a conflict",
+    ("route", "result")
+)
+
+idempotency_cache = IdempotencyCache(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL)
+metrics.gauge("idempotency_cache_entries", "Stored responses available for replay", lambda: idempotency_cache.stats()['cached'])
+metrics.gauge("idempotency_running", "Keyed requests currently running", lambda: idempotency_cache.stats()['running'])
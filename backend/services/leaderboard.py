@@ -0,0 +1,209 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+class SortedKeys:
+    """Sorted list of keys stored as bounded sublists.
+
+    Inserts and removals touch one sublist of at most 2 * LOAD keys. A Fenwick
+    tree over the sublist lengths turns rank lookups and positional access into
+    O(log n) without scanning the sublists in front.
+    """
+
+    LOAD = 512
+
+    def __init__(self):
+        self._lists: List[list] = []
+        self._maxes: list = []
+        self._tree: List[int] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    @classmethod
+    def from_sorted(cls, keys: list) -> 'SortedKeys':
+        instance = cls()
+        instance._lists = [keys[i:i + cls.LOAD] for i in range(0, len(keys), cls.LOAD)]
+        instance._maxes = [sublist[-1] for sublist in instance._lists]
+        instance._len = len(keys)
+        instance._rebuild_tree()
+        return instance
+
+    def _rebuild_tree(self) -> None:
+        tree = [len(sublist) for sublist in self._lists]
+        size = len(tree)
+        for k in range(1, size + 1):
+            parent = k + (k & -k)
+            if parent <= size:
+                tree[parent - 1] += tree[k - 1]
+        self._tree = tree
+
+    def _tree_add(self, i: int, delta: int) -> None:
+        tree = self._tree
+        k = i + 1
+        while k <= len(tree):
+            tree[k - 1] += delta
+            k += k & -k
+
+    def _prefix(self, i: int) -> int:
+        # Number of keys in the first i sublists
+        tree = self._tree
+        total = 0
+        while i > 0:
+            total += tree[i - 1]
+            i &= i - 1
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        tree = self._tree
+        pos = 0
+        step = 1 << (len(tree).bit_length() - 1) if tree else 0
+        while step:
+            if pos + step <= len(tree) and tree[pos + step - 1] <= index:
+                pos += step
+                index -= tree[pos - 1]
+            step >>= 1
+        return pos, index
+
+    def add(self, key) -> None:
+        lists, maxes = self._lists, self._maxes
+        self._len += 1
+        if not maxes:
+            lists.append([key])
+            maxes.append(key)
+            self._rebuild_tree()
+            return
+
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            i -= 1
+            lists[i].append(key)
+            maxes[i] = key
+        else:
+            insort(lists[i], key)
+
+        sublist = lists[i]
+        if len(sublist) > 2 * self.LOAD:
+            lists.insert(i + 1, sublist[self.LOAD:])
+            del sublist[self.LOAD:]
+            maxes[i] = sublist[-1]
+            maxes.insert(i + 1, lists[i + 1][-1])
+            self._rebuild_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def remove(self, key) -> None:
+        lists, maxes = self._lists, self._maxes
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            raise KeyError(key)
+        sublist = lists[i]
+        j = bisect_left(sublist, key)
+        if j == len(sublist) or sublist[j] != key:
+            raise KeyError(key)
+
+        del sublist[j]
+        self._len -= 1
+        if len(sublist) < self.LOAD // 4 and len(lists) > 1:
+            # Fold small sublists into a neighbour so their count stays ~ n / LOAD
+            k = i if i + 1 < len(lists) else i - 1
+            lists[k].extend(lists.pop(k + 1))
+            maxes.pop(k + 1)
+            maxes[k] = lists[k][-1]
+            if len(lists[k]) > 2 * self.LOAD:
+                lists.insert(k + 1, lists[k][self.LOAD:])
+                del lists[k][self.LOAD:]
+                maxes[k] = lists[k][-1]
+                maxes.insert(k + 1, lists[k + 1][-1])
+            self._rebuild_tree()
+        elif not sublist:
+            del lists[i]
+            del maxes[i]
+            self._rebuild_tree()
+        else:
+            maxes[i] = sublist[-1]
+            self._tree_add(i, -1)
+
+    def index(self, key) -> int:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            raise KeyError(key)
+        j = bisect_left(self._lists[i], key)
+        if j == len(self._lists[i]) or self._lists[i][j] != key:
+            raise KeyError(key)
+        return self._prefix(i) + j
+
+    def islice(self, start: int, stop: int) -> Iterator:
+        start, stop = max(0, start), min(stop, self._len)
+        if start >= stop:
+            return
+        i, j = self._locate(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = self._lists[i][j:j + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            i, j = i + 1, 0
+
+class Leaderboard:
+    """Cars ranked by speed (fastest first, ties by car_id), updated incrementally."""
+
+    def __init__(self):
+        self._ranking = SortedKeys()
+        self._keys: Dict[str, Tuple[float, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def __contains__(self, car_id: str) -> bool:
+        return car_id in self._keys
+
+    def update(self, car_id: str, speed: float) -> None:
+        key = (-speed, car_id)
+        old = self._keys.get(car_id)
+        if old == key:
+            return
+        if old is not None:
+            self._ranking.remove(old)
+        self._ranking.add(key)
+        self._keys[car_id] = key
+
+    def update_many(self, car_ids: List[str], speeds: List[float]) -> None:
+        # Large batches (bulk loads) re-sort once instead of inserting one by one
+        if len(car_ids) < max(1000, len(self) // 8):
+            for car_id, speed in zip(car_ids, speeds):
+                self.update(car_id, speed)
+            return
+        keys = self._keys
+        for car_id, speed in zip(car_ids, speeds):
+            keys[car_id] = (-speed, car_id)
+        # Presorting by speed in NumPy leaves the tuple sort only ties to fix, which timsort does in near-linear time
+        ranked = list(keys.values())
+        order = np.argsort(np.fromiter((key[0] for key in ranked), dtype=np.float64, count=len(ranked)), kind='stable')
+        ranked = [ranked[i] for i in order.tolist()]
+        ranked.sort()
+        self._ranking = SortedKeys.from_sorted(ranked)
+
+    def discard(self, car_id: str) -> None:
+        old = self._keys.pop(car_id, None)
+        if old is not None:
+            self._ranking.remove(old)
+
+    def rank(self, car_id: str) -> Optional[int]:
+        key = self._keys.get(car_id)
+        return None if key is None else self._ranking.index(key) + 1
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, str, float]]:
+        """(rank, car_id, speed) for ranks offset + 1 .. offset + limit."""
+        return [
+            (offset + i + 1, car_id, -neg_speed)
+            for i, (neg_speed, car_id) in enumerate(self._ranking.islice(offset, offset + limit))
+        ]
+
+    def around(self, car_id: str, radius: int) -> List[Tuple[int, str, float]]:
+        rank = self.rank(car_id)
+        if rank is None:
+            return []
+        offset = max(0, rank - 1 - radius)
+        return self.page(offset, rank + radius - offset)
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from xrpl.asyncio.clients import AsyncWebsocketClient, Client
+from xrpl.models.requests import Ledger, Subscribe
+from xrpl.utils import drops_to_xrp
+from config import settings
+from .account_cache import AccountCache, account_cache
+from .event_hub import EventHub, event_hub
+from .xrpl_client import xrpl_pool
+
+logger = logging.getLogger(__name__)
+
+# Position of a transaction in ledger history; a baseline read at ledger L sorts after all of L
+Position = Tuple[int, int]
+END_OF_LEDGER = 1 << 32
+
+class AccountState:
+    """What the stream knows about one account, valid from its baseline position onwards."""
+
+    __slots__ = ('account_data', 'balance_at', 'touched_at', 'watched_from')
+
+    def __init__(self):
+        self.account_data: Optional[Dict[str, Any]] = None
+        self.balance_at: Position = (0, 0)
+        self.touched_at: Position = (0, 0)
+        self.watched_from: Optional[int] = None
+
+class LedgerStream:
+    """One websocket subscription to rippled's `ledger` and `transactions` streams.
+
+    Accounts are tracked once a JSON-RPC answer for them has been seeded with
+    track_account / watch_history; every validated transaction after that
+    baseline is applied in memory, so balances, whether an account has new
+    transactions and the validated ledger index can be answered without a
+    round trip while the stream is live. Ledgers missed while disconnected are backfilled over
+    JSON-RPC; a gap longer than backfill_limit drops the tracked accounts,
+    which then re-seed from their next RPC answer.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        client: Client,
+        hub: EventHub,
+        cache: AccountCache,
+        max_accounts: int = 10000,
+        backfill_limit: int = 256,
+        idle_timeout: float = 30.0,
+        max_backoff: float = 30.0
+    ):
+        self.url = url
+        self.client = client
+        self.hub = hub
+        self.cache = cache
+        self.max_accounts = max_accounts
+        self.backfill_limit = backfill_limit
+        self.idle_timeout = idle_timeout
+        self.max_backoff = max_backoff
+        self.accounts: "OrderedDict[str, AccountState]" = OrderedDict()
+        self.applied: Position = (0, 0)
+        self.ledger_index = 0
+        self.synced_from = 0
+        self.synced = False
+        self.last_ledger_at = 0.0
+        self.reconnects = 0
+        self.backfilled = 0
+        self.resets = 0
+        self.local_hits = 0
+        self._ws: Optional[AsyncWebsocketClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def live(self) -> bool:
+        return (
+            self.synced
+            and self._ws is not None
+            and self._ws.is_open()
+            and time.monotonic() - self.last_ledger_at < self.idle_timeout
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                async with AsyncWebsocketClient(self.url) as ws:
+                    response = await ws.request(Subscribe(streams=["ledger", "transactions"]))
+                    self._ws = ws
+                    await self._on_ledger(response.result.get('ledger_index'), subscribed=True)
+                    logger.info(f"Ledger stream connected: {self.url} (ledger {self.ledger_index})")
+                    backoff = 1.0
+                    async for message in self._receive(ws):
+                        await self._handle(message)
+            except asyncio.CancelledError:
+                raise
+            except (Exception, StopAsyncIteration) as e:
+                logger.warning(f"Ledger stream disconnected: {type(e).__name__} {str(e)}")
+            finally:
+                self._ws = None
+                self.synced = False
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _receive(self, ws: AsyncWebsocketClient) -> AsyncIterator[Dict[str, Any]]:
+        # xrpl-py's iterator waits on its queue forever once the server closes the
+        # socket, so wait in slices and check the connection in between
+        messages = ws.__aiter__()
+        receive = asyncio.ensure_future(anext(messages))
+        received_at = time.monotonic()
+        try:
+            while True:
+                done, _ = await asyncio.wait({receive}, timeout=min(1.0, self.idle_timeout))
+                if done:
+                    yield receive.result()
+                    receive = asyncio.ensure_future(anext(messages))
+                    received_at = time.monotonic()
+                elif not ws.is_open():
+                    raise ConnectionError("closed by server")
+                elif time.monotonic() - received_at > self.idle_timeout:
+                    raise TimeoutError(f"no message for {self.idle_timeout:.0f}s")
+        finally:
+            receive.cancel()
+
+    async def _handle(self, message: Dict[str, Any]) -> None:
+        message_type = message.get('type')
+        if message_type == 'ledgerClosed':
+            await self._on_ledger(message.get('ledger_index'))
+        elif message_type == 'transaction' and message.get('validated'):
+            self._apply(message.get('transaction', {}), message.get('meta', {}), message.get('ledger_index'))
+
+    async def _on_ledger(self, ledger_index: Optional[int], subscribed: bool = False) -> None:
+        if not ledger_index:
+            return
+        if subscribed:
+            # Transactions of the ledger current at subscribe time were published before we listened
+            first, last = self.ledger_index, ledger_index
+        else:
+            first, last = self.ledger_index + 1, ledger_index - 1
+        if self.ledger_index and first <= last:
+            if last - first + 1 > self.backfill_limit or not await self._backfill(first, last):
+                self._reset(ledger_index)
+        elif not self.ledger_index:
+            self.synced_from = ledger_index + 1
+        self.ledger_index = max(self.ledger_index, ledger_index)
+        self.last_ledger_at = time.monotonic()
+        self.synced = True
+        self.cache.observe_ledger(self.ledger_index)
+
+    async def _backfill(self, first: int, last: int) -> bool:
+        try:
+            for ledger_index in range(first, last + 1):
+                response = await self.client.request(Ledger(ledger_index=ledger_index, transactions=True, expand=True))
+                if not response.is_successful():
+                    raise RuntimeError(response.result.get('error', 'ledger request failed'))
+                transactions = response.result.get('ledger', {}).get('transactions', [])
+                for tx in sorted(transactions, key=lambda tx: tx.get('metaData', {}).get('TransactionIndex', 0)):
+                    meta = tx.get('metaData', {})
+                    self._apply({k: v for k, v in tx.items() if k != 'metaData'}, meta, ledger_index)
+                self.backfilled += 1
+            return True
+        except Exception as e:
+            logger.warning(f"Ledger stream backfill of {first}-{last} failed: {str(e)}")
+            return False
+
+    def _reset(self, ledger_index: int) -> None:
+        logger.warning(f"Ledger stream gap before {ledger_index}; dropping {len(self.accounts)} tracked accounts")
+        self.accounts.clear()
+        self.synced_from = ledger_index + 1
+        self.resets += 1
+
+    def _apply(self, transaction: Dict[str, Any], meta: Dict[str, Any], ledger_index: Optional[int]) -> None:
+        position = (ledger_index or 0, meta.get('TransactionIndex', 0))
+        if position <= self.applied:
+            # Already seen before a reconnect re-read this ledger
+            return
+        self.applied = position
+        touched = {transaction.get('Account'), transaction.get('Destination')}
+        for affected in meta.get('AffectedNodes', []):
+            kind, node = next(iter(affected.items()))
+            fields = node.get('FinalFields') or node.get('NewFields') or {}
+            touched.add(fields.get('Account'))
+            for side in ('HighLimit', 'LowLimit'):
+                touched.add(fields.get(side, {}).get('issuer'))
+            if node.get('LedgerEntryType') == 'AccountRoot':
+                self._apply_account_root(kind, node, fields, position, transaction.get('hash'))
+
+        for address in touched:
+            state = self.accounts.get(address)
+            if state is not None:
+                state.touched_at = position
+
+    def _apply_account_root(self, kind: str, node: Dict[str, Any], fields: Dict[str, Any], position: Position, tx_hash: Optional[str]) -> None:
+        address = fields.get('Account')
+        state = self.accounts.get(address)
+        if state is not None and state.account_data is not None and position > state.balance_at:
+            state.account_data = None if kind == 'DeletedNode' else {**state.account_data, **fields}
+            state.balance_at = position
+
+        balance = fields.get('Balance')
+        if balance is not None and self.hub.watching(address):
+            previous = node.get('PreviousFields', {}).get('Balance')
+            self.cache.invalidate(address)
+            self.hub.publish(address, "balance", {
+                'address': address,
+                'balance_xrp': float(drops_to_xrp(balance)),
+                'balance_drops': balance,
+                'delta_drops': int(balance) - int(previous) if previous is not None else None,
+                'ledger_index': position[0],
+                'tx_hash': tx_hash
+            })
+
+    def _state(self, address: str, create: bool = False) -> Optional[AccountState]:
+        state = self.accounts.get(address)
+        if state is None and create:
+            state = self.accounts[address] = AccountState()
+            while len(self.accounts) > self.max_accounts:
+                self.accounts.popitem(last=False)
+        if state is not None:
+            self.accounts.move_to_end(address)
+        return state
+
+    def _baseline_ok(self, ledger_index: Optional[int]) -> bool:
+        # An answer older than the stream's newest ledger may miss transactions we already skipped
+        return self.live and bool(ledger_index) and ledger_index >= self.ledger_index
+
+    def track_account(self, address: str, result: Dict[str, Any]) -> None:
+        """Seed an account's balance from a validated account_info result."""
+        ledger_index = result.get('ledger_index')
+        if 'account_data' not in result or not self._baseline_ok(ledger_index):
+            return
+        state = self._state(address, create=True)
+        if (ledger_index, END_OF_LEDGER) > state.balance_at:
+            state.account_data = dict(result['account_data'])
+            state.balance_at = (ledger_index, END_OF_LEDGER)
+
+    def watch_history(self, address: str, ledger_index: Optional[int]) -> None:
+        """Record which transactions touch an account whose history is known up to ledger_index."""
+        if not self._baseline_ok(ledger_index):
+            return
+        state = self._state(address, create=True)
+        if state.watched_from is None or not self._valid((state.watched_from, 0)):
+            state.watched_from = ledger_index
+
+    def _valid(self, baseline: Position) -> bool:
+        return self.live and baseline[0] + 1 >= self.synced_from
+
+    def account_data(self, address: str) -> Optional[Dict[str, Any]]:
+        state = self._state(address)
+        if state is None or state.account_data is None or not self._valid(state.balance_at):
+            return None
+        self.local_hits += 1
+        return state.account_data
+
+    def changed_since(self, address: str, ledger_index: int) -> Optional[bool]:
+        """Whether a validated transaction touched the account after ledger_index; None if unknown."""
+        state = self._state(address)
+        if state is None or state.watched_from is None or ledger_index < state.watched_from:
+            return None
+        if not self._valid((state.watched_from, 0)):
+            return None
+        self.local_hits += 1
+        return state.touched_at[0] > ledger_index
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'live': self.live,
+            'ledger_index': self.ledger_index,
+            'tracked_accounts': len(self.accounts),
+            'local_hits': self.local_hits,
+            'reconnects': self.reconnects,
+            'backfilled_ledgers': self.backfilled,
+            'resets': self.resets
+        }
+
+ledger_stream = LedgerStream(
+    settings.TESTNET_WSS,
+    xrpl_pool,
+    event_hub,
+    account_cache,
+    max_accounts=settings.LEDGER_STREAM_MAX_ACCOUNTS,
+    backfill_limit=settings.LEDGER_STREAM_BACKFILL_LIMIT,
+    idle_timeout=settings.LEDGER_STREAM_IDLE_TIMEOUT,
+    max_backoff=settings.LEDGER_STREAM_MAX_BACKOFF
+)
@@ -0,0 +1,352 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import numpy as np
+from config import settings
+from .racing_service import RacingService, racing_service
+
+logger = logging.getLogger(__name__)
+
+FINAL_ENTRY_STATUSES = {"complete", "cancelled"}
+ENTRY_FEE_XRP = 1.0
+
+class Lobby:
+    """Cars waiting to race each other within one speed tier."""
+
+    __slots__ = ('lobby_id', 'tier', 'opened_at', 'deadline', 'entries')
+
+    def __init__(self, tier: int, opened_at: float, deadline: float):
+        self.lobby_id = f"LOBBY-{uuid.uuid4().hex[:12]}"
+        self.tier = tier
+        self.opened_at = opened_at
+        self.deadline = deadline
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+class RaceMatchmaker:
+    """Groups queued cars into lobbies by speed tier and races them together.
+
+    Each tier has at most one open lobby. A car joins the open lobby of its own
+    tier or, failing that, the nearest open tier within `tier_spread`, found by
+    bisecting the sorted open tiers. A lobby races as soon as it is full; lobby
+    deadlines sit in a heap so the background loop only wakes for the next
+    expiry, when expired lobbies are topped up with AI cars and all of them are
+    raced in one array computation. The entry fee is taken on joining and
+    refunded whenever an entry ends without racing: left the queue, car sold
+    while queued, or the race failed.
+    """
+
+    def __init__(
+        self,
+        service: RacingService,
+        lobby_size: int = 8,
+        max_wait: float = 10.0,
+        tier_kmh: float = 20.0,
+        tier_spread: int = 1,
+        max_entries: int = 10000
+    ):
+        self.service = service
+        self.lobby_size = lobby_size
+        self.max_wait = max_wait
+        self.tier_kmh = tier_kmh
+        self.tier_spread = tier_spread
+        self.max_entries = max_entries
+
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Finished entry ids in the order they finished, the only ones _evict may drop
+        self._finished: Deque[str] = deque()
+        self._done: Dict[str, asyncio.Event] = {}
+        self._queued_cars: Dict[str, str] = {}
+        self._open: Dict[int, Lobby] = {}
+        self._open_tiers: List[int] = []
+        self._deadlines: List[Tuple[float, str, Lobby]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._fill_latency: Deque[float] = deque(maxlen=1000)
+        self._wait_latency: Deque[float] = deque(maxlen=1000)
+        self.races_run = 0
+        self.full_lobbies = 0
+        self.expired_lobbies = 0
+        self.ai_seats = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._queued_cars)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _tier_of(self, speed: float) -> int:
+        return int(speed // self.tier_kmh)
+
+    def _find_lobby(self, tier: int) -> Optional[Lobby]:
+        lobby = self._open.get(tier)
+        if lobby is not None or not self._open_tiers:
+            return lobby
+        i = bisect.bisect_left(self._open_tiers, tier)
+        candidates = self._open_tiers[max(0, i - 1):i + 1]
+        nearest = min(candidates, key=lambda t: abs(t - tier))
+        if abs(nearest - tier) <= self.tier_spread:
+            return self._open[nearest]
+        return None
+
+    def _open_lobby(self, tier: int, now: float) -> Lobby:
+        lobby = Lobby(tier, now, now + self.max_wait)
+        self._open[tier] = lobby
+        bisect.insort(self._open_tiers, tier)
+        heapq.heappush(self._deadlines, (lobby.deadline, lobby.lobby_id, lobby))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return lobby
+
+    def _close_lobby(self, lobby: Lobby) -> None:
+        if self._open.get(lobby.tier) is lobby:
+            del self._open[lobby.tier]
+            self._open_tiers.pop(bisect.bisect_left(self._open_tiers, lobby.tier))
+
+    def enqueue(self, car_id: str, wallet_address: str, wallet_seed: str) -> Tuple[bool, Optional[Dict[str, Any]], str]:
+        car = self.service.get_car(car_id)
+        if not car:
+            return False, None, "Car not found"
+        if car.wallet_address != wallet_address:
+            return False, None, "You don't own this car"
+        if car_id in self._queued_cars:
+            return False, None, "Car is already queued"
+
+        payment_success, payment_result = self.service._process_payment(wallet_seed, ENTRY_FEE_XRP)
+        if not payment_success:
+            return False, None, f"Payment failed: {payment_result}"
+
+        self.start()
+        now = time.monotonic()
+        tier = self._tier_of(car.speed)
+        lobby = self._find_lobby(tier) or self._open_lobby(tier, now)
+
+        entry_id = f"ENTRY-{uuid.uuid4().hex[:16]}"
+        entry = {
+            "entry_id": entry_id,
+            "status": "queued",
+            "car_id": car_id,
+            "wallet_address": wallet_address,
+            "lobby_id": lobby.lobby_id,
+            "tier": lobby.tier,
+            "payment_tx": payment_result,
+            "refund_tx": None,
+            "queued_at": datetime.utcnow().isoformat(),
+            "completed_at": None,
+            "race": None,
+            "standings": None,
+            "error": None,
+            "_enqueued": now
+        }
+        self.entries[entry_id] = entry
+        self._done[entry_id] = asyncio.Event()
+        self._queued_cars[car_id] = entry_id
+        lobby.entries[entry_id] = entry
+        self._evict()
+
+        if len(lobby.entries) >= self.lobby_size:
+            self.full_lobbies += 1
+            self._close_lobby(lobby)
+            self._race_or_refund([lobby])
+        return True, entry, f"Queued in {lobby.lobby_id} ({len(lobby.entries)}/{self.lobby_size})"
+
+    def cancel(self, entry_id: str, wallet_address: str) -> Tuple[bool, str]:
+        entry = self.entries.get(entry_id)
+        if entry is None:
+            return False, "Entry not found"
+        if entry["wallet_address"] != wallet_address:
+            return False, "You don't own this entry"
+        if entry["status"] != "queued":
+            return False, f"Entry is already {entry['status']}"
+
+        lobby = self._open.get(entry["tier"])
+        if lobby is not None and lobby.lobby_id == entry["lobby_id"]:
+            lobby.entries.pop(entry_id, None)
+        self._cancel(entry, "Left the queue")
+        return True, "Left the queue"
+
+    def _cancel(self, entry: Dict[str, Any], reason: str) -> None:
+        """Finish an entry that never raced and give its entry fee back."""
+        refund_success, refund_result = self.service._process_refund(entry["wallet_address"], ENTRY_FEE_XRP)
+        if refund_success:
+            entry["refund_tx"] = refund_result
+        else:
+            logger.error(f"Refunding {entry['entry_id']} failed: {refund_result}")
+            reason = f"{reason}; refund failed: {refund_result}"
+        self._finish(entry, "cancelled", error=reason)
+
+    def _evict(self) -> None:
+        # Drop the oldest finished entries first; queued entries are never evicted
+        while len(self.entries) > self.max_entries and self._finished:
+            entry_id = self._finished.popleft()
+            self.entries.pop(entry_id, None)
+            self._done.pop(entry_id, None)
+
+    def _finish(self, entry: Dict[str, Any], status: str, **fields) -> None:
+        if entry["status"] not in FINAL_ENTRY_STATUSES:
+            self._finished.append(entry["entry_id"])
+        entry.update(status=status, completed_at=datetime.utcnow().isoformat(), **fields)
+        self._queued_cars.pop(entry["car_id"], None)
+        event = self._done.get(entry["entry_id"])
+        if event is not None:
+            event.set()
+
+    def _race(self, lobbies: List[Lobby]) -> None:
+        """Run every lobby's race in one batched computation and publish the results."""
+        now = time.monotonic()
+        store = self.service.store
+        size = self.lobby_size
+
+        # Entrants whose car was sold while queued give their seat to an AI car
+        seats: List[List[Dict[str, Any]]] = []
+        for lobby in lobbies:
+            entrants = []
+            for entry in lobby.entries.values():
+                if entry["car_id"] in store:
+                    entrants.append(entry)
+                else:
+                    self._cancel(entry, "Car is no longer available")
+            seats.append(entrants[:size])
+
+        # AI cars are drawn from each lobby's own tier, human seats use cached speeds
+        low = np.array([lobby.tier * self.tier_kmh for lobby in lobbies])[:, None]
+        speeds = self.service.rng.uniform(low, low + self.tier_kmh, (len(lobbies), size))
+        is_human = np.zeros((len(lobbies), size), dtype=bool)
+        for row, entrants in enumerate(seats):
+            if entrants:
+                car_speeds = store.speeds(entry["car_id"] for entry in entrants)
+                speeds[row, :len(entrants)] = [car_speeds[entry["car_id"]] for entry in entrants]
+                is_human[row, :len(entrants)] = True
+
+        order = np.argsort(-speeds, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        ranks[np.arange(len(lobbies))[:, None], order] = np.arange(1, size + 1)
+
+        timestamp = datetime.utcnow().isoformat()
+        for row, (lobby, entrants) in enumerate(zip(lobbies, seats)):
+            race_id = f"RACE-{lobby.lobby_id[6:]}"
+            racer_ids = [entry["car_id"] for entry in entrants]
+            racer_ids += [f"AI-{i + 1}" for i in range(size - len(entrants))]
+            standings = [
+                {
+                    "rank": int(ranks[row, seat]),
+                    "car_id": racer_ids[seat],
+                    "speed": float(speeds[row, seat]),
+                    "is_ai": not is_human[row, seat]
+                }
+                for seat in order[row].tolist()
+            ]
+            winner_id = standings[0]["car_id"]
+
+            for seat, entry in enumerate(entrants):
+                race_result = {
+                    'race_id': race_id,
+                    'car_id': entry["car_id"],
+                    'wallet_address': entry["wallet_address"],
+                    'your_rank': int(ranks[row, seat]),
+                    'winner_car_id': winner_id,
+                    'total_participants': size,
+                    'prize_awarded': winner_id == entry["car_id"],
+                    'timestamp': timestamp,
+                    'payment_tx': entry["payment_tx"]
+                }
+                car = store.get(entry["car_id"])
+                car.last_speed = float(speeds[row, seat])
+                self.service.repository.update_speed(entry["car_id"], car.last_speed)
+                self.service.record_race(race_result)
+                self._wait_latency.append(now - entry["_enqueued"])
+                self._finish(entry, "complete", race=race_result, standings=standings)
+
+            self.ai_seats += size - len(entrants)
+            self._fill_latency.append(now - lobby.opened_at)
+            self.races_run += 1
+
+    def _race_or_refund(self, lobbies: List[Lobby]) -> None:
+        try:
+            self._race(lobbies)
+        except Exception as e:
+            logger.error(f"Racing {len(lobbies)} lobbies failed: {e}")
+            for lobby in lobbies:
+                for entry in lobby.entries.values():
+                    if entry["status"] == "queued":
+                        self._cancel(entry, f"Race failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            expired = []
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, _, lobby = heapq.heappop(self._deadlines)
+                # Lobbies that filled up already raced and left the open set
+                if self._open.get(lobby.tier) is lobby:
+                    self._close_lobby(lobby)
+                    if lobby.entries:
+                        expired.append(lobby)
+            if expired:
+                self.expired_lobbies += len(expired)
+                self._race_or_refund(expired)
+
+            timeout = self._deadlines[0][0] - time.monotonic() if self._deadlines else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(entry_id)
+
+    async def wait(self, entry_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        event = self._done.get(entry_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.entries.get(entry_id)
+
+    def stats(self) -> Dict[str, Any]:
+        def percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+            if not samples:
+                return {"p50": None, "p95": None, "max": None}
+            values = np.array(samples) * 1000
+            return {
+                "p50": round(float(np.percentile(values, 50)), 1),
+                "p95": round(float(np.percentile(values, 95)), 1),
+                "max": round(float(values.max()), 1)
+            }
+
+        return {
+            "queued": self.queued,
+            "open_lobbies": len(self._open),
+            "races_run": self.races_run,
+            "full_lobbies": self.full_lobbies,
+            "expired_lobbies": self.expired_lobbies,
+            "ai_seats": self.ai_seats,
+            "lobby_fill_ms": percentiles(self._fill_latency),
+            "entry_wait_ms": percentiles(self._wait_latency)
+        }
+
+race_matchmaker = RaceMatchmaker(
+    racing_service,
+    lobby_size=settings.MATCHMAKING_LOBBY_SIZE,
+    max_wait=settings.MATCHMAKING_MAX_WAIT,
+    tier_kmh=settings.MATCHMAKING_TIER_KMH,
+    tier_spread=settings.MATCHMAKING_TIER_SPREAD,
+    max_entries=settings.MATCHMAKING_ENTRY_HISTORY
+)
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, Optional
+from xrpl.asyncio.clients import Client
+from xrpl.asyncio.ledger import get_latest_validated_ledger_sequence
+from xrpl.models.requests import Tx
+from config import settings
+from .account_cache import AccountCache, account_cache
+from .ledger_stream import LedgerStream, ledger_stream
+from .xrpl_client import xrpl_pool
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = {"validated", "failed", "expired", "unknown"}
+
+class PaymentJobTracker:
+    """Follows submitted payments to a final ledger outcome in the background.
+
+    One shared poller watches for newly validated ledgers, reading the ledger
+    stream when it is live and asking rippled every `poll_interval` seconds
+    otherwise, and only while jobs are pending. Each job looks its
+    transaction up once per new validated ledger, so N pending jobs cost one
+    ledger poll per interval plus N lookups per ledger close.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        cache: AccountCache,
+        poll_interval: float = 1.0,
+        timeout: float = 120.0,
+        max_jobs: int = 10000,
+        stream: Optional[LedgerStream] = None
+    ):
+        self.client = client
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.stream = stream
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Finished job ids in the order they finished, the only ones _evict may drop
+        self._finished: Deque[str] = deque()
+        self._done: Dict[str, asyncio.Event] = {}
+        self._tasks: set = set()
+        self.ledger_index = 0
+        # Replaced on every new validated ledger, waking every job waiting on the old one
+        self._ledger_closed = asyncio.Event()
+        self._poller: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def _new_job(self, transaction_hash: str, engine_result: str) -> Dict[str, Any]:
+        job_id = f"JOB-{uuid.uuid4().hex[:16]}"
+        job = {
+            "job_id": job_id,
+            "status": "submitted",
+            "transaction_hash": transaction_hash,
+            "engine_result": engine_result,
+            "result": None,
+            "validated": False,
+            "fee": None,
+            "ledger_index": None,
+            "submitted_at": datetime.utcnow().isoformat(),
+            "completed_at": None,
+            "error": None
+        }
+        self.jobs[job_id] = job
+        self._done[job_id] = asyncio.Event()
+        self._evict()
+        return job
+
+    def track(
+        self,
+        transaction_hash: str,
+        engine_result: str,
+        last_ledger_sequence: int,
+        addresses: Iterable[str]
+    ) -> Dict[str, Any]:
+        job = self._new_job(transaction_hash, engine_result)
+        task = asyncio.create_task(self._follow(job, last_ledger_sequence, tuple(addresses)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_ledgers())
+        return job
+
+    def reject(self, transaction_hash: str, engine_result: str, message: str) -> Dict[str, Any]:
+        job = self._new_job(transaction_hash, engine_result)
+        self._finish(job, "failed", (), result=engine_result, error=message)
+        return job
+
+    def _evict(self) -> None:
+        # Drop the oldest finished jobs first; in-flight jobs are never evicted
+        while len(self.jobs) > self.max_jobs and self._finished:
+            job_id = self._finished.popleft()
+            self.jobs.pop(job_id, None)
+            self._done.pop(job_id, None)
+
+    def _finish(self, job: Dict[str, Any], status: str, addresses: tuple, **fields) -> None:
+        if job["status"] not in FINAL_STATUSES:
+            self._finished.append(job["job_id"])
+        job.update(status=status, completed_at=datetime.utcnow().isoformat(), **fields)
+        self.cache.invalidate(*addresses)
+        event = self._done.get(job["job_id"])
+        if event is not None:
+            event.set()
+
+    async def _poll_ledgers(self) -> None:
+        while self._tasks:
+            try:
+                if self.stream is not None and self.stream.live:
+                    ledger_index = self.stream.ledger_index
+                else:
+                    ledger_index = await get_latest_validated_ledger_sequence(self.client)
+            except Exception as e:
+                logger.warning(f"Polling the validated ledger failed, retrying: {e}")
+            else:
+                if ledger_index > self.ledger_index:
+                    self.ledger_index = ledger_index
+                    self._ledger_closed.set()
+                    self._ledger_closed = asyncio.Event()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _next_ledger(self, seen: int, deadline: float) -> Optional[int]:
+        """First validated ledger after `seen`, or None if none closes before the deadline."""
+        while self.ledger_index <= seen:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._ledger_closed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return self.ledger_index
+
+    async def _follow(self, job: Dict[str, Any], last_ledger_sequence: int, addresses: tuple) -> None:
+        deadline = time.monotonic() + self.timeout
+        # The ledger already validated at submission can't hold the transaction
+        current_ledger = self.ledger_index
+        while True:
+            current_ledger = await self._next_ledger(current_ledger, deadline)
+            if current_ledger is None:
+                break
+            try:
+                # The ledger was read before the transaction: if the tx is still missing
+                # once that ledger passed LastLedgerSequence, it can never validate.
+                response = await self.client.request(Tx(transaction=job["transaction_hash"]))
+            except Exception as e:
+                logger.warning(f"Tracking {job['job_id']} failed, retrying: {e}")
+                continue
+
+            result = response.result
+            if response.is_successful() and result.get("validated"):
+                tx_result = result.get("meta", {}).get("TransactionResult")
+                self._finish(
+                    job,
+                    "validated" if tx_result == "tesSUCCESS" else "failed",
+                    addresses,
+                    result=tx_result,
+                    validated=True,
+                    fee=result.get("Fee"),
+                    ledger_index=result.get("ledger_index")
+                )
+                self.cache.observe_ledger(result.get("ledger_index"))
+                return
+            if not response.is_successful() and result.get("error") != "txnNotFound":
+                self._finish(job, "failed", addresses, error=result.get("error_message") or result.get("error"))
+                return
+            if current_ledger >= last_ledger_sequence:
+                self._finish(job, "expired", addresses, error=f"Not validated by LastLedgerSequence {last_ledger_sequence}")
+                return
+
+        self._finish(job, "unknown", addresses, error=f"No final outcome after {self.timeout:.0f}s")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        event = self._done.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.jobs.get(job_id)
+
+    async def close(self) -> None:
+        tasks = list(self._tasks)
+        if self._poller is not None:
+            tasks.append(self._poller)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+payment_jobs = PaymentJobTracker(
+    xrpl_pool,
+    account_cache,
+    poll_interval=settings.PAYMENT_POLL_INTERVAL,
+    timeout=settings.PAYMENT_JOB_TIMEOUT,
+    max_jobs=settings.PAYMENT_JOB_HISTORY,
+    stream=ledger_stream
+)
@@ -1,63 +1,271 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
-from xrpl.wallet import Wallet
-from xrpl.models.transactions import Payment
-from xrpl.transaction import submit_and_wait
+from xrpl.asyncio.account import get_next_valid_seq_number
+from xrpl.asyncio.clients import Client
+from xrpl.asyncio.ledger import get_fee, get_latest_validated_ledger_sequence
+from xrpl.asyncio.transaction import autofill, submit, XRPLReliableSubmissionException
+from xrpl.models.transactions import Payment, Transaction
 from xrpl.utils import xrp_to_drops
-from typing import Dict, Any
-from config import settings
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from .account_cache import AccountCache
+from .payment_jobs import PaymentJobTracker
+from .signing import TransactionSigner, transaction_signer
+from .transaction_history import Position, TransactionHistory
+
+# Results after which the transaction did not consume its sequence number
+RESEQUENCE_RESULTS = ('tefPAST_SEQ', 'terPRE_SEQ')
+RETRY_PREFIXES = ('tel', 'ter')
+REJECT_PREFIXES = ('tem', 'tef')
+# A single submission has no later payments to retry, so local tel errors are final too
+FINAL_REJECT_PREFIXES = REJECT_PREFIXES + ('tel',)
+
+class AccountSequences:
+    """Hands out Sequence numbers locally so one sender can sign many payments up front."""
+    
+    def __init__(self, client: Client):
+        self.client = client
+        self._next: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def lock(self, address: str) -> asyncio.Lock:
+        return self._locks.setdefault(address, asyncio.Lock())
+    
+    async def reserve(self, address: str, count: int) -> int:
+        if address not in self._next:
+            self._next[address] = await get_next_valid_seq_number(address, self.client)
+        start = self._next[address]
+        self._next[address] = start + count
+        return start
+    
+    def release(self, address: str, sequence: int) -> None:
+        # Hand back everything from `sequence` on, e.g. after a rejected submission
+        if self._next.get(address, 0) > sequence:
+            self._next[address] = sequence
+    
+    def reset(self, address: str) -> None:
+        self._next.pop(address, None)
 
 class PaymentService:
     
-    def __init__(self):
-        self.testnet_url = settings.TESTNET_URL
+    LEDGER_OFFSET = 20
+    MAX_BATCH_ATTEMPTS = 5
     
-    def send_payment(
-        self, 
-        sender_seed: str, 
-        destination: str, 
+    def __init__(
+        self,
+        client: Client,
+        cache: AccountCache,
+        jobs: PaymentJobTracker,
+        history: Optional[TransactionHistory] = None,
+        signer: Optional[TransactionSigner] = None
+    ):
+        self.client = client
+        self.cache = cache
+        self.jobs = jobs
+        self.history = history or TransactionHistory(client, cache)
+        self.signer = signer or transaction_signer
+        self.sequences = AccountSequences(client)
+    
+    async def _prepare_payment(
+        self,
+        sender_seed: str,
+        address: str,
+        destination: str,
         amount: float,
-        memo: str = None
-    ) -> Dict[str, Any]:
-        client = JsonRpcClient(self.testnet_url)
-        sender_wallet = Wallet.from_seed(sender_seed)
+        memo: Optional[str],
+        sequence: int
+    ) -> Transaction:
+        memos = None
+        if memo:
+            memos = [
+                xrpl.models.transactions.Memo(
+                    memo_data=memo.encode('utf-8').hex()
+                )
+            ]
         
         payment_tx = Payment(
-            account=sender_wallet.address,
+            account=address,
             amount=xrp_to_drops(amount),
             destination=destination,
+            memos=memos,
+            sequence=sequence,
         )
         
-        if memo:
-            payment_tx.memos = [
-                xrpl.models.transactions.Memo(
-                    memo_data=memo.encode('utf-8').hex()
-                )
-            ]
+        # Autofill needs the ledger, signing is pure CPU: only the latter goes to the signing pool
+        payment_tx = await autofill(payment_tx, self.client)
+        return await self.signer.sign(payment_tx, sender_seed)
+    
+    async def _submit_single(
+        self,
+        sender_seed: str,
+        destination: str,
+        amount: float,
+        memo: Optional[str]
+    ) -> Tuple[Transaction, Dict[str, Any]]:
+        """Sign and submit one payment with a Sequence from the same allocator as batches."""
+        address, _ = await self.signer.identity(sender_seed)
+        
+        async with self.sequences.lock(address):
+            for _ in range(self.MAX_BATCH_ATTEMPTS):
+                sequence = await self.sequences.reserve(address, 1)
+                try:
+                    signed_tx = await self._prepare_payment(sender_seed, address, destination, amount, memo, sequence)
+                except Exception:
+                    self.sequences.release(address, sequence)
+                    raise
+                try:
+                    response = await submit(signed_tx, self.client)
+                except Exception:
+                    # It may or may not have reached the ledger: refetch the sequence next time
+                    self.sequences.reset(address)
+                    raise
+                finally:
+                    # Even a failed submission may have consumed a sequence number and fee
+                    self.cache.invalidate(address, destination)
+                
+                engine_result = response.result.get('engine_result', '')
+                if engine_result in RESEQUENCE_RESULTS:
+                    # Our view of the account sequence is off: refetch and re-sign
+                    self.sequences.reset(address)
+                    continue
+                if engine_result.startswith(FINAL_REJECT_PREFIXES):
+                    self.sequences.release(address, sequence)
+                break
+        return signed_tx, response.result
+    
+    async def send_payment(
+        self, 
+        sender_seed: str, 
+        destination: str, 
+        amount: float,
+        memo: str = None
+    ) -> Dict[str, Any]:
+        job = await self.submit_payment(sender_seed, destination, amount, memo)
+        job = await self.jobs.wait(job["job_id"])
         
-        response = submit_and_wait(payment_tx, client, sender_wallet)
+        if job["status"] != "validated":
+            raise XRPLReliableSubmissionException(job["error"] or f"Transaction failed: {job['result']}")
         
         result_data = {
             "status": "success",
-            "transaction_hash": response.result.get('hash'),
-            "result": response.result.get('meta', {}).get('TransactionResult'),
-            "validated": response.result.get('validated', False),
+            "transaction_hash": job["transaction_hash"],
+            "result": job["result"],
+            "validated": job["validated"],
         }
         
-        if 'Fee' in response.result:
-            result_data['fee'] = response.result['Fee']
+        if job["fee"] is not None:
+            result_data['fee'] = job["fee"]
         
         return result_data
     
-    def get_transaction_history(self, address: str, limit: int = 10) -> list:
-        client = JsonRpcClient(self.testnet_url)
+    async def submit_payment(
+        self,
+        sender_seed: str,
+        destination: str,
+        amount: float,
+        memo: str = None
+    ) -> Dict[str, Any]:
+        signed_tx, result = await self._submit_single(sender_seed, destination, amount, memo)
         
-        tx_request = xrpl.models.requests.AccountTx(
-            account=address,
-            ledger_index_min=-1,
-            ledger_index_max=-1,
-            limit=limit
+        engine_result = result.get('engine_result', '')
+        if engine_result.startswith('tem'):
+            raise XRPLReliableSubmissionException(
+                f"{engine_result}: {result.get('engine_result_message')}"
+            )
+        if engine_result.startswith(FINAL_REJECT_PREFIXES):
+            # Never applied and never will be: fail the job now instead of waiting out LastLedgerSequence
+            return self.jobs.reject(
+                signed_tx.get_hash(),
+                engine_result,
+                result.get('engine_result_message', engine_result)
+            )
+        
+        return self.jobs.track(
+            signed_tx.get_hash(),
+            engine_result,
+            signed_tx.last_ledger_sequence,
+            (signed_tx.account, destination)
         )
+    
+    async def send_batch(self, sender_seed: str, payments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        address, _ = await self.signer.identity(sender_seed)
+        fee = await get_fee(self.client)
         
-        response = client.request(tx_request)
-        return response.result.get('transactions', [])
+        jobs: List[Optional[Dict[str, Any]]] = [None] * len(payments)
+        pending = list(range(len(payments)))
+        
+        # Only rounds cut short by a sequence mismatch or a retryable result count as
+        # attempts and back off; a rejection just re-signs the rest one sequence down
+        attempts = 0
+        backoff = False
+        while pending and attempts < self.MAX_BATCH_ATTEMPTS:
+            if backoff:
+                await asyncio.sleep(0.5 * attempts)
+            
+            async with self.sequences.lock(address):
+                start = await self.sequences.reserve(address, len(pending))
+                last_ledger = await get_latest_validated_ledger_sequence(self.client) + self.LEDGER_OFFSET
+                unsigned = []
+                for offset, index in enumerate(pending):
+                    payment = payments[index]
+                    memos = None
+                    if payment.get('memo'):
+                        memos = [xrpl.models.transactions.Memo(memo_data=payment['memo'].encode('utf-8').hex())]
+                    unsigned.append(Payment(
+                        account=address,
+                        amount=xrp_to_drops(payment['amount']),
+                        destination=payment['destination'],
+                        memos=memos,
+                        sequence=start + offset,
+                        fee=fee,
+                        last_ledger_sequence=last_ledger,
+                    ))
+                # Only fills network_id when required; every other field is already set
+                unsigned = [await autofill(tx, self.client) for tx in unsigned]
+                signed = await self.signer.sign_many(unsigned, sender_seed)
+                
+                retry = []
+                backoff = False
+                for position, (index, tx) in enumerate(zip(pending, signed)):
+                    response = await submit(tx, self.client)
+                    engine_result = response.result.get('engine_result', '')
+                    
+                    if engine_result in RESEQUENCE_RESULTS:
+                        # Our view of the account sequence is off: refetch and re-sign the rest
+                        self.sequences.reset(address)
+                        retry = pending[position:]
+                        backoff = True
+                        break
+                    if engine_result.startswith(REJECT_PREFIXES):
+                        jobs[index] = self.jobs.reject(
+                            tx.get_hash(),
+                            engine_result,
+                            response.result.get('engine_result_message', engine_result)
+                        )
+                        # Sequence was not consumed, so later payments must shift down
+                        self.sequences.release(address, tx.sequence)
+                        retry = pending[position + 1:]
+                        break
+                    if engine_result.startswith(RETRY_PREFIXES) and engine_result != 'terQUEUED':
+                        self.sequences.release(address, tx.sequence)
+                        retry = pending[position:]
+                        backoff = True
+                        break
+                    
+                    # tesSUCCESS, terQUEUED and tec* all claim the sequence: track to validation
+                    jobs[index] = self.jobs.track(tx.get_hash(), engine_result, last_ledger, (address, tx.destination))
+            
+            pending = retry
+            if backoff:
+                attempts += 1
+        
+        for index in pending:
+            jobs[index] = self.jobs.reject('', 'unsubmitted', f"Gave up after {self.MAX_BATCH_ATTEMPTS} attempts")
+        
+        self.cache.invalidate(address)
+        return jobs
+    
+    async def get_transaction_history(self, address: str, limit: int = 10, before: Optional[Position] = None) -> Tuple[list, Optional[Position]]:
+        return await self.history.page(address, limit, before)
+    
+    def export_transaction_history(self, address: str) -> AsyncIterator[dict]:
+        return self.history.export(address)
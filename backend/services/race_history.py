@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class RaceHistory:
+    """Bounded race log: recent segments in memory, older ones spilled to disk.
+
+    Every race gets a monotonically increasing sequence number, which doubles as
+    the pagination cursor. Only the in-memory segments are indexed by car and
+    wallet, so memory stays constant however long the process races. Spilled
+    segments are JSON Lines files whose first line lists the cars and wallets
+    they contain, letting filtered queries skip segments without parsing them.
+    """
+
+    def __init__(self, segment_size: int = 1024, max_segments: int = 8, spill_dir: Optional[str] = None):
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.spill_dir = spill_dir
+        self._segments: Deque[List[dict]] = deque()
+        self._by_car: Dict[str, Deque[int]] = {}
+        self._by_wallet: Dict[str, Deque[int]] = {}
+        self._first_seq = self._next_seq = self._resume_seq()
+
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+
+    @property
+    def total(self) -> int:
+        return self._next_seq
+
+    def recent(self) -> List[dict]:
+        """Races held in memory, oldest first."""
+        return [race for segment in self._segments for race in segment]
+
+    def _segment_files(self) -> List[Tuple[int, str]]:
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return []
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if name.startswith("segment-") and name.endswith(".jsonl"):
+                files.append((int(name[8:-6]), os.path.join(self.spill_dir, name)))
+        return sorted(files)
+
+    def _resume_seq(self) -> int:
+        # Continue numbering after whatever an earlier process spilled
+        files = self._segment_files()
+        if not files:
+            return 0
+        first_seq, path = files[-1]
+        with open(path) as f:
+            header = json.loads(f.readline())
+        return first_seq + header['count']
+
+    def resume_at(self, seq: int) -> None:
+        """Number the next race `seq`, for restores that skip races this history will never hold."""
+        if seq > self._next_seq and not self._segments:
+            self._first_seq = self._next_seq = seq
+
+    def append(self, race: dict) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        race = {**race, 'seq': seq}
+
+        # Segments cover aligned seq ranges, so a restored history splits like the original
+        if not self._segments or seq % self.segment_size == 0:
+            self._segments.append([])
+        self._segments[-1].append(race)
+        self._by_car.setdefault(race['car_id'], deque()).append(seq)
+        if race.get('wallet_address'):
+            self._by_wallet.setdefault(race['wallet_address'], deque()).append(seq)
+
+        if len(self._segments) > self.max_segments:
+            self._evict()
+        return seq
+
+    def _evict(self) -> None:
+        segment = self._segments.popleft()
+        self._first_seq = segment[-1]['seq'] + 1
+        for index, key in ((self._by_car, 'car_id'), (self._by_wallet, 'wallet_address')):
+            for race in segment:
+                seqs = index.get(race.get(key))
+                if seqs is None:
+                    continue
+                while seqs and seqs[0] < self._first_seq:
+                    seqs.popleft()
+                if not seqs:
+                    del index[race[key]]
+        if self.spill_dir:
+            self._spill(segment)
+
+    def _spill(self, segment: List[dict]) -> None:
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"segment-{segment[0]['seq']:012d}.jsonl")
+            header = {
+                'count': len(segment),
+                'cars': sorted({race['car_id'] for race in segment}),
+                'wallets': sorted({race['wallet_address'] for race in segment if race.get('wallet_address')})
+            }
+            with open(path, 'w') as f:
+                f.write(json.dumps(header) + "\n")
+                f.writelines(json.dumps(race) + "\n" for race in segment)
+        except OSError as e:
+            logger.error(f"Failed to spill race history segment: {e}")
+
+    def _get(self, seq: int) -> dict:
+        # Only the oldest segment may start part-way through its range
+        segment = self._segments[seq // self.segment_size - self._segments[0][0]['seq'] // self.segment_size]
+        return segment[seq - segment[0]['seq']]
+
+    def _iter_memory(self, car_id: Optional[str], wallet_address: Optional[str], before: int) -> Iterator[dict]:
+        if car_id is not None or wallet_address is not None:
+            seqs = self._by_car.get(car_id, ()) if car_id is not None else self._by_wallet.get(wallet_address, ())
+            for seq in reversed(seqs):
+                if seq >= before:
+                    continue
+                race = self._get(seq)
+                if wallet_address is None or race.get('wallet_address') == wallet_address:
+                    yield race
+            return
+        for segment in reversed(self._segments):
+            for race in reversed(segment):
+                if race['seq'] < before:
+                    yield race
+
+    def _iter_disk(self, car_id: Optional[str], wallet_address: Optional[str], before: int) -> Iterator[dict]:
+        for first_seq, path in reversed(self._segment_files()):
+            if first_seq >= before:
+                continue
+            try:
+                with open(path) as f:
+                    header = json.loads(f.readline())
+                    if car_id is not None and car_id not in header['cars']:
+                        continue
+                    if wallet_address is not None and wallet_address not in header['wallets']:
+                        continue
+                    races = [json.loads(line) for line in f]
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping unreadable race history segment {path}: {e}")
+                continue
+            for race in reversed(races):
+                if race['seq'] >= before:
+                    continue
+                if car_id is not None and race['car_id'] != car_id:
+                    continue
+                if wallet_address is not None and race.get('wallet_address') != wallet_address:
+                    continue
+                yield race
+
+    def query(
+        self,
+        car_id: Optional[str] = None,
+        wallet_address: Optional[str] = None,
+        before: Optional[int] = None,
+        limit: int = 20
+    ) -> Tuple[List[dict], Optional[int]]:
+        """Newest-first page of races; pass the returned cursor as `before` for the next page."""
+        before = self._next_seq if before is None else before
+        sources = (
+            self._iter_memory(car_id, wallet_address, before),
+            self._iter_disk(car_id, wallet_address, min(before, self._first_seq))
+        )
+        races: List[dict] = []
+        for source in sources:
+            for race in source:
+                races.append(race)
+                # One extra race tells us whether another page exists
+                if len(races) > limit:
+                    return races[:limit], races[limit - 1]['seq']
+        return races, None
+
+    def close(self) -> None:
+        # Spill what is still in memory so a restart resumes with the full history
+        if self.spill_dir:
+            while self._segments:
+                self._evict()
+
+    def latest(self, car_id: Optional[str] = None, wallet_address: Optional[str] = None) -> Optional[dict]:
+        races, _ = self.query(car_id=car_id, wallet_address=wallet_address, limit=1)
+        return races[0] if races else None
+
+def create_race_history() -> RaceHistory:
+    return RaceHistory(
+        segment_size=settings.RACE_HISTORY_SEGMENT_SIZE,
+        max_segments=settings.RACE_HISTORY_SEGMENTS,
+        spill_dir=settings.RACE_HISTORY_DIR or None
+    )
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+class RaceOddsEstimator:
+    """Monte Carlo odds for a single-player race against AI opponents.
+
+    One call draws every simulated race at once: an opponent count per race
+    and a full row of AI speeds, masked down to that count. The player's rank
+    in a race is one plus the number of strictly faster opponents, which is
+    how enter_race breaks ties. Results are cached per car and reused for as
+    long as the car's speed (derived from its flags and weights) is unchanged.
+    """
+
+    def __init__(
+        self,
+        rng: np.random.Generator,
+        opponents: Tuple[int, int],
+        ai_speed_kmh: Tuple[float, float],
+        simulations: int = 20000,
+        max_cached: int = 10000
+    ):
+        self.rng = rng
+        self.opponents = opponents
+        self.ai_speed_kmh = ai_speed_kmh
+        self.simulations = simulations
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def simulate(self, speed: float, simulations: Optional[int] = None) -> Dict[str, Any]:
+        simulations = simulations or self.simulations
+        low, high = self.opponents
+        counts = self.rng.integers(low, high + 1, simulations)
+        ai_speeds = self.rng.uniform(*self.ai_speed_kmh, (simulations, high))
+        seated = np.arange(high) < counts[:, None]
+        ranks = ((ai_speeds > speed) & seated).sum(axis=1) + 1
+        # Index 0 is rank 1; a race has at most `high` opponents
+        distribution = np.bincount(ranks, minlength=high + 2)[1:] / simulations
+        return {
+            'simulations': simulations,
+            'win_probability': float(distribution[0]),
+            'expected_rank': float(ranks.mean()),
+            'rank_distribution': distribution.tolist()
+        }
+
+    def odds(self, car_id: str, speed: float) -> Tuple[Dict[str, Any], bool]:
+        """Cached estimate for the car, recomputed when its speed has changed since."""
+        cached = self._cache.get(car_id)
+        if cached is not None and cached[0] == speed:
+            self._cache.move_to_end(car_id)
+            self.hits += 1
+            return cached[1], True
+
+        self.misses += 1
+        result = self.simulate(speed)
+        self._cache[car_id] = (speed, result)
+        self._cache.move_to_end(car_id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return result, False
+
+    def discard(self, car_id: str) -> None:
+        self._cache.pop(car_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses}
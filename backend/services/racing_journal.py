@@ -0,0 +1,389 @@
+import base64
+import json
+import logging
+import mmap
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .car_store import CarStore
+from .racing_repository import RacingRepository
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"RCSNAP01"
+ALIGNMENT = 64
+ARRAY_COLUMNS = ('owner', 'flags', 'weight_rows', 'weight_ref', 'training_count', 'created_at', 'last_trained', 'last_speed')
+# String columns are stored as JSON; car ids and wallet addresses are not validated beyond their prefix
+JSON_COLUMNS = ('car_ids', 'owners', 'lineage')
+
+def _numbered_files(directory: str, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+    files = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            try:
+                files.append((int(name[len(prefix):-len(suffix)]), os.path.join(directory, name)))
+            except ValueError:
+                continue
+    return sorted(files)
+
+def _plain(value: Any) -> Any:
+    # Race results may carry NumPy scalars
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _encode_car(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Flags and weights as base64 of their stored dtypes: exact, and far cheaper to encode than float text
+    return {
+        **record,
+        'flags': base64.b64encode(np.asarray(record['flags'], dtype=np.int16).tobytes()).decode(),
+        'weights': base64.b64encode(np.asarray(record['weights'], dtype=np.float64).tobytes()).decode()
+    }
+
+def _decode_car(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **record,
+        'flags': np.frombuffer(base64.b64decode(record['flags']), dtype=np.int16),
+        'weights': np.frombuffer(base64.b64decode(record['weights']), dtype=np.float64)
+    }
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_snapshot(path: str, seq: int, columns: Dict[str, Any], races: List[dict], races_total: int) -> None:
+    """Write a snapshot as one file: magic, header length, JSON header, then 64-byte aligned sections."""
+    sections: List[Tuple[str, bytes]] = []
+    for name in ARRAY_COLUMNS:
+        sections.append((name, np.ascontiguousarray(columns[name]).tobytes()))
+    for name in JSON_COLUMNS:
+        sections.append((name, json.dumps(columns[name], separators=(',', ':')).encode()))
+    sections.append(('races', json.dumps(races, separators=(',', ':'), default=_plain).encode()))
+
+    layout, offset = {}, 0
+    for name, data in sections:
+        layout[name] = {'offset': offset, 'length': len(data)}
+        offset = _aligned(offset + len(data))
+    for name in ARRAY_COLUMNS:
+        layout[name].update(dtype=columns[name].dtype.str, shape=list(columns[name].shape))
+    header = json.dumps({'seq': seq, 'races_total': races_total, 'sections': layout}).encode()
+    data_start = _aligned(len(SNAPSHOT_MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC + len(header).to_bytes(8, 'little') + header)
+        for name, data in sections:
+            f.seek(data_start + layout[name]['offset'])
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_snapshot(buffer: mmap.mmap) -> Dict[str, Any]:
+    """Parse a mapped snapshot; array columns are zero-copy views of the mapping."""
+    if buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("Not a racing snapshot")
+    header_length = int.from_bytes(buffer[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 8], 'little')
+    header_start = len(SNAPSHOT_MAGIC) + 8
+    header = json.loads(buffer[header_start:header_start + header_length])
+    data_start = _aligned(header_start + header_length)
+
+    columns: Dict[str, Any] = {}
+    sections = header['sections']
+    for name in ARRAY_COLUMNS:
+        section = sections[name]
+        dtype = np.dtype(section['dtype'])
+        array = np.frombuffer(buffer, dtype=dtype, count=section['length'] // dtype.itemsize, offset=data_start + section['offset'])
+        columns[name] = array.reshape(section['shape'])
+    for name in JSON_COLUMNS + ('races',):
+        section = sections[name]
+        start = data_start + section['offset']
+        columns[name] = json.loads(buffer[start:start + section['length']])
+    columns['lineage'] = [tuple(edge) for edge in columns['lineage']]
+    return {'seq': header['seq'], 'races_total': header['races_total'], 'columns': columns}
+
+def load_snapshot(path: str, store) -> Tuple[int, int, List[dict]]:
+    """Bulk load a snapshot file into an empty store; returns its seq, races_total and races."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        snapshot = read_snapshot(buffer)
+        store.load_columns(snapshot['columns'])
+        result = snapshot['seq'], snapshot['races_total'], snapshot['columns']['races']
+        # The views into the mapping must be gone before it closes
+        del snapshot
+    return result
+
+class JournalRacingRepository(RacingRepository):
+    """Racing state for a single process: an append-only event journal plus periodic snapshots.
+
+    Every change is appended as a numbered JSON line by a background writer
+    that commits whatever has queued up with one write and one fsync (group
+    commit), so requests never wait for the disk; a crash can lose the last
+    uncommitted batch. Every `snapshot_every` events the journal moves to a
+    new segment and a background thread compacts the previous snapshot plus
+    the finished segments into a new binary snapshot of the cars, lineage
+    and recent races, then deletes what it covers. The compaction never
+    reads the live store, so the request that crosses the threshold costs
+    no more than any other; it holds a second copy of the state while it
+    runs. Startup maps the latest snapshot, bulk loads it and replays only
+    the journal tail after it.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = 100000):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._store = None
+        self._history = None
+        self._races_seq = 0
+        self._writes: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._snapshotting: Optional[threading.Thread] = None
+        # Set when a rotation is queued, cleared when its compaction is done
+        self._compacting = False
+        self.commits = 0
+        self.committed_events = 0
+        self.replayed_events = 0
+
+    @property
+    def pending_writes(self) -> int:
+        return self._writes.qsize()
+
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"journal-{first_seq:012d}.log")
+
+    def restore(self, store, history) -> None:
+        start = time.perf_counter()
+        self._store, self._history = store, history
+        # Sequence number the next restored race had in the original history
+        self._races_seq = 0
+        snapshots = _numbered_files(self.directory, "snapshot-", ".bin")
+        if snapshots:
+            self._seq, races_total, races = load_snapshot(snapshots[-1][1], store)
+            self._snapshot_seq = self._seq
+            self._races_seq = races_total - len(races)
+            for race in races:
+                self._restore_race(history, race)
+        self._seq, self.replayed_events = self._replay(store, self._seq, lambda race: self._restore_race(history, race))
+
+        # Always start a fresh segment: the last one may end in a torn line
+        self._writer = threading.Thread(
+            target=self._write_loop,
+            args=(self._segment_path(self._seq + 1),),
+            name="racing-journal-writer",
+            daemon=True
+        )
+        self._writer.start()
+        logger.info(
+            f"Restored {len(store)} cars and {history.total} races from {self.directory} "
+            f"(snapshot seq {self._snapshot_seq}, {self.replayed_events} journal events) in {time.perf_counter() - start:.2f}s"
+        )
+
+    def _restore_race(self, history, race: dict) -> None:
+        # Races already spilled to disk by the race history itself are skipped
+        if self._races_seq >= history.total:
+            history.resume_at(self._races_seq)
+            history.append(race)
+        self._races_seq += 1
+
+    def _replay(self, store, seq: int, on_race: Callable[[dict], None], until: Optional[int] = None) -> Tuple[int, int]:
+        """Apply the journal events after `seq` (up to `until`) to the store; returns the last seq and the count applied."""
+        # New cars are held back and bulk loaded with one vectorized speed pass.
+        # Speed updates to a held car are folded into its record; a sale that
+        # touches a held car or its parent loads the batch first so lineage
+        # edges are replayed in their original order.
+        pending: Dict[str, Dict] = {}
+        pending_parents: set = set()
+        replayed = 0
+
+        def load_pending() -> None:
+            if pending:
+                store.add_records(list(pending.values()))
+                pending.clear()
+                pending_parents.clear()
+
+        for first_seq, path in _numbered_files(self.directory, "journal-", ".log"):
+            if until is not None and first_seq > until:
+                break
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Ignoring torn journal line at the end of {path}")
+                        break
+                    if event['seq'] <= seq:
+                        continue
+                    if until is not None and event['seq'] > until:
+                        break
+                    if event['seq'] != seq + 1:
+                        logger.warning(f"Journal gap: expected event {seq + 1}, found {event['seq']}")
+                    seq = event['seq']
+                    replayed += 1
+
+                    kind = event['e']
+                    if kind in ('created', 'trained'):
+                        car = event['car']
+                        if car['car_id'] not in store and car['car_id'] not in pending:
+                            pending[car['car_id']] = _decode_car(car)
+                            if car.get('parent_id'):
+                                pending_parents.add(car['parent_id'])
+                    elif kind == 'speed':
+                        held = pending.get(event['car_id'])
+                        if held is not None:
+                            held['last_speed'] = event['last_speed']
+                        else:
+                            car = store.get(event['car_id'])
+                            if car is not None:
+                                car.last_speed = event['last_speed']
+                    elif kind == 'sold':
+                        if event['car_id'] in pending or event['car_id'] in pending_parents:
+                            load_pending()
+                        store.remove(event['car_id'])
+                    elif kind == 'race':
+                        on_race(event['race'])
+        load_pending()
+        return seq, replayed
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        self._seq += 1
+        event['seq'] = self._seq
+        self._writes.put(event)
+        if self._seq - self._snapshot_seq >= self.snapshot_every:
+            self.snapshot()
+
+    def _write_loop(self, path: str) -> None:
+        f = open(path, 'ab')
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            lines: List[bytes] = []
+            try:
+                for item in batch:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, tuple):
+                        # ('rotate', first_seq, races_total): everything after it belongs to the
+                        # next segment, and everything before it is on disk to be compacted
+                        self._commit(f, lines)
+                        lines = []
+                        f.close()
+                        f = open(self._segment_path(item[1]), 'ab')
+                        self._compact_in_background(item[1] - 1, item[2])
+                    else:
+                        if 'car' in item:
+                            item['car'] = _encode_car(item['car'])
+                        lines.append(json.dumps(item, separators=(',', ':'), default=_plain).encode() + b"\n")
+                self._commit(f, lines)
+            except (OSError, TypeError) as e:
+                logger.error(f"Racing journal write of {len(batch)} events failed: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+            if stop:
+                f.close()
+                return
+
+    def _commit(self, f, lines: List[bytes]) -> None:
+        if not lines:
+            return
+        f.write(b"".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+        self.commits += 1
+        self.committed_events += len(lines)
+
+    def snapshot(self) -> None:
+        """Start a new journal segment and compact everything before it into a snapshot in the background."""
+        if self._store is None or self._compacting:
+            return
+        self._compacting = True
+        self._snapshot_seq = self._seq
+        self._writes.put(('rotate', self._seq + 1, self._history.total))
+
+    def _compact_in_background(self, seq: int, races_total: int) -> None:
+        self._snapshotting = threading.Thread(
+            target=self._compact,
+            args=(seq, races_total, self._history.segment_size * self._history.max_segments),
+            name="racing-journal-snapshot",
+            daemon=True
+        )
+        self._snapshotting.start()
+
+    def _compact(self, seq: int, races_total: int, races_kept: int) -> None:
+        try:
+            self._write_snapshot(seq, races_total, races_kept)
+        finally:
+            self._compacting = False
+
+    def _write_snapshot(self, seq: int, races_total: int, races_kept: int) -> None:
+        start = time.perf_counter()
+        # Rebuilt from disk in a private store: the live one is only touched by the event loop
+        store = CarStore()
+        races: "deque[dict]" = deque(maxlen=races_kept)
+        try:
+            snapshots = _numbered_files(self.directory, "snapshot-", ".bin")
+            base_seq = 0
+            if snapshots:
+                base_seq, _, base_races = load_snapshot(snapshots[-1][1], store)
+                races.extend(base_races)
+            self._replay(store, base_seq, races.append, until=seq)
+            write_snapshot(os.path.join(self.directory, f"snapshot-{seq:012d}.bin"), seq, store.columns(), list(races), races_total)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Racing snapshot at event {seq} failed: {e}")
+            return
+        # Older snapshots and every segment that starts at or before seq are covered now
+        for old_seq, path in _numbered_files(self.directory, "snapshot-", ".bin"):
+            if old_seq < seq:
+                os.remove(path)
+        for first_seq, path in _numbered_files(self.directory, "journal-", ".log"):
+            if first_seq <= seq:
+                os.remove(path)
+        logger.info(f"Racing snapshot of {len(store)} cars at event {seq} written in {time.perf_counter() - start:.2f}s")
+
+    def save_car(self, record: Dict) -> None:
+        self._append({'e': 'trained' if record['parent_id'] else 'created', 'car': record})
+
+    def update_speed(self, car_id: str, last_speed: Optional[float]) -> None:
+        self._append({'e': 'speed', 'car_id': car_id, 'last_speed': last_speed})
+
+    def delete_car(self, car_id: str, wallet_address: str) -> bool:
+        # Single process: the CarStore already checked ownership
+        self._append({'e': 'sold', 'car_id': car_id, 'wallet_address': wallet_address})
+        return True
+
+    def save_race(self, race: Dict) -> None:
+        self._append({'e': 'race', 'race': race})
+
+    def flush(self) -> None:
+        if self._writes.unfinished_tasks:
+            self._writes.join()
+
+    def wait_snapshot(self) -> None:
+        """Block until a requested snapshot is on disk."""
+        self.flush()
+        if self._snapshotting is not None:
+            self._snapshotting.join()
+
+    def close(self) -> None:
+        if self._writer is None or not self._writer.is_alive():
+            return
+        # A compaction still running would make the final snapshot a no-op
+        self.wait_snapshot()
+        if self._seq > self._snapshot_seq:
+            self.snapshot()
+        self._writes.put(None)
+        self._writer.join()
+        if self._snapshotting is not None:
+            self._snapshotting.join()
@@ -0,0 +1,277 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class RacingRepository:
+    """Storage behind RacingService.
+
+    RacingService keeps its CarStore as the in-memory cache and reports every
+    change here. Writes may be buffered; delete_car must be authoritative
+    because it decides whether a sale (and its refund) goes through.
+    """
+
+    # Whether other processes may change the stored state, so cache misses
+    # and garage reads have to consult the repository
+    shared = False
+
+    @property
+    def pending_writes(self) -> int:
+        return 0
+
+    def restore(self, store, history) -> None:
+        """Rebuild the in-memory CarStore and RaceHistory at startup, for repositories that can."""
+        pass
+
+    def load_car(self, car_id: str) -> Optional[Dict]:
+        return None
+
+    def load_cars(self, car_ids: List[str]) -> List[Dict]:
+        return []
+
+    def load_garage_ids(self, wallet_address: str) -> Optional[List[str]]:
+        return None
+
+    def save_car(self, record: Dict) -> None:
+        pass
+
+    def update_speed(self, car_id: str, last_speed: Optional[float]) -> None:
+        pass
+
+    def delete_car(self, car_id: str, wallet_address: str) -> bool:
+        return True
+
+    def save_race(self, race: Dict) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class InMemoryRacingRepository(RacingRepository):
+    """Keeps nothing beyond the CarStore: state lives and dies with the process."""
+
+class SQLiteRacingRepository(RacingRepository):
+    """SQLite (WAL mode) repository shared by every worker on the same file.
+
+    Writes are queued and committed by a background writer thread in batches,
+    one transaction per batch. Reads use the caller's own connection and flush
+    pending writes first, so a worker always sees its own changes. At startup
+    every stored car and the most recent races are loaded back, so the
+    leaderboard and race history survive restarts; while running, a worker
+    picks up other workers' cars on demand but its leaderboard and race
+    history only cover the cars and races it has seen.
+    """
+
+    shared = True
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS cars (
+            car_id TEXT PRIMARY KEY,
+            wallet_address TEXT NOT NULL,
+            flags BLOB NOT NULL,
+            weights BLOB NOT NULL,
+            training_count INTEGER NOT NULL,
+            parent_id TEXT,
+            created_at REAL NOT NULL,
+            last_trained REAL,
+            last_speed REAL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_cars_wallet ON cars (wallet_address, car_id)",
+        # One row per entrant: multi-player races share a race_id
+        """CREATE TABLE IF NOT EXISTS races (
+            race_id TEXT NOT NULL,
+            car_id TEXT NOT NULL,
+            wallet_address TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (race_id, car_id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_races_car ON races (car_id)",
+        "CREATE INDEX IF NOT EXISTS idx_races_wallet ON races (wallet_address)"
+    ]
+
+    UPSERT_CAR = """INSERT OR REPLACE INTO cars
+        (car_id, wallet_address, flags, weights, training_count, parent_id, created_at, last_trained, last_speed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+    UPDATE_SPEED = "UPDATE cars SET last_speed = ? WHERE car_id = ?"
+    INSERT_RACE = "INSERT OR REPLACE INTO races (race_id, car_id, wallet_address, timestamp, data) VALUES (?, ?, ?, ?, ?)"
+    SELECT_CAR = "SELECT * FROM cars WHERE car_id = ?"
+    SELECT_GARAGE_IDS = "SELECT car_id FROM cars WHERE wallet_address = ?"
+    SELECT_ALL_CARS = "SELECT * FROM cars ORDER BY created_at, rowid"
+    COUNT_RACES = "SELECT COUNT(*) FROM races"
+    SELECT_RECENT_RACES = "SELECT data FROM races ORDER BY rowid LIMIT -1 OFFSET ?"
+    DELETE_CAR = "DELETE FROM cars WHERE car_id = ? AND wallet_address = ?"
+
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = self._connect()
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+        self._writes: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="racing-sqlite-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def pending_writes(self) -> int:
+        return self._writes.qsize()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Statements are constants, so sqlite3's statement cache keeps them prepared
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            statements = [item for item in batch if item is not None]
+            try:
+                with conn:
+                    # Consecutive writes of the same statement go out as one executemany
+                    run_sql, run_params = None, []
+                    for sql, params in statements:
+                        if sql != run_sql and run_params:
+                            conn.executemany(run_sql, run_params)
+                            run_params = []
+                        run_sql = sql
+                        run_params.append(params)
+                    if run_params:
+                        conn.executemany(run_sql, run_params)
+            except sqlite3.Error as e:
+                logger.error(f"Racing repository write of {len(statements)} statements failed: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+            if stop:
+                conn.close()
+                return
+
+    def _row_to_record(self, row: sqlite3.Row) -> Dict:
+        return {
+            'car_id': row['car_id'],
+            'wallet_address': row['wallet_address'],
+            'flags': np.frombuffer(row['flags'], dtype=np.int16).tolist(),
+            'weights': np.frombuffer(row['weights'], dtype=np.float64).tolist(),
+            'training_count': row['training_count'],
+            'parent_id': row['parent_id'],
+            'created_at': row['created_at'],
+            'last_trained': row['last_trained'],
+            'last_speed': row['last_speed']
+        }
+
+    def restore(self, store, history) -> None:
+        start = time.perf_counter()
+        cursor = self._conn.execute(self.SELECT_ALL_CARS)
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            store.add_records([self._row_to_record(row) for row in rows])
+
+        # Races the history already spilled to disk itself are skipped, and only as
+        # many as it keeps in memory are replayed
+        total = self._conn.execute(self.COUNT_RACES).fetchone()[0]
+        first = max(history.total, total - history.segment_size * history.max_segments)
+        # Races keep the sequence numbers they had, so the total and paging cursors survive the restart
+        history.resume_at(first)
+        for row in self._conn.execute(self.SELECT_RECENT_RACES, (first,)):
+            history.append(json.loads(row['data']))
+        logger.info(
+            f"Restored {len(store)} cars and {max(total - first, 0)} races from {self.path} in {time.perf_counter() - start:.2f}s"
+        )
+
+    def load_car(self, car_id: str) -> Optional[Dict]:
+        self.flush()
+        row = self._conn.execute(self.SELECT_CAR, (car_id,)).fetchone()
+        return None if row is None else self._row_to_record(row)
+
+    def load_cars(self, car_ids: List[str]) -> List[Dict]:
+        self.flush()
+        records = []
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(car_ids), 500):
+            chunk = car_ids[i:i + 500]
+            sql = f"SELECT * FROM cars WHERE car_id IN ({', '.join('?' * len(chunk))}) ORDER BY created_at"
+            records.extend(self._row_to_record(row) for row in self._conn.execute(sql, chunk))
+        return records
+
+    def load_garage_ids(self, wallet_address: str) -> Optional[List[str]]:
+        # Answered from the (wallet_address, car_id) index alone
+        self.flush()
+        return [row[0] for row in self._conn.execute(self.SELECT_GARAGE_IDS, (wallet_address,))]
+
+    def save_car(self, record: Dict) -> None:
+        self._writes.put((self.UPSERT_CAR, (
+            record['car_id'],
+            record['wallet_address'],
+            np.asarray(record['flags'], dtype=np.int16).tobytes(),
+            np.asarray(record['weights'], dtype=np.float64).tobytes(),
+            record['training_count'],
+            record['parent_id'],
+            record['created_at'],
+            record['last_trained'],
+            record['last_speed']
+        )))
+
+    def update_speed(self, car_id: str, last_speed: Optional[float]) -> None:
+        self._writes.put((self.UPDATE_SPEED, (last_speed, car_id)))
+
+    def delete_car(self, car_id: str, wallet_address: str) -> bool:
+        self.flush()
+        with self._conn:
+            cursor = self._conn.execute(self.DELETE_CAR, (car_id, wallet_address))
+        return cursor.rowcount > 0
+
+    def save_race(self, race: Dict) -> None:
+        self._writes.put((self.INSERT_RACE, (
+            race['race_id'],
+            race['car_id'],
+            race['wallet_address'],
+            race['timestamp'],
+            json.dumps(race)
+        )))
+
+    def flush(self) -> None:
+        if self._writes.unfinished_tasks:
+            self._writes.join()
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._writes.put(None)
+            self._writer.join()
+        self._conn.close()
+
+def create_repository(backend: str = settings.RACING_REPOSITORY) -> RacingRepository:
+    if backend == "sqlite":
+        return SQLiteRacingRepository(settings.RACING_DB_PATH, batch_size=settings.RACING_WRITE_BATCH)
+    if backend == "memory":
+        return InMemoryRacingRepository()
+    if backend == "journal":
+        from .racing_journal import JournalRacingRepository
+        return JournalRacingRepository(settings.RACING_JOURNAL_DIR, snapshot_every=settings.RACING_SNAPSHOT_EVERY)
+    raise ValueError(f"Unknown racing repository backend: {backend}")
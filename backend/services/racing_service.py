@@ -1,107 +1,110 @@
-import random
 import hashlib
-import json
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-import xrpl
-from xrpl.clients import JsonRpcClient
-from xrpl.wallet import Wallet
-from xrpl.models.transactions import Payment
-from xrpl.utils import xrp_to_drops
+import numpy as np
+from config import settings
+from .car_store import NUM_ATTRIBUTES, Car, CarStore
+from .event_hub import EventHub, event_hub
+from .metrics import MetricsRegistry, metrics
+from .race_odds import RaceOddsEstimator
+from .race_history import RaceHistory, create_race_history
+from .racing_repository import RacingRepository, create_repository
 
-class Car:
+class RacingService:
     
-    ATTRIBUTE_NAMES = [
-        'tyres',        # 0: Tyre quality
-        'brakes',       # 1: Brake performance
-        'engine',       # 2: Engine power
-        'aerodynamics', # 3: Aerodynamic efficiency
-        'suspension',   # 4: Suspension quality
-        'transmission', # 5: Transmission efficiency
-        'fuel_system',  # 6: Fuel system optimization
-        'electronics',  # 7: Electronic systems
-        'chassis',      # 8: Chassis rigidity
-        'cooling'       # 9: Cooling system
-    ]
+    PAYMENT_DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+    TESTNET_URL = "https://s.altnet.rippletest.net:51234"
     
-    def __init__(self, car_id: str, wallet_address: str):
-        self.car_id = car_id
-        self.wallet_address = wallet_address
-        self.flags = [random.randint(1, 999) for _ in range(10)]
-        self.training_count = 0
-        self.created_at = datetime.utcnow().isoformat()
-        self.last_trained = None
-        self.last_speed = None
-        
-        base_weights = [0.15, 0.12, 0.10, 0.08, 0.11, 0.09, 0.13, 0.07, 0.08, 0.07]
-        self.weights = [w + random.uniform(-0.02, 0.02) for w in base_weights]
-        total = sum(self.weights)
-        self.weights = [w / total for w in self.weights]
-        
-    def calculate_speed(self) -> float:
-        raw_speed = sum(f * w for f, w in zip(self.flags, self.weights))
-        
-        min_raw, max_raw = 100, 900
-        min_speed, max_speed = 150, 350
-        
-        speed = min_speed + (raw_speed - min_raw) * (max_speed - min_speed) / (max_raw - min_raw)
-        
-        speed = max(min_speed, min(max_speed, speed))
-        
-        self.last_speed = speed
-        return speed
+    # Single-player races: opponent count and AI speed range, shared with the odds estimator
+    AI_OPPONENTS = (3, 7)
+    AI_SPEED_KMH = (30.0, 70.0)
     
-    def train(self, attribute_indices: Optional[List[int]] = None) -> dict:
-        if attribute_indices is None or len(attribute_indices) == 0:
-            attribute_indices = list(range(10))
-        
-        changes = {}
-        for i in attribute_indices:
-            if 0 <= i < 10:
-                old_value = self.flags[i]
-                delta = random.randint(-20, 20)
-                new_value = max(1, min(999, self.flags[i] + delta))
-                self.flags[i] = new_value
-                changes[self.ATTRIBUTE_NAMES[i]] = {
-                    'old': old_value,
-                    'delta': delta,
-                    'new': new_value
-                }
-        
-        self.training_count += 1
-        self.last_trained = datetime.utcnow().isoformat()
-        
-        self.last_speed = None
-        
-        return changes
+    def __init__(
+        self,
+        repository: Optional[RacingRepository] = None,
+        history: Optional[RaceHistory] = None,
+        events: Optional[EventHub] = None,
+        rng: Optional[np.random.Generator] = None
+    ):
+        # Every random draw of the service (and its store and matchmaker) comes from here
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.store = CarStore(rng=self.rng)
+        self.repository = repository or create_repository("memory")
+        # An empty RaceHistory is falsy, so `or` would swap it for the default
+        self.history = history if history is not None else RaceHistory()
+        self.repository.restore(self.store, self.history)
+        self.events = events
+        # A child generator, so odds queries don't shift the draws of real races
+        self.odds = RaceOddsEstimator(
+            self.rng.spawn(1)[0],
+            self.AI_OPPONENTS,
+            self.AI_SPEED_KMH,
+            simulations=settings.RACE_ODDS_SIMULATIONS,
+            max_cached=settings.RACE_ODDS_CACHE_SIZE
+        )
     
-    def to_dict_safe(self) -> dict:
-        return {
-            'car_id': self.car_id,
-            'wallet_address': self.wallet_address,
-            'training_count': self.training_count,
-            'created_at': self.created_at,
-            'last_trained': self.last_trained
-        }
-
-class RacingService:
+    def close(self) -> None:
+        self.history.close()
+        self.repository.close()
     
-    PAYMENT_DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
-    TESTNET_URL = "https://s.altnet.rippletest.net:51234"
+    # Upper bound of each garage size band reported by racing_garages_by_size
+    GARAGE_SIZE_BANDS = ((1, "1"), (5, "2-5"), (20, "6-20"), (100, "21-100"), (float("inf"), "100+"))
+    
+    def _garages_by_size(self) -> Dict[Tuple[str], int]:
+        counts = {label: 0 for _, label in self.GARAGE_SIZE_BANDS}
+        for garage in self.store.by_owner.values():
+            size = len(garage)
+            for bound, label in self.GARAGE_SIZE_BANDS:
+                if size <= bound:
+                    counts[label] += 1
+                    break
+        return {(label,): count for label, count in counts.items()}
+    
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        # Read at scrape time only; nothing is recorded on the racing paths themselves
+        registry.gauge("racing_cars", "Cars loaded in the car store", lambda: len(self.store))
+        registry.gauge("racing_garages", "Wallets owning at least one loaded car", lambda: len(self.store.by_owner))
+        registry.gauge("racing_garages_by_size", "Garages by number of cars", self._garages_by_size, ("size",))
+        registry.gauge("racing_race_history_length", "Races held in memory", lambda: len(self.history))
+        registry.gauge("racing_races_recorded", "Races recorded since the history began", lambda: self.history.total)
+        registry.gauge("racing_pending_writes", "Repository writes waiting to be flushed", lambda: self.repository.pending_writes)
     
-    def __init__(self):
-        self.cars: Dict[str, Car] = {}
-        self.garage: Dict[str, List[str]] = {}
-        self.races: List[dict] = []
+    def _load_car(self, car_id: str) -> Optional[Car]:
+        car = self.store.get(car_id)
+        if car is None and self.repository.shared:
+            record = self.repository.load_car(car_id)
+            if record is not None:
+                car = self.store.add_record(record)
+        return car
+    
+    def _publish(self, wallet_address: str, event_type: str, data: dict) -> None:
+        if self.events is not None:
+            self.events.publish(wallet_address, event_type, data)
     
     def _process_payment(self, wallet_seed: str, amount_xrp: float) -> Tuple[bool, str]:
-        return True, f"DEMO-TX-{random.randint(100000, 999999)}"
+        return True, f"DEMO-TX-{self.rng.integers(100000, 1000000)}"
+    
+    def _process_refund(self, wallet_address: str, amount_xrp: float) -> Tuple[bool, str]:
+        return True, f"DEMO-REFUND-{self.rng.integers(100000, 1000000)}"
         
     def _generate_car_id(self, wallet_address: str) -> str:
-        timestamp = datetime.utcnow().timestamp()
-        data = f"{wallet_address}{timestamp}{random.random()}"
-        hash_id = hashlib.sha256(data.encode()).hexdigest()[:12]
-        return f"CAR-{hash_id}"
+        while True:
+            data = f"{wallet_address}{self.rng.integers(1 << 63)}"
+            hash_id = hashlib.sha256(data.encode()).hexdigest()[:12]
+            car_id = f"CAR-{hash_id}"
+            if car_id not in self.store:
+                return car_id
+    
+    def _generate_car_ids(self, wallet_address: str, count: int) -> List[str]:
+        # Every id is drawn independently from the 48-bit space, so batches can't
+        # overlap the way runs of consecutive ids could; the rare clash is redrawn
+        car_ids: Dict[str, None] = {}
+        while len(car_ids) < count:
+            for value in self.rng.integers(1 << 48, size=count - len(car_ids)).tolist():
+                car_id = f"CAR-{value:012x}"
+                if car_id not in self.store:
+                    car_ids[car_id] = None
+        return list(car_ids)
     
     def create_car(self, wallet_address: str, wallet_seed: str) -> Tuple[bool, Optional[Car], str]:
         payment_success, payment_result = self._process_payment(wallet_seed, 1.0)
@@ -110,25 +113,105 @@ class RacingService:
             return False, None, f"Payment failed: {payment_result}"
         
         car_id = self._generate_car_id(wallet_address)
-        car = Car(car_id, wallet_address)
-        
-        self.cars[car_id] = car
-        
-        if wallet_address not in self.garage:
-            self.garage[wallet_address] = []
-        self.garage[wallet_address].append(car_id)
+        flags, weights = Car.random_attributes(self.rng)
+        car = self.store.add(car_id, wallet_address, flags, weights)
+        self.repository.save_car(self.store.record(car))
+        self._publish(wallet_address, "garage", {'action': "created", 'car_ids': [car_id]})
         
         return True, car, f"Car created successfully. Payment tx: {payment_result}"
     
     def get_garage(self, wallet_address: str) -> List[Car]:
-        car_ids = self.garage.get(wallet_address, [])
-        return [self.cars[cid] for cid in car_ids if cid in self.cars]
+        stored = self.repository.load_garage_ids(wallet_address) if self.repository.shared else None
+        if stored is not None:
+            # The repository is authoritative: pick up cars other workers created
+            # and drop the ones they sold
+            stored_ids = set(stored)
+            for car_id in list(self.store.by_owner.get(wallet_address, ())):
+                if car_id not in stored_ids:
+                    self.store.remove(car_id)
+            missing = [car_id for car_id in stored if car_id not in self.store]
+            if missing:
+                self.store.add_records(self.repository.load_cars(missing))
+        return self.store.garage(wallet_address)
     
     def get_car(self, car_id: str) -> Optional[Car]:
-        return self.cars.get(car_id)
+        return self._load_car(car_id)
+    
+    def get_speeds(self, car_ids: List[str]) -> Tuple[Dict[str, float], List[str]]:
+        if self.repository.shared:
+            missing = [car_id for car_id in car_ids if car_id not in self.store]
+            if missing:
+                self.store.add_records(self.repository.load_cars(missing))
+        speeds = self.store.speeds(car_ids)
+        return speeds, [car_id for car_id in car_ids if car_id not in speeds]
+    
+    def _leaderboard_entries(self, ranked: List[Tuple[int, str, float]]) -> List[dict]:
+        entries = []
+        for rank, car_id, speed in ranked:
+            car = self.store.get(car_id)
+            entries.append({
+                'rank': rank,
+                'car_id': car_id,
+                'wallet_address': car.wallet_address,
+                'speed': speed,
+                'training_count': car.training_count
+            })
+        return entries
+    
+    def get_leaderboard(self, offset: int = 0, limit: int = 20) -> Tuple[int, List[dict]]:
+        leaderboard = self.store.leaderboard
+        return len(leaderboard), self._leaderboard_entries(leaderboard.page(offset, limit))
+    
+    def get_car_rank(self, car_id: str, radius: int = 5) -> Optional[dict]:
+        if self._load_car(car_id) is None:
+            return None
+        leaderboard = self.store.leaderboard
+        nearby = self._leaderboard_entries(leaderboard.around(car_id, radius))
+        return {
+            'car_id': car_id,
+            'rank': leaderboard.rank(car_id),
+            'total': len(leaderboard),
+            'speed': self.store.get(car_id).speed,
+            'nearby': nearby
+        }
+    
+    def get_odds(self, car_id: str) -> Optional[dict]:
+        car = self._load_car(car_id)
+        if car is None:
+            return None
+        speed = car.speed
+        estimate, cached = self.odds.odds(car_id, speed)
+        return {'car_id': car_id, 'speed': speed, 'cached': cached, **estimate}
+    
+    def _lineage_node(self, car_id: str, generation: int) -> dict:
+        car = self._load_car(car_id)
+        return {
+            'car_id': car_id,
+            'parent_id': self.store.parents.get(car_id),
+            'generation': generation,
+            'exists': car is not None,
+            'training_count': car.training_count if car else None,
+            'speed': car.speed if car else None
+        }
+    
+    def get_ancestry(self, car_id: str, limit: int = 50) -> Optional[List[dict]]:
+        if self._load_car(car_id) is None:
+            return None
+        ancestry = []
+        parent_id = self.store.parents.get(car_id)
+        while parent_id is not None and len(ancestry) < limit:
+            # Loading an ancestor from a shared repository brings in its own parent edge
+            ancestry.append(self._lineage_node(parent_id, -(len(ancestry) + 1)))
+            parent_id = self.store.parents.get(parent_id)
+        return ancestry
+    
+    def get_descendants(self, car_id: str, limit: int = 100) -> Optional[List[dict]]:
+        if self._load_car(car_id) is None:
+            return None
+        return [self._lineage_node(child_id, generation) for child_id, generation in self.store.descendants(car_id, limit)]
     
     def train_car(self, car_id: str, wallet_address: str, wallet_seed: str, attribute_indices: Optional[List[int]] = None) -> Tuple[bool, str, Optional[Car], Optional[dict]]:
-        base_car = self.cars.get(car_id)
+        base_car = self._load_car(car_id)
         
         if not base_car:
             return False, "Car not found", None, None
@@ -142,24 +225,24 @@ class RacingService:
             return False, f"Payment failed: {payment_result}", None, None
         
         new_car_id = self._generate_car_id(wallet_address)
-        new_car = Car(new_car_id, wallet_address)
-        
-        new_car.flags = base_car.flags.copy()
-        new_car.weights = base_car.weights.copy()
-        new_car.training_count = base_car.training_count
+        new_car = self.store.add(
+            new_car_id,
+            wallet_address,
+            base_car.flags,
+            base_car.weights,
+            training_count=base_car.training_count,
+            parent_id=car_id
+        )
         
         base_speed = base_car.last_speed if base_car.last_speed is not None else base_car.calculate_speed()
+        self.repository.update_speed(car_id, base_speed)
         
         changes = new_car.train(attribute_indices)
         
         new_speed = new_car.calculate_speed()
         new_car.last_speed = new_speed
-        
-        self.cars[new_car_id] = new_car
-        
-        if wallet_address not in self.garage:
-            self.garage[wallet_address] = []
-        self.garage[wallet_address].append(new_car_id)
+        self.repository.save_car(self.store.record(new_car))
+        self._publish(wallet_address, "garage", {'action': "trained", 'car_ids': [new_car_id], 'parent_ids': [car_id]})
         
         if attribute_indices:
             trained_attrs = [new_car.ATTRIBUTE_NAMES[i] for i in attribute_indices if 0 <= i < 10]
@@ -169,8 +252,108 @@ class RacingService:
         
         return True, f"New car created from training (Training #{new_car.training_count}). {attr_msg}. Payment tx: {payment_result}", new_car, changes
     
+    def train_cars_batch(self, wallet_address: str, wallet_seed: str, jobs: List[dict]) -> Tuple[bool, str, List[dict], Optional[dict]]:
+        results: List[Optional[dict]] = [None] * len(jobs)
+        valid = []
+        for i, job in enumerate(jobs):
+            car = self._load_car(job['car_id'])
+            if not car:
+                results[i] = {'car_id': job['car_id'], 'success': False, 'message': "Car not found"}
+            elif car.wallet_address != wallet_address:
+                results[i] = {'car_id': job['car_id'], 'success': False, 'message': "You don't own this car"}
+            else:
+                valid.append((i, car, job))
+        
+        if not valid:
+            return True, "No trainable cars in batch", results, None
+        
+        total = sum(job['iterations'] for _, _, job in valid)
+        payment_success, payment_result = self._process_payment(wallet_seed, 1.0 * total)
+        
+        if not payment_success:
+            return False, f"Payment failed: {payment_result}", [], None
+        
+        store = self.store
+        rows = len(valid)
+        slots = np.array([car._slot for _, car, _ in valid])
+        iterations = np.array([job['iterations'] for _, _, job in valid])
+        masks = np.zeros((rows, NUM_ATTRIBUTES), dtype=bool)
+        trained_attrs = []
+        for row, (_, _, job) in enumerate(valid):
+            indices = [i for i in job.get('attribute_indices') or () if 0 <= i < NUM_ATTRIBUTES]
+            masks[row, indices or slice(None)] = True
+            trained_attrs.append([Car.ATTRIBUTE_NAMES[i] for i in indices] if indices else Car.ATTRIBUTE_NAMES.copy())
+        
+        for _, car, _ in valid:
+            base_speed = car.last_speed if car.last_speed is not None else car.calculate_speed()
+            self.repository.update_speed(car.car_id, base_speed)
+        
+        # Every training step of every job comes from one draw of deltas; steps of a
+        # job still apply in order because clipping makes them path dependent
+        deltas = self.rng.integers(-20, 21, (int(iterations.max()), rows, NUM_ATTRIBUTES)) * masks
+        flags = store.flags[slots].astype(np.int32)
+        counts = store.training_count[slots]
+        parents = [car.car_id for _, car, _ in valid]
+        chains: List[List[str]] = [[] for _ in range(rows)]
+        car_ids = iter(self._generate_car_ids(wallet_address, total))
+        now = datetime.utcnow().timestamp()
+        
+        records = []
+        for step in range(int(iterations.max())):
+            active = np.flatnonzero(iterations > step)
+            flags[active] = np.clip(flags[active] + deltas[step, active], 1, 999)
+            snapshot = flags[active].tolist()
+            for row, row_flags in zip(active.tolist(), snapshot):
+                car_id = next(car_ids)
+                records.append({
+                    'car_id': car_id,
+                    'wallet_address': wallet_address,
+                    'flags': row_flags,
+                    'weights': store.weights_of(int(slots[row])),
+                    'training_count': int(counts[row]) + step + 1,
+                    'parent_id': parents[row],
+                    'created_at': now,
+                    'last_trained': now
+                })
+                parents[row] = car_id
+                chains[row].append(car_id)
+        
+        new_cars = store.add_records(records)
+        new_slots = [car._slot for car in new_cars]
+        store.last_speed[new_slots] = store.speed[new_slots]
+        for car in new_cars:
+            self.repository.save_car(store.record(car))
+        
+        for row, (i, _, job) in enumerate(valid):
+            final_car = store.get(chains[row][-1])
+            results[i] = {
+                'car_id': job['car_id'],
+                'success': True,
+                'message': f"Trained {job['iterations']} time(s) (Training #{final_car.training_count})",
+                'new_car_id': final_car.car_id,
+                'lineage': chains[row],
+                'training_count': final_car.training_count,
+                'trained_attributes': trained_attrs[row],
+                'speed': final_car.speed
+            }
+        
+        summary = {
+            'trainings': total,
+            'cars_trained': rows,
+            'cars_rejected': len(jobs) - rows,
+            'charged_xrp': 1.0 * total,
+            'payment_tx': payment_result
+        }
+        self._publish(wallet_address, "garage", {
+            'action': "trained",
+            'car_ids': [chain[-1] for chain in chains],
+            'parent_ids': [car.car_id for _, car, _ in valid],
+            'cars_created': total
+        })
+        return True, f"Trained {rows} car(s) {total} time(s). Payment tx: {payment_result}", results, summary
+    
     def test_speed(self, car_id: str, wallet_address: str) -> Tuple[bool, bool, str, Optional[float]]:
-        car = self.cars.get(car_id)
+        car = self._load_car(car_id)
         
         if not car:
             return False, False, "Car not found", None
@@ -197,10 +380,12 @@ class RacingService:
             
             car.last_speed = current_speed
         
+        self.repository.update_speed(car_id, current_speed)
+        
         return True, improved, message, current_speed
     
     def enter_race(self, car_id: str, wallet_address: str, wallet_seed: str) -> Tuple[bool, Optional[dict]]:
-        car = self.cars.get(car_id)
+        car = self._load_car(car_id)
         
         if not car:
             return False, None
@@ -213,14 +398,13 @@ class RacingService:
         if not payment_success:
             return False, {'message': f"Payment failed: {payment_result}"}
         
-        num_opponents = random.randint(3, 7)
+        num_opponents = int(self.rng.integers(self.AI_OPPONENTS[0], self.AI_OPPONENTS[1] + 1))
         
         player_speed = car.calculate_speed()
         
         opponents = []
-        for i in range(num_opponents):
+        for i, ai_speed in enumerate(self.rng.uniform(*self.AI_SPEED_KMH, num_opponents).tolist()):
             ai_id = f"AI-{i+1}"
-            ai_speed = random.uniform(30, 70)
             opponents.append({'id': ai_id, 'speed': ai_speed})
         
         all_racers = [{'id': car_id, 'speed': player_speed, 'is_player': True}]
@@ -238,6 +422,7 @@ class RacingService:
         race_result = {
             'race_id': race_id,
             'car_id': car_id,
+            'wallet_address': wallet_address,
             'your_rank': player_rank,
             'winner_car_id': winner_id,
             'total_participants': len(all_racers),
@@ -246,12 +431,30 @@ class RacingService:
             'payment_tx': payment_result
         }
         
-        self.races.append(race_result)
+        self.repository.update_speed(car_id, player_speed)
+        self.record_race(race_result)
         
         return True, race_result
     
+    def record_race(self, race_result: dict) -> None:
+        self.history.append(race_result)
+        self.repository.save_race(race_result)
+        self._publish(race_result['wallet_address'], "race", race_result)
+    
+    def get_latest_race(self, wallet_address: Optional[str] = None, car_id: Optional[str] = None) -> Optional[dict]:
+        return self.history.latest(car_id=car_id, wallet_address=wallet_address)
+    
+    def get_race_history(
+        self,
+        wallet_address: Optional[str] = None,
+        car_id: Optional[str] = None,
+        before: Optional[int] = None,
+        limit: int = 20
+    ) -> Tuple[List[dict], Optional[int]]:
+        return self.history.query(car_id=car_id, wallet_address=wallet_address, before=before, limit=limit)
+    
     def sell_car(self, car_id: str, wallet_address: str) -> Tuple[bool, str, float]:
-        car = self.cars.get(car_id)
+        car = self._load_car(car_id)
         
         if not car:
             return False, "Car not found", 0.0
@@ -259,13 +462,18 @@ class RacingService:
         if car.wallet_address != wallet_address:
             return False, "You don't own this car", 0.0
         
-        if wallet_address in self.garage and car_id in self.garage[wallet_address]:
-            self.garage[wallet_address].remove(car_id)
+        if not self.repository.delete_car(car_id, wallet_address):
+            # Already sold through another worker
+            self.store.remove(car_id)
+            return False, "Car not found", 0.0
         
-        del self.cars[car_id]
+        self.store.remove(car_id)
+        self.odds.discard(car_id)
         
         refund_amount = 0.5
+        self._publish(wallet_address, "garage", {'action': "sold", 'car_ids': [car_id], 'refund_xrp': refund_amount})
         
         return True, f"Car {car_id} sold for {refund_amount} XRP", refund_amount
 
-racing_service = RacingService()
+racing_service = RacingService(create_repository(), create_race_history(), event_hub, np.random.default_rng(settings.RACING_SEED))
+racing_service.register_metrics(metrics)
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import multiprocessing
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from xrpl import CryptoAlgorithm
+from xrpl.models.transactions import Transaction
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+from config import settings
+from .metrics import Counter, metrics
+
+@dataclass
+class _Keypair:
+    address: str
+    public_key: str
+    private_key: bytearray
+    algorithm: CryptoAlgorithm
+    expires_at: float
+
+class WalletCache:
+    """Bounded cache of derived keypairs, keyed by a SHA-256 of the seed.
+
+    Seeds themselves are never stored. Entries live for `ttl` seconds from
+    derivation (hits do not extend them), so insertion order is expiry order
+    and expired entries are dropped from the front. Private keys are held in
+    bytearrays and overwritten with zeros when an entry expires or is evicted;
+    the short-lived str copies xrpl-py needs while signing are out of reach.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, _Keypair]" = OrderedDict()
+        # Shared by the signing threads when the pool is a thread pool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self, key: bytes) -> None:
+        keypair = self._entries.pop(key)
+        keypair.private_key[:] = bytes(len(keypair.private_key))
+        self.evictions += 1
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            key, keypair = next(iter(self._entries.items()))
+            if keypair.expires_at > now:
+                break
+            self._evict(key)
+
+    def wallet(self, seed: str) -> Tuple[Wallet, bool]:
+        """Wallet for the seed and whether the keypair came from the cache."""
+        key = hashlib.sha256(seed.encode()).digest()
+        with self._lock:
+            self._expire(time.monotonic())
+            keypair = self._entries.get(key)
+            if keypair is not None:
+                self.hits += 1
+                return Wallet(
+                    keypair.public_key,
+                    keypair.private_key.decode(),
+                    master_address=keypair.address,
+                    algorithm=keypair.algorithm
+                ), True
+            self.misses += 1
+
+        # Derivation is the expensive part and needs no lock
+        wallet = Wallet.from_seed(seed)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _Keypair(
+                    wallet.address,
+                    wallet.public_key,
+                    bytearray(wallet.private_key.encode()),
+                    wallet.algorithm,
+                    time.monotonic() + self.ttl
+                )
+                while len(self._entries) > self.max_entries:
+                    self._evict(next(iter(self._entries)))
+        return wallet, False
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {'cached': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+# Each worker process gets its own cache from _init_worker
+_worker_cache: Optional[WalletCache] = None
+
+def _init_worker(max_entries: int, ttl: float) -> None:
+    global _worker_cache
+    _worker_cache = WalletCache(max_entries, ttl)
+
+def _ready() -> None:
+    pass
+
+def _identity(seed: str, cache: Optional[WalletCache] = None) -> Tuple[str, str, bool]:
+    wallet, cached = (cache or _worker_cache).wallet(seed)
+    return wallet.address, wallet.public_key, cached
+
+def _sign(transactions: List[Transaction], seed: str, cache: Optional[WalletCache] = None) -> Tuple[List[Transaction], bool]:
+    wallet, cached = (cache or _worker_cache).wallet(seed)
+    return [sign(tx, wallet) for tx in transactions], cached
+
+class TransactionSigner:
+    """Key derivation and signing on a worker pool, with cached keypairs.
+
+    xrpl-py signs in pure Python, which holds the GIL: on a thread pool the
+    work is off the event loop but still competes with it. The default
+    "process" pool takes it out of the server process entirely; every worker
+    keeps its own WalletCache, so a seed stays cached in each worker that has
+    seen it. "thread" shares a single cache between the threads.
+    """
+
+    def __init__(
+        self,
+        mode: str = "process",
+        workers: int = 2,
+        max_cached: int = 1024,
+        ttl: float = 300.0,
+        lookups: Optional[Counter] = None
+    ):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown signing pool {mode!r}; expected 'process' or 'thread'")
+        self.mode = mode
+        self.workers = workers
+        self.cache = WalletCache(max_cached, ttl) if mode == "thread" else None
+        self.lookups = lookups
+        self._max_cached = max_cached
+        self._ttl = ttl
+        self._executor: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="xrpl-signing")
+        else:
+            # spawn, not fork: the server process already runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._max_cached, self._ttl)
+            )
+            self._spawn_workers()
+
+    def _spawn_workers(self) -> None:
+        # A spawned worker re-imports the parent's __main__ script before running anything,
+        # so under `python main.py` each one would build the whole app (racing store,
+        # repository writers) for nothing. Workers start on submit, so start them all now
+        # with __main__ hidden; they then import only services.signing and its package.
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            for _ in range(self.workers):
+                self._executor.submit(_ready)
+        finally:
+            sys.modules['__main__'] = main
+
+    async def _run(self, func, *args):
+        # Lazily start the pool for code paths that run outside the app lifecycle
+        self.start()
+        loop = asyncio.get_running_loop()
+        *result, cached = await loop.run_in_executor(self._executor, partial(func, *args, cache=self.cache))
+        if self.lookups is not None:
+            self.lookups.inc(("hit" if cached else "miss",))
+        return result
+
+    async def identity(self, seed: str) -> Tuple[str, str]:
+        """Classic address and public key for the seed."""
+        address, public_key = await self._run(_identity, seed)
+        return address, public_key
+
+    async def sign(self, transaction: Transaction, seed: str) -> Transaction:
+        signed, = await self.sign_many([transaction], seed)
+        return signed
+
+    async def sign_many(self, transactions: List[Transaction], seed: str) -> List[Transaction]:
+        """Sign with one derivation and one pool round trip for the whole list."""
+        signed, = await self._run(_sign, transactions, seed)
+        return signed
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self.cache is not None:
+            self.cache.clear()
+
+wallet_cache_lookups = metrics.counter(
+    "wallet_cache_lookups_total",
+    "Derived keypair lookups by the signing pool, by cache hit or miss",
+    ("result",)
+)
+
+transaction_signer = TransactionSigner(
+    settings.SIGNING_POOL,
+    settings.SIGNING_WORKERS,
+    settings.WALLET_CACHE_SIZE,
+    settings.WALLET_CACHE_TTL,
+    wallet_cache_lookups
+)
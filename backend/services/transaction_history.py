@@ -0,0 +1,215 @@
+import asyncio
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from xrpl.asyncio.clients import Client
+from xrpl.models.requests import AccountTx
+from config import settings
+from .account_cache import AccountCache, account_cache
+from .ledger_stream import LedgerStream, ledger_stream
+from .xrpl_client import xrpl_pool
+
+# (ledger_index, TransactionIndex): the same ordering rippled uses for account_tx markers
+Position = Tuple[int, int]
+
+def position_of(entry: Dict[str, Any]) -> Position:
+    return (entry['tx']['ledger_index'], entry['meta']['TransactionIndex'])
+
+def _marker(position: Position) -> Dict[str, int]:
+    return {'ledger': position[0], 'seq': position[1]}
+
+class AccountHistory:
+    """Cached newest-first window of one account's validated transactions."""
+
+    __slots__ = ('transactions', 'keys', 'ledger_max', 'older_marker', 'refreshed_at', 'lock')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.transactions: List[dict] = []
+        # Negated positions, ascending, for bisecting the newest-first list
+        self.keys: List[Tuple[int, int]] = []
+        self.ledger_max = 0
+        # rippled marker of the newest transaction older than the window; None once the window reaches the first one
+        self.older_marker: Optional[Dict[str, int]] = None
+        self.refreshed_at = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return self.older_marker is None
+
+    def set(self, transactions: List[dict], older_marker: Optional[Dict[str, int]]) -> None:
+        self.transactions = transactions
+        self.keys = [(-ledger, -seq) for ledger, seq in map(position_of, transactions)]
+        self.older_marker = older_marker
+
+    def index(self, before: Optional[Position]) -> int:
+        # First cached transaction older than `before`
+        return 0 if before is None else bisect_right(self.keys, (-before[0], -before[1]))
+
+class TransactionHistory:
+    """Per-account transaction history served in pages from a local window.
+
+    The window is refreshed only with transactions from ledgers after the one
+    it was last read at, and skipped entirely while the ledger stream shows
+    nothing touched the account. Older pages extend the window by following
+    rippled's markers; beyond max_transactions per account they are passed
+    straight through to rippled instead of being cached.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        cache: AccountCache,
+        stream: Optional[LedgerStream] = None,
+        max_accounts: int = 1000,
+        max_transactions: int = 1000,
+        fetch_size: int = 200,
+        ttl: float = 4.0
+    ):
+        self.client = client
+        self.cache = cache
+        self.stream = stream
+        self.max_accounts = max_accounts
+        self.max_transactions = max_transactions
+        self.fetch_size = fetch_size
+        self.ttl = ttl
+        self._accounts: "OrderedDict[str, AccountHistory]" = OrderedDict()
+        self.hits = 0
+        self.refreshes = 0
+        self.fetches = 0
+
+    async def _account_tx(self, address: str, ledger_min: int, ledger_max: int, marker: Optional[dict] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        self.fetches += 1
+        response = await self.client.request(AccountTx(
+            account=address,
+            ledger_index_min=ledger_min,
+            ledger_index_max=ledger_max,
+            limit=limit or self.fetch_size,
+            marker=marker
+        ))
+        if not response.is_successful():
+            raise RuntimeError(response.result.get('error_message') or response.result.get('error', 'account_tx failed'))
+        return response.result
+
+    def _fresh(self, address: str, history: AccountHistory) -> bool:
+        if self.stream is not None:
+            changed = self.stream.changed_since(address, history.ledger_max)
+            if changed is not None:
+                return not changed
+        return self.cache.validated_ledger <= history.ledger_max and time.monotonic() - history.refreshed_at < self.ttl
+
+    def _entry(self, address: str) -> AccountHistory:
+        history = self._accounts.get(address)
+        if history is None:
+            history = self._accounts[address] = AccountHistory()
+            while len(self._accounts) > self.max_accounts:
+                self._accounts.popitem(last=False)
+        self._accounts.move_to_end(address)
+        return history
+
+    async def _update(self, address: str, history: AccountHistory) -> None:
+        # Callers hold history.lock
+        if not history.ledger_max:
+            result = await self._account_tx(address, -1, -1)
+            history.set(result.get('transactions', []), result.get('marker'))
+            history.ledger_max = result.get('ledger_index_max', 0)
+            history.refreshed_at = time.monotonic()
+        elif self._fresh(address, history):
+            self.hits += 1
+        else:
+            await self._refresh(address, history)
+        if self.stream is not None:
+            self.stream.watch_history(address, history.ledger_max)
+
+    async def _refresh(self, address: str, history: AccountHistory) -> None:
+        # Only ledgers from the last one read onwards; its own transactions are filtered by position
+        self.refreshes += 1
+        newest = position_of(history.transactions[0]) if history.transactions else (0, 0)
+        fetched: List[dict] = []
+        marker, ledger_max = None, history.ledger_max
+        transactions, older_marker = None, history.older_marker
+        while True:
+            result = await self._account_tx(address, history.ledger_max, -1, marker)
+            ledger_max = max(ledger_max, result.get('ledger_index_max', 0))
+            page = result.get('transactions', [])
+            fresh = [entry for entry in page if position_of(entry) > newest]
+            fetched.extend(fresh)
+            marker = result.get('marker')
+            if marker is None or len(fresh) < len(page):
+                if fetched:
+                    transactions = fetched + history.transactions
+                break
+            if len(fetched) >= self.max_transactions:
+                # Too far behind to stitch onto the old window: start a new one
+                transactions, older_marker = fetched, marker
+                break
+
+        if transactions is not None:
+            if len(transactions) > self.max_transactions:
+                older_marker = _marker(position_of(transactions[self.max_transactions]))
+                del transactions[self.max_transactions:]
+            history.set(transactions, older_marker)
+        history.ledger_max = ledger_max
+        history.refreshed_at = time.monotonic()
+
+    async def _extend(self, address: str, history: AccountHistory, before: Optional[Position], limit: int) -> int:
+        start = history.index(before)
+        while start + limit >= len(history.transactions) and not history.complete and len(history.transactions) < self.max_transactions:
+            result = await self._account_tx(address, -1, history.ledger_max, history.older_marker)
+            history.set(history.transactions + result.get('transactions', []), result.get('marker'))
+            start = history.index(before)
+        return start
+
+    async def page(self, address: str, limit: int, before: Optional[Position] = None) -> Tuple[List[dict], Optional[Position]]:
+        """Up to `limit` transactions older than `before` (newest first) and the cursor for the next page."""
+        history = self._entry(address)
+        async with history.lock:
+            await self._update(address, history)
+            start = await self._extend(address, history, before, limit)
+            transactions, older_marker, ledger_max = history.transactions, history.older_marker, history.ledger_max
+
+        page = transactions[start:start + limit]
+        has_more = start + limit < len(transactions)
+        if not has_more and older_marker is not None:
+            # Past the cached window: continue after it, or from the cursor if that is older still
+            inside = before is None or start < len(transactions)
+            marker = older_marker if inside else _marker(before)
+            result = await self._account_tx(address, -1, ledger_max, marker, limit + 1 - len(page))
+            page = page + [entry for entry in result.get('transactions', []) if inside or position_of(entry) < before]
+            has_more = len(page) > limit or result.get('marker') is not None
+            page = page[:limit]
+        return page, position_of(page[-1]) if has_more and page else None
+
+    async def export(self, address: str) -> AsyncIterator[dict]:
+        """Every transaction of the account, newest first, fetched page by page."""
+        history = self._entry(address)
+        async with history.lock:
+            await self._update(address, history)
+            cached, marker, ledger_max = history.transactions, history.older_marker, history.ledger_max
+        for entry in cached:
+            yield entry
+        while marker is not None:
+            result = await self._account_tx(address, -1, ledger_max, marker)
+            for entry in result.get('transactions', []):
+                yield entry
+            marker = result.get('marker')
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'accounts': len(self._accounts),
+            'transactions': sum(len(history.transactions) for history in self._accounts.values()),
+            'hits': self.hits,
+            'refreshes': self.refreshes,
+            'account_tx_calls': self.fetches
+        }
+
+transaction_history = TransactionHistory(
+    xrpl_pool,
+    account_cache,
+    ledger_stream,
+    max_accounts=settings.HISTORY_CACHE_ACCOUNTS,
+    max_transactions=settings.HISTORY_CACHE_TRANSACTIONS,
+    fetch_size=settings.HISTORY_FETCH_SIZE,
+    ttl=settings.ACCOUNT_CACHE_TTL
+)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from xrpl.asyncio.clients import Client
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.wallet import Wallet
+from config import settings
+from .executor import run_blocking
+from .metrics import Counter, MetricsRegistry, metrics
+from .xrpl_client import xrpl_pool
+
+logger = logging.getLogger(__name__)
+
+class WalletPoolExhausted(Exception):
+    """No pre-funded wallet is available and the pool is set to reject."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Wallet pool is empty; retry later")
+        self.retry_after = retry_after
+
+class WalletPool:
+    """Faucet-funded wallets kept ready for /wallet/create.
+
+    A background task tops the pool up to `high` whenever it drops below
+    `low`, with up to `concurrency` faucet requests in flight, so taking a
+    wallet never waits on the faucet. When the pool is empty, `on_empty`
+    decides: "faucet" funds one inline as before the pool existed (an
+    unfunded wallet if the faucet fails), "reject" raises WalletPoolExhausted.
+    Failed refills back off exponentially. Pooled seeds live only in memory
+    and are lost on restart.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        low: int = 5,
+        high: int = 20,
+        concurrency: int = 4,
+        faucet_host: Optional[str] = None,
+        on_empty: str = "faucet",
+        retry_after: float = 5.0,
+        max_backoff: float = 60.0
+    ):
+        if on_empty not in ("faucet", "reject"):
+            raise ValueError(f"Unknown on_empty {on_empty!r}; expected 'faucet' or 'reject'")
+        self.client = client
+        self.low = min(low, high)
+        self.high = high
+        self.concurrency = concurrency
+        self.faucet_host = faucet_host
+        self.on_empty = on_empty
+        self.retry_after = retry_after
+        self.max_backoff = max_backoff
+        self._wallets: Deque[Wallet] = deque()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.refilling = 0
+        self.takes: Optional[Counter] = None
+        self.faucet_requests: Optional[Counter] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._wallets)
+
+    def register_metrics(self, registry: MetricsRegistry) -> None:
+        registry.gauge("wallet_pool_depth", "Pre-funded wallets ready to hand out", lambda: len(self._wallets))
+        registry.gauge("wallet_pool_refilling", "Faucet requests in flight for the pool", lambda: self.refilling)
+        self.takes = registry.counter(
+            "wallet_pool_takes_total",
+            "Wallets handed out by /wallet/create: pooled, funded inline by the faucet, or rejected as exhausted",
+            ("source",)
+        )
+        self.faucet_requests = registry.counter(
+            "wallet_pool_faucet_requests_total",
+            "Faucet funding attempts by outcome",
+            ("result",)
+        )
+
+    def _count(self, counter: Optional[Counter], label: str) -> None:
+        if counter is not None:
+            counter.inc((label,))
+
+    def start(self) -> None:
+        if self._task is None and self.high > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _fund(self) -> Optional[Wallet]:
+        try:
+            wallet = await run_blocking(Wallet.create)
+            wallet = await generate_faucet_wallet(self.client, wallet, faucet_host=self.faucet_host)
+        except Exception as e:
+            logger.warning(f"Faucet funding failed: {e}")
+            self._count(self.faucet_requests, "error")
+            return None
+        self._count(self.faucet_requests, "funded")
+        return wallet
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            if len(self._wallets) >= self.low:
+                self._wake.clear()
+                await self._wake.wait()
+
+            while len(self._wallets) < self.high:
+                self.refilling = min(self.concurrency, self.high - len(self._wallets))
+                try:
+                    funded = await asyncio.gather(*(self._fund() for _ in range(self.refilling)))
+                finally:
+                    self.refilling = 0
+                self._wallets.extend(wallet for wallet in funded if wallet is not None)
+                if any(wallet is not None for wallet in funded):
+                    backoff = 1.0
+                else:
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+
+    async def take(self) -> Tuple[Wallet, bool]:
+        """A wallet and whether it is funded."""
+        if self._wallets:
+            wallet = self._wallets.popleft()
+            if len(self._wallets) < self.low:
+                self._wake.set()
+            self._count(self.takes, "pooled")
+            return wallet, True
+
+        self._wake.set()
+        if self.on_empty == "reject":
+            self._count(self.takes, "exhausted")
+            raise WalletPoolExhausted(self.retry_after)
+
+        self._count(self.takes, "faucet")
+        wallet = await self._fund()
+        if wallet is None:
+            return await run_blocking(Wallet.create), False
+        return wallet, True
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'depth': len(self._wallets),
+            'refilling': self.refilling,
+            'low': self.low,
+            'high': self.high,
+            'on_empty': self.on_empty
+        }
+
+wallet_pool = WalletPool(
+    xrpl_pool,
+    settings.WALLET_POOL_LOW,
+    settings.WALLET_POOL_HIGH,
+    settings.WALLET_POOL_CONCURRENCY,
+    settings.FAUCET_HOST or None,
+    settings.WALLET_POOL_ON_EMPTY,
+    settings.WALLET_POOL_RETRY_AFTER
+)
+wallet_pool.register_metrics(metrics)
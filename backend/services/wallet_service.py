@@ -1,28 +1,40 @@
 import xrpl
-from xrpl.clients import JsonRpcClient
-from xrpl.wallet import Wallet
+from xrpl.asyncio.clients import Client
 from xrpl.utils import drops_to_xrp
-from typing import Dict, Any
-from config import settings
+from typing import Dict, Any, Optional
+from .account_cache import AccountCache
+from .ledger_stream import LedgerStream
+from .signing import TransactionSigner, transaction_signer
+from .wallet_pool import WalletPool, wallet_pool
 
 class WalletService:
     
-    def __init__(self):
-        self.testnet_url = settings.TESTNET_URL
+    def __init__(
+        self,
+        client: Client,
+        cache: AccountCache,
+        stream: Optional[LedgerStream] = None,
+        signer: Optional[TransactionSigner] = None,
+        pool: Optional[WalletPool] = None
+    ):
+        self.client = client
+        self.cache = cache
+        self.stream = stream
+        self.signer = signer or transaction_signer
+        self.pool = pool or wallet_pool
     
-    def create_wallet(self, seed: str = "") -> Dict[str, str]:
-        client = JsonRpcClient(self.testnet_url)
+    async def create_wallet(self, seed: str = "") -> Dict[str, str]:
+        if seed != "":
+            # Importing a seed warms the signing cache for the payments that follow
+            address, public_key = await self.signer.identity(seed)
+            return {
+                "address": address,
+                "seed": seed,
+                "public_key": public_key
+            }
         
-        if seed == "":
-            new_wallet = Wallet.generate()
-            
-            try:
-                funded_wallet = xrpl.wallet.generate_faucet_wallet(client)
-                new_wallet = funded_wallet
-            except Exception as e:
-                print(f"Faucet error: {e}")
-        else:
-            new_wallet = Wallet.from_seed(seed)
+        # Faucet funding takes seconds; the pool has it done ahead of time
+        new_wallet, _ = await self.pool.take()
         
         return {
             "address": new_wallet.address,
@@ -30,16 +42,29 @@ class WalletService:
             "public_key": new_wallet.public_key
         }
     
-    def get_balance(self, address: str) -> Dict[str, Any]:
-        client = JsonRpcClient(self.testnet_url)
-        
+    async def _fetch_account_info(self, address: str) -> Dict[str, Any]:
         acct_info = xrpl.models.requests.AccountInfo(
             account=address,
             ledger_index="validated"
         )
         
-        response = client.request(acct_info)
-        balance_drops = response.result['account_data']['Balance']
+        response = await self.client.request(acct_info)
+        return response.result
+    
+    async def _get_account_data(self, address: str) -> Dict[str, Any]:
+        if self.stream is not None:
+            account_data = self.stream.account_data(address)
+            if account_data is not None:
+                return account_data
+        
+        result = await self.cache.get(address, lambda: self._fetch_account_info(address))
+        if self.stream is not None:
+            self.stream.track_account(address, result)
+        return result.get('account_data', {})
+    
+    async def get_balance(self, address: str) -> Dict[str, Any]:
+        account_data = await self._get_account_data(address)
+        balance_drops = account_data['Balance']
         balance_xrp = drops_to_xrp(balance_drops)
         
         return {
@@ -48,13 +73,5 @@ class WalletService:
             "balance_drops": balance_drops
         }
     
-    def get_account_info(self, address: str) -> Dict[str, Any]:
-        client = JsonRpcClient(self.testnet_url)
-        
-        acct_info = xrpl.models.requests.AccountInfo(
-            account=address,
-            ledger_index="validated"
-        )
-        
-        response = client.request(acct_info)
-        return response.result.get('account_data', {})
+    async def get_account_info(self, address: str) -> Dict[str, Any]:
+        return await self._get_account_data(address)
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from json import JSONDecodeError
+from typing import Optional
+import httpx
+from xrpl.asyncio.clients import AsyncJsonRpcClient, XRPLRequestFailureException
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.models.requests.request import Request
+from xrpl.models.response import Response
+from config import settings
+from .metrics import Counter, Histogram, xrpl_request_duration, xrpl_request_errors
+
+class XRPLClientPool(AsyncJsonRpcClient):
+    """Process-wide JSON-RPC client that reuses keep-alive connections to rippled."""
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        max_concurrency: int = 50,
+        timeout: float = 10.0,
+        durations: Optional[Histogram] = xrpl_request_duration,
+        errors: Optional[Counter] = xrpl_request_errors
+    ):
+        super().__init__(url)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.durations = durations
+        self.errors = errors
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._http is not None and not self._http.is_closed
+
+    async def start(self) -> None:
+        if self.is_open:
+            return
+        self._http = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._semaphore = None
+
+    async def request(self, request: Request, timeout: Optional[float] = None) -> Response:
+        return await self._request_impl(request, timeout=timeout)
+
+    async def _request_impl(self, request: Request, *, timeout: Optional[float] = None) -> Response:
+        # xrpl-py helpers (submit_and_wait, faucet polling) call this directly,
+        # so both the metrics and the lazy open below cover them too.
+        if self.durations is None:
+            return await self._post(request, timeout)
+
+        method = (request.method.value,)
+        start = time.perf_counter()
+        try:
+            response = await self._post(request, timeout)
+        except Exception as e:
+            self.errors.inc(method + (type(e).__name__,))
+            raise
+        finally:
+            self.durations.observe(method, time.perf_counter() - start)
+        if not response.is_successful():
+            self.errors.inc(method + (str(response.result.get('error', 'unknown')),))
+        return response
+
+    async def _post(self, request: Request, timeout: Optional[float]) -> Response:
+        # Lazily open the pool for code paths that run outside the app lifecycle
+        if not self.is_open:
+            await self.start()
+
+        async with self._semaphore:
+            response = await self._http.post(
+                self.url,
+                json=request_to_json_rpc(request),
+                timeout=timeout or self.timeout
+            )
+
+        try:
+            return json_to_response(response.json())
+        except JSONDecodeError:
+            raise XRPLRequestFailureException({
+                "error": response.status_code,
+                "error_message": response.text
+            })
+
+xrpl_pool = XRPLClientPool(
+    settings.TESTNET_URL,
+    max_connections=settings.XRPL_MAX_CONNECTIONS,
+    max_keepalive=settings.XRPL_MAX_KEEPALIVE,
+    keepalive_expiry=settings.XRPL_KEEPALIVE_EXPIRY,
+    max_concurrency=settings.XRPL_MAX_CONCURRENCY,
+    timeout=settings.XRPL_REQUEST_TIMEOUT
+)
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Tests import the app's modules the way main.py does, from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Module-level singletons read settings on import: keep them in memory and off the network
+os.environ.setdefault("RACING_REPOSITORY", "memory")
+os.environ.setdefault("RACE_HISTORY_DIR", "")
+os.environ.setdefault("LEDGER_STREAM_ENABLED", "False")
+os.environ.setdefault("WALLET_POOL_HIGH", "0")
+os.environ.setdefault("SIGNING_POOL", "thread")
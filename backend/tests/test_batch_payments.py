@@ -0,0 +1,165 @@
+import asyncio
+from xrpl.asyncio.clients.async_client import AsyncClient
+from xrpl.models.response import Response, ResponseStatus
+from xrpl.wallet import Wallet
+from benchmarks.mock_rippled import MockLedger
+from services.account_cache import AccountCache
+from services.payment_jobs import PaymentJobTracker
+from services.payment_service import PaymentService
+from services.signing import TransactionSigner
+
+DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
+REJECTED_DESTINATION = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+UNFUNDED_DESTINATION = Wallet.create().address
+REJECTIONS = {REJECTED_DESTINATION: 'temBAD_AMOUNT', UNFUNDED_DESTINATION: 'tefBAD_AUTH'}
+ACCOUNT_SEQUENCE = 10
+
+class RejectingLedger(MockLedger):
+    """MockLedger that refuses payments to the destinations in REJECTIONS, like rippled's pre-ledger checks."""
+
+    def _rpc_submit(self, params: dict) -> dict:
+        result = super()._rpc_submit(params)
+        rejection = REJECTIONS.get(result['tx_json'].get('Destination'))
+        if rejection and result['accepted']:
+            # Undo the acceptance: these results never reach the ledger or consume the sequence
+            self.pending.pop()
+            self.sequences[result['tx_json']['Account']] -= 1
+            result.update(engine_result=rejection, engine_result_message=rejection, accepted=False)
+        return result
+
+class LedgerClient(AsyncClient):
+    """In-process client answering every request from a MockLedger."""
+
+    def __init__(self, ledger: MockLedger):
+        super().__init__("mock://ledger")
+        self.ledger = ledger
+
+    async def _request_impl(self, request, *, timeout=10.0):
+        params = request.to_dict()
+        result = self.ledger.handle(params.pop('method'), params)
+        status = ResponseStatus.ERROR if 'error' in result else ResponseStatus.SUCCESS
+        return Response(status=status, result=result)
+
+def open_payments(local_sequence: int):
+    """A PaymentService on a fresh RejectingLedger, with a sender at ACCOUNT_SEQUENCE whose local sequence is `local_sequence`."""
+    ledger = RejectingLedger()
+    client = LedgerClient(ledger)
+    cache = AccountCache()
+    jobs = PaymentJobTracker(client, cache, poll_interval=0.01)
+    service = PaymentService(client, cache, jobs, signer=TransactionSigner("thread", 1))
+    sender = Wallet.create()
+    ledger._account(sender.address)
+    ledger.sequences[sender.address] = ACCOUNT_SEQUENCE
+    service.sequences._next[sender.address] = local_sequence
+    return ledger, service, sender
+
+def run_payments(ledger: MockLedger, service: PaymentService, submit):
+    """Run `submit()`, closing ledgers until every job it returns is final."""
+    async def close_ledgers():
+        while True:
+            await asyncio.sleep(0.05)
+            ledger.close_ledger()
+
+    async def run():
+        closer = asyncio.create_task(close_ledgers())
+        submitted = await submit()
+        final = [await service.jobs.wait(job["job_id"], timeout=2) for job in submitted]
+        closer.cancel()
+        await service.jobs.close()
+        return final
+    try:
+        return asyncio.run(run())
+    finally:
+        service.signer.close()
+
+def sent_sequences(ledger: MockLedger, address: str):
+    return sorted(tx['Sequence'] for tx in ledger.txs.values() if tx['Account'] == address)
+
+def run_batch(local_sequence: int, destinations):
+    """Send one batch from an account at ACCOUNT_SEQUENCE whose local sequence is `local_sequence`."""
+    ledger, service, sender = open_payments(local_sequence)
+    payments = [{"destination": d, "amount": 1} for d in destinations]
+    final = run_payments(ledger, service, lambda: service.send_batch(sender.seed, payments))
+    return final, sent_sequences(ledger, sender.address), ledger
+
+def test_batch_from_an_up_to_date_sequence_validates_every_payment():
+    final, sequences, ledger = run_batch(ACCOUNT_SEQUENCE, [DESTINATION] * 3)
+
+    assert [job["status"] for job in final] == ["validated"] * 3
+    assert sequences == [10, 11, 12]
+    assert ledger.calls['submit'] == 3
+
+def test_stale_local_sequence_is_refetched_after_tefPAST_SEQ():
+    final, sequences, ledger = run_batch(ACCOUNT_SEQUENCE - 2, [DESTINATION] * 3)
+
+    assert [job["status"] for job in final] == ["validated"] * 3
+    assert sequences == [10, 11, 12]
+    # One refused submission, then the whole batch re-signed from the ledger's sequence
+    assert ledger.calls['submit'] == 4
+
+def test_local_sequence_ahead_of_the_ledger_is_refetched_after_terPRE_SEQ():
+    final, sequences, ledger = run_batch(ACCOUNT_SEQUENCE + 2, [DESTINATION] * 3)
+
+    assert [job["status"] for job in final] == ["validated"] * 3
+    assert sequences == [10, 11, 12]
+    assert ledger.calls['submit'] == 4
+
+def test_rejected_payment_fails_alone_and_later_payments_shift_down():
+    destinations = [DESTINATION, REJECTED_DESTINATION, DESTINATION, DESTINATION]
+    final, sequences, ledger = run_batch(ACCOUNT_SEQUENCE, destinations)
+
+    assert [job["status"] for job in final] == ["validated", "failed", "validated", "validated"]
+    assert final[1]["result"] == "temBAD_AMOUNT"
+    # No gap: the rejected payment's sequence went to the next one
+    assert sequences == [10, 11, 12]
+    assert ledger.calls['submit'] == 4
+
+def test_submitted_payment_that_never_reaches_a_ledger_fails_at_once():
+    ledger, service, sender = open_payments(ACCOUNT_SEQUENCE)
+
+    async def submit():
+        return [await service.submit_payment(sender.seed, UNFUNDED_DESTINATION, 1)]
+    job, = run_payments(ledger, service, submit)
+
+    assert job["status"] == "failed"
+    assert job["result"] == "tefBAD_AUTH"
+    assert job["completed_at"] is not None
+
+def test_many_rejections_in_one_batch_never_give_up_on_valid_payments():
+    destinations = [REJECTED_DESTINATION] * 7 + [DESTINATION] * 3
+    final, sequences, ledger = run_batch(ACCOUNT_SEQUENCE, destinations)
+
+    assert [job["status"] for job in final] == ["failed"] * 7 + ["validated"] * 3
+    assert all(job["result"] == "temBAD_AMOUNT" for job in final[:7])
+    assert sequences == [10, 11, 12]
+
+def test_single_payments_share_the_batch_sequence_allocator():
+    ledger, service, sender = open_payments(ACCOUNT_SEQUENCE)
+    payments = [{"destination": DESTINATION, "amount": 1}] * 5
+
+    async def submit():
+        batch, single = await asyncio.gather(
+            service.send_batch(sender.seed, payments),
+            service.submit_payment(sender.seed, DESTINATION, 1)
+        )
+        return batch + [single]
+    final = run_payments(ledger, service, submit)
+
+    assert [job["status"] for job in final] == ["validated"] * 6
+    assert sent_sequences(ledger, sender.address) == list(range(10, 16))
+    # Nobody was handed a sequence the other had already reserved
+    assert ledger.calls['submit'] == 6
+
+def test_send_payment_waits_for_validation():
+    ledger, service, sender = open_payments(ACCOUNT_SEQUENCE - 3)
+
+    async def submit():
+        result = await service.send_payment(sender.seed, DESTINATION, 1)
+        assert result["status"] == "success"
+        assert result["result"] == "tesSUCCESS"
+        assert result["validated"]
+        return []
+    run_payments(ledger, service, submit)
+
+    # The stale local sequence was refetched after tefPAST_SEQ
+    assert sent_sequences(ledger, sender.address) == [10]
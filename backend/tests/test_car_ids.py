@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from services.race_history import RaceHistory
+from services.racing_repository import InMemoryRacingRepository
+from services.racing_service import RacingService
+
+WALLET = "rCarIdsTest"
+
+def new_service(seed: int = 1) -> RacingService:
+    return RacingService(InMemoryRacingRepository(), RaceHistory(), rng=np.random.default_rng(seed))
+
+def test_adding_an_existing_car_id_is_refused_and_keeps_the_original():
+    service = new_service()
+    _, car, _ = service.create_car(WALLET, "seed")
+    record = service.store.record(car)
+
+    with pytest.raises(ValueError):
+        service.store.add(**{**record, 'wallet_address': "rSomeoneElse"})
+
+    assert len(service.store) == 1
+    assert service.get_car(car.car_id).wallet_address == WALLET
+
+def test_batch_ids_are_unique_and_skip_ids_already_in_the_store():
+    service = new_service()
+    _, car, _ = service.create_car(WALLET, "seed")
+    record = service.store.record(car)
+    # The next batch would draw this id first: claim it beforehand
+    first = f"CAR-{np.random.default_rng(7).integers(1 << 48, size=1000).tolist()[0]:012x}"
+    service.store.add(**{**record, 'car_id': first})
+
+    service.rng = np.random.default_rng(7)
+    car_ids = service._generate_car_ids(WALLET, 1000)
+
+    assert len(set(car_ids)) == 1000
+    assert first not in car_ids
+    assert not any(car_id in service.store for car_id in car_ids)
+
+def test_batches_drawn_back_to_back_never_overlap():
+    service = new_service()
+    first = service._generate_car_ids(WALLET, 5000)
+    second = service._generate_car_ids(WALLET, 5000)
+
+    assert not set(first) & set(second)
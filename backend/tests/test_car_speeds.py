@@ -0,0 +1,31 @@
+import numpy as np
+from services.car_store import Car, CarStore, speed_from_raw
+
+def fleet(count: int = 2000, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    attributes = [Car.random_attributes(rng) for _ in range(count)]
+    store = CarStore()
+    store.add_records(
+        {'car_id': f"CAR-{i:012x}", 'wallet_address': "rSpeedTest", 'flags': flags, 'weights': weights}
+        for i, (flags, weights) in enumerate(attributes)
+    )
+    return store, attributes
+
+def test_weights_are_stored_exactly():
+    store, attributes = fleet()
+    for i, (_, weights) in enumerate(attributes):
+        assert np.array_equal(store.weights_of(store.get(f"CAR-{i:012x}")._slot), np.asarray(weights, dtype=np.float64))
+
+def test_store_speeds_match_the_per_car_formula():
+    store, attributes = fleet()
+    slots = [store.get(f"CAR-{i:012x}")._slot for i in range(len(attributes))]
+    legacy = np.array([speed_from_raw(sum(f * w for f, w in zip(flags, weights))) for flags, weights in attributes])
+
+    assert np.abs(store.compute_speeds(slots) - legacy).max() < 1e-9
+
+def test_single_car_and_batch_speeds_are_identical():
+    store, attributes = fleet()
+    slots = [store.get(f"CAR-{i:012x}")._slot for i in range(len(attributes))]
+    batch = store.compute_speeds(slots)
+
+    assert [store.refresh_speed(slot) for slot in slots] == batch.tolist()
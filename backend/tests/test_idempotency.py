@@ -0,0 +1,151 @@
+import asyncio
+import json
+from services.idempotency import IdempotencyCache, IdempotencyMiddleware
+
+class Handler:
+    """ASGI app answering with a fixed status and counting how often it ran."""
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        message = await receive()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        body = json.dumps({'call': self.calls, 'echo': message['body'].decode()}).encode()
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+async def post(app, path: str, body: bytes, key: bytes = None):
+    headers = [(b'idempotency-key', key)] if key is not None else []
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': headers, 'query_string': b''}
+    messages = iter([{'type': 'http.request', 'body': body, 'more_body': False}])
+
+    async def receive():
+        return next(messages, {'type': 'http.disconnect'})
+
+    response = {'body': b''}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = dict(message['headers'])
+        else:
+            response['body'] += message.get('body', b'')
+    await app(scope, receive, send)
+    return response
+
+def middleware(handler: Handler) -> IdempotencyMiddleware:
+    return IdempotencyMiddleware(handler, IdempotencyCache(), paths=["/payment"])
+
+def test_retry_with_same_key_replays_the_stored_response():
+    handler = Handler()
+    app = middleware(handler)
+
+    async def run():
+        first = await post(app, "/payment", b'{"amount": 1}', b"k1")
+        second = await post(app, "/payment", b'{"amount": 1}', b"k1")
+        return first, second
+    first, second = asyncio.run(run())
+
+    assert handler.calls == 1
+    assert second['status'] == first['status'] == 200
+    assert second['body'] == first['body']
+    assert second['headers'][b'idempotent-replayed'] == b'true'
+    assert b'idempotent-replayed' not in first['headers']
+
+def test_concurrent_duplicate_waits_for_the_first_instead_of_running():
+    handler = Handler(delay=0.05)
+    app = middleware(handler)
+
+    async def run():
+        return await asyncio.gather(*(post(app, "/payment", b'{}', b"k1") for _ in range(3)))
+    responses = asyncio.run(run())
+
+    assert handler.calls == 1
+    assert len({response['body'] for response in responses}) == 1
+
+def test_key_reused_for_a_different_body_is_refused():
+    handler = Handler()
+    app = middleware(handler)
+
+    async def run():
+        await post(app, "/payment", b'{"amount": 1}', b"k1")
+        return await post(app, "/payment", b'{"amount": 2}', b"k1")
+    response = asyncio.run(run())
+
+    assert response['status'] == 422
+    assert handler.calls == 1
+
+def test_server_errors_are_not_stored_so_a_retry_runs_again():
+    for status in (500, 502, 503, 429):
+        handler = Handler(status=status)
+        app = middleware(handler)
+
+        async def run():
+            await post(app, "/payment", b'{}', b"k1")
+            handler.status = 200
+            return await post(app, "/payment", b'{}', b"k1")
+        response = asyncio.run(run())
+
+        assert handler.calls == 2, status
+        assert response['status'] == 200
+        assert app.cache.stats() == {'cached': 1, 'running': 0}
+
+def test_client_errors_are_stored():
+    handler = Handler(status=400)
+    app = middleware(handler)
+
+    async def run():
+        await post(app, "/payment", b'{}', b"k1")
+        return await post(app, "/payment", b'{}', b"k1")
+    response = asyncio.run(run())
+
+    assert handler.calls == 1
+    assert response['status'] == 400
+
+def test_failed_handler_releases_the_key():
+    class Failing(Handler):
+        async def __call__(self, scope, receive, send):
+            self.calls += 1
+            raise RuntimeError("payment backend down")
+
+    handler = Failing()
+    app = middleware(handler)
+
+    async def run():
+        for _ in range(2):
+            try:
+                await post(app, "/payment", b'{}', b"k1")
+            except RuntimeError:
+                pass
+    asyncio.run(run())
+
+    assert handler.calls == 2
+    assert app.cache.stats() == {'cached': 0, 'running': 0}
+
+def test_requests_without_a_key_or_off_the_listed_paths_are_untouched():
+    handler = Handler()
+    app = middleware(handler)
+
+    async def run():
+        await post(app, "/payment", b'{}')
+        await post(app, "/payment", b'{}')
+        await post(app, "/wallet/create", b'{}', b"k1")
+        await post(app, "/wallet/create", b'{}', b"k1")
+    asyncio.run(run())
+
+    assert handler.calls == 4
+
+def test_every_paid_post_route_is_covered():
+    from main import app
+    from routes import payment_router
+    from routes.racing import router as racing_router
+
+    paths = next(m.kwargs['paths'] for m in app.user_middleware if m.cls is IdempotencyMiddleware)
+    expected = {route.path for router in (payment_router, racing_router) for route in router.routes if "POST" in route.methods}
+    assert expected <= set(paths)
+    assert {"/payment", "/payment/batch", "/race/queue", "/race/train/batch"} <= set(paths)
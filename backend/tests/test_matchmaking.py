@@ -0,0 +1,123 @@
+import asyncio
+import numpy as np
+from services.matchmaking import RaceMatchmaker
+from services.race_history import RaceHistory
+from services.racing_repository import InMemoryRacingRepository
+from services.racing_service import RacingService
+
+WALLET = "rMatchmakingTest"
+SEED = "sEdMatchmakingTest"
+
+class LedgerRacingService(RacingService):
+    """RacingService that records entry fees and refunds instead of faking their transactions."""
+
+    def __init__(self):
+        super().__init__(InMemoryRacingRepository(), RaceHistory(), rng=np.random.default_rng(1))
+        self.charged = []
+        self.refunded = []
+
+    def _process_payment(self, wallet_seed, amount_xrp):
+        self.charged.append(amount_xrp)
+        return True, f"TX-{len(self.charged)}"
+
+    def _process_refund(self, wallet_address, amount_xrp):
+        self.refunded.append((wallet_address, amount_xrp))
+        return True, f"REFUND-{len(self.refunded)}"
+
+def create_cars(service: LedgerRacingService, count: int):
+    car_ids = [service.create_car(WALLET, SEED)[1].car_id for _ in range(count)]
+    # Only entry fees count from here on
+    service.charged.clear()
+    return car_ids
+
+def test_leaving_the_queue_refunds_the_entry_fee():
+    service = LedgerRacingService()
+    car_id, = create_cars(service, 1)
+    matchmaker = RaceMatchmaker(service, lobby_size=4, max_wait=60)
+
+    async def run():
+        _, entry, _ = matchmaker.enqueue(car_id, WALLET, SEED)
+        success, _ = matchmaker.cancel(entry["entry_id"], WALLET)
+        await matchmaker.close()
+        return success, entry
+    success, entry = asyncio.run(run())
+
+    assert success
+    assert entry["status"] == "cancelled"
+    assert entry["refund_tx"] == "REFUND-1"
+    assert service.refunded == [(WALLET, 1.0)]
+    assert matchmaker.queued == 0
+
+def test_car_sold_while_queued_is_refunded_when_the_lobby_races():
+    service = LedgerRacingService()
+    sold, kept = create_cars(service, 2)
+    matchmaker = RaceMatchmaker(service, lobby_size=4, max_wait=0.05, tier_kmh=1000)
+
+    async def run():
+        _, sold_entry, _ = matchmaker.enqueue(sold, WALLET, SEED)
+        _, kept_entry, _ = matchmaker.enqueue(kept, WALLET, SEED)
+        service.sell_car(sold, WALLET)
+        await matchmaker.wait(kept_entry["entry_id"], timeout=2)
+        await matchmaker.close()
+        return sold_entry, kept_entry
+    sold_entry, kept_entry = asyncio.run(run())
+
+    assert sold_entry["status"] == "cancelled"
+    assert sold_entry["refund_tx"] is not None
+    assert kept_entry["status"] == "complete"
+    assert kept_entry["refund_tx"] is None
+    assert service.refunded == [(WALLET, 1.0)]
+
+def test_failed_race_refunds_every_entrant():
+    service = LedgerRacingService()
+    car_ids = create_cars(service, 3)
+    matchmaker = RaceMatchmaker(service, lobby_size=3, tier_kmh=1000)
+
+    def broken_race(lobbies):
+        raise RuntimeError("race engine down")
+    matchmaker._race = broken_race
+
+    async def run():
+        entries = [matchmaker.enqueue(car_id, WALLET, SEED)[1] for car_id in car_ids]
+        await matchmaker.close()
+        return entries
+    entries = asyncio.run(run())
+
+    assert [entry["status"] for entry in entries] == ["cancelled"] * 3
+    assert all(entry["refund_tx"] for entry in entries)
+    assert len(service.refunded) == len(service.charged) == 3
+
+def test_completed_race_charges_once_and_refunds_nothing():
+    service = LedgerRacingService()
+    car_ids = create_cars(service, 2)
+    matchmaker = RaceMatchmaker(service, lobby_size=2, tier_kmh=1000)
+
+    async def run():
+        entries = [matchmaker.enqueue(car_id, WALLET, SEED)[1] for car_id in car_ids]
+        await matchmaker.close()
+        return entries
+    entries = asyncio.run(run())
+
+    assert [entry["status"] for entry in entries] == ["complete"] * 2
+    assert service.charged == [1.0, 1.0]
+    assert service.refunded == []
+
+def test_eviction_drops_the_oldest_finished_entries_and_keeps_queued_ones():
+    service = LedgerRacingService()
+    car_ids = create_cars(service, 6)
+    matchmaker = RaceMatchmaker(service, lobby_size=100, max_wait=60, max_entries=3)
+
+    async def run():
+        entries = [matchmaker.enqueue(car_id, WALLET, SEED)[1] for car_id in car_ids]
+        for entry in entries[:4]:
+            matchmaker.cancel(entry["entry_id"], WALLET)
+        # Enqueuing again evicts past max_entries
+        _, again, _ = matchmaker.enqueue(car_ids[0], WALLET, SEED)
+        await matchmaker.close()
+        return entries, again
+    entries, again = asyncio.run(run())
+
+    kept = set(matchmaker.entries)
+    assert {entries[4]["entry_id"], entries[5]["entry_id"], again["entry_id"]} <= kept
+    assert len(kept) == 3
+    assert not {entry["entry_id"] for entry in entries[:4]} & kept
@@ -0,0 +1,22 @@
+import asyncio
+from services.account_cache import AccountCache
+from services.payment_jobs import PaymentJobTracker
+
+def test_eviction_drops_the_oldest_finished_jobs_and_keeps_pending_ones():
+    async def run():
+        jobs = PaymentJobTracker(None, AccountCache(), max_jobs=3)
+        # In flight: submitted but not final, as track() leaves them
+        pending = [jobs._new_job(f"PENDING{i}", "tesSUCCESS") for i in range(2)]
+        rejected = [jobs.reject(f"REJECTED{i}", "temBAD_AMOUNT", "bad amount") for i in range(4)]
+        return jobs, pending, rejected
+    jobs, pending, rejected = asyncio.run(run())
+
+    assert set(jobs.jobs) == {pending[0]["job_id"], pending[1]["job_id"], rejected[-1]["job_id"]}
+
+def test_pending_jobs_are_kept_past_the_limit():
+    async def run():
+        jobs = PaymentJobTracker(None, AccountCache(), max_jobs=2)
+        return jobs, [jobs._new_job(f"PENDING{i}", "tesSUCCESS") for i in range(4)]
+    jobs, pending = asyncio.run(run())
+
+    assert list(jobs.jobs) == [job["job_id"] for job in pending]
@@ -0,0 +1,90 @@
+import os
+import numpy as np
+from benchmarks.workload import Workload, parse_mix, state_digest
+from services.race_history import RaceHistory
+from services.racing_journal import JournalRacingRepository
+from services.racing_service import RacingService
+
+def open_service(directory, snapshot_every: int = 700, seed: int = 3) -> RacingService:
+    repository = JournalRacingRepository(str(directory), snapshot_every)
+    return RacingService(repository, RaceHistory(segment_size=64, max_segments=4), rng=np.random.default_rng(seed))
+
+def play(service: RacingService, operations: int) -> None:
+    workload = Workload(parse_mix("create=3,train=2,test=1,race=3,sell=1"), 50, 5)
+    for _ in range(operations):
+        name, wallet, car_id = workload.next()
+        if name == 'create':
+            workload.created(wallet, service.create_car(wallet, "seed")[1].car_id)
+        elif name == 'train':
+            workload.created(wallet, service.train_car(car_id, wallet, "seed")[2].car_id)
+        elif name == 'test':
+            service.test_speed(car_id, wallet)
+        elif name == 'race':
+            service.enter_race(car_id, wallet, "seed")
+        else:
+            service.sell_car(car_id, wallet)
+            workload.sold(wallet, car_id)
+
+def crash(service: RacingService) -> None:
+    """Stop the writer once everything queued is on disk, without the final snapshot close() takes."""
+    repository = service.repository
+    repository.wait_snapshot()
+    repository._writes.put(None)
+    repository._writer.join()
+
+def state(service: RacingService):
+    store = service.store
+    return (
+        state_digest(service),
+        store.leaderboard.page(0, 20),
+        dict(store.parents),
+        {car_id: store.get(car_id).last_speed for car_id in store._slots},
+        service.history.recent()
+    )
+
+def test_crash_after_snapshots_restores_the_same_state(tmp_path):
+    service = open_service(tmp_path)
+    play(service, 5000)
+    before = state(service)
+    crash(service)
+
+    names = os.listdir(tmp_path)
+    assert sum(name.startswith("snapshot-") for name in names) == 1
+
+    restored = open_service(tmp_path)
+    assert state(restored) == before
+    # Only the tail after the latest snapshot is replayed
+    assert 0 < restored.repository.replayed_events < 700
+    restored.repository.close()
+
+def test_torn_last_line_is_ignored(tmp_path):
+    service = open_service(tmp_path)
+    play(service, 500)
+    before = state(service)
+    crash(service)
+
+    segment = max(name for name in os.listdir(tmp_path) if name.startswith("journal-"))
+    with open(tmp_path / segment, 'ab') as f:
+        f.write(b'{"e":"sold","car_id":"CAR-')
+
+    restored = open_service(tmp_path)
+    assert state(restored) == before
+    restored.repository.close()
+
+def test_snapshot_never_reads_the_live_store(tmp_path):
+    service = open_service(tmp_path, snapshot_every=10 ** 9)
+    play(service, 2000)
+    before = state(service)
+
+    def columns():
+        raise AssertionError("snapshot read the live store")
+    service.store.columns = columns
+    service.repository.snapshot()
+    service.repository.wait_snapshot()
+    crash(service)
+
+    assert [name for name in os.listdir(tmp_path) if name.startswith("snapshot-")]
+    restored = open_service(tmp_path)
+    assert state(restored) == before
+    assert restored.repository.replayed_events == 0
+    restored.repository.close()
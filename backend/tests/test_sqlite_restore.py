@@ -0,0 +1,37 @@
+import numpy as np
+from services.race_history import RaceHistory
+from services.racing_repository import SQLiteRacingRepository
+from services.racing_service import RacingService
+
+WALLET = "rSQLiteTest"
+
+def open_service(path, seed: int = 1) -> RacingService:
+    history = RaceHistory(segment_size=4, max_segments=2)
+    return RacingService(SQLiteRacingRepository(str(path)), history, rng=np.random.default_rng(seed))
+
+def test_restart_restores_cars_leaderboard_lineage_and_recent_races(tmp_path):
+    path = tmp_path / "racing.db"
+    service = open_service(path)
+    car_ids = [service.create_car(WALLET, "seed")[1].car_id for _ in range(30)]
+    for car_id in car_ids[:20]:
+        service.enter_race(car_id, WALLET, "seed")
+    child_id = service.train_car(car_ids[0], WALLET, "seed")[2].car_id
+    service.sell_car(car_ids[5], WALLET)
+    leaderboard = service.get_leaderboard(0, 10)
+    latest = service.get_latest_race(wallet_address=WALLET)
+    parents = dict(service.store.parents)
+    recent = service.history.recent()
+    service.repository.close()
+
+    restored = open_service(path)
+    assert len(restored.store) == len(service.store) == 30
+    assert car_ids[5] not in restored.store
+    assert restored.get_car(child_id) is not None
+    assert restored.get_leaderboard(0, 10) == leaderboard
+    assert dict(restored.store.parents) == parents
+    # Only the races the history keeps in memory are loaded back
+    assert restored.history.recent() == recent
+    assert restored.history.total == 20
+    assert len(recent) == 8
+    assert restored.get_latest_race(wallet_address=WALLET)['race_id'] == latest['race_id']
+    restored.repository.close()